@@ -67,8 +67,9 @@ async def lifespan(app: FastAPI):
     
     # Start mDNS service in background (don't block startup)
     mdns_service = GhostStreamService(config.server.host, config.server.port)
-    asyncio.get_event_loop().run_in_executor(None, mdns_service.start)
-    asyncio.get_event_loop().run_in_executor(None, mdns_service.start_udp_responder)
+    loop = asyncio.get_running_loop()
+    loop.run_in_executor(None, mdns_service.start)
+    loop.run_in_executor(None, mdns_service.start_udp_responder)
     
     # Start GhostHub registration if configured
     if config.ghosthub.url and config.ghosthub.auto_register:
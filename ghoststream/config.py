@@ -64,6 +64,7 @@ class HardwareConfig(BaseModel):
     qsv_preset: str = "medium"
     videotoolbox_preset: str = "medium"
     vaapi_device: str = "/dev/dri/renderD128"
+    use_pynvc: bool = False  # Batch NVENC jobs via PyNvVideoCodec instead of FFmpeg (if installed)
 
 
 class LimitsConfig(BaseModel):
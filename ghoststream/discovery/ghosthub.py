@@ -100,7 +100,7 @@ class GhostHubRegistration:
         
         # Try registration once on startup
         logger.info(f"[GhostHub] Attempting to register with GhostHub at {ghosthub_url}")
-        success = await asyncio.get_event_loop().run_in_executor(None, self.register)
+        success = await asyncio.to_thread(self.register)
         
         if success:
             logger.info(f"[GhostHub] ✓ Registered successfully with GhostHub")
@@ -116,7 +116,7 @@ class GhostHubRegistration:
         while not self._stop_event:
             await asyncio.sleep(interval_seconds)
             if not self._stop_event:
-                if await asyncio.get_event_loop().run_in_executor(None, self.register):
+                if await asyncio.to_thread(self.register):
                     if failures > 0:
                         logger.info(f"[GhostHub] ✓ Re-registered with GhostHub after {failures} failures")
                     failures = 0
@@ -19,6 +19,10 @@ from .stats import JobStats
 logger = logging.getLogger(__name__)
 
 
+class _ShutdownRequested(Exception):
+    """Raised inside the worker task group to unwind it when stop() is called."""
+
+
 class JobManager:
     """Manages the job queue and execution with proper lifecycle tracking."""
     
@@ -28,6 +32,9 @@ class JobManager:
         self.queue: asyncio.Queue = asyncio.Queue()
         self.active_jobs: Dict[str, asyncio.Task] = {}
         self.engine = TranscodeEngine()
+        # temp_dir is fixed for the engine's lifetime; resolve it once for cleanup/stats
+        self._temp_dir_path = Path(self.engine.temp_dir)
+        self._temp_dir_str = str(self.engine.temp_dir)
         self.stats = JobStats()
         self.base_url = base_url
         self.progress_callbacks: List[Callable[[str, TranscodeProgress], None]] = []
@@ -36,6 +43,13 @@ class JobManager:
         self._cleanup_task: Optional[asyncio.Task] = None
         self._running = False
         
+        # Workers and the cleanup loop are owned by a TaskGroup running in a
+        # supervisor task, so shutdown cancels them all as one unit
+        self._task_group: Optional[asyncio.TaskGroup] = None
+        self._supervisor: Optional[asyncio.Task] = None
+        self._shutdown_event = asyncio.Event()
+        self._shutdown_timeout = 30.0  # Max seconds to wait for workers on stop()
+        
         # Concurrency control
         self._create_lock = asyncio.Lock()  # Protects stream creation race conditions
         
@@ -60,47 +74,76 @@ class JobManager:
         # Clean up orphaned temp directories on startup
         await self._cleanup_orphaned_dirs()
         
-        for i in range(max_workers):
-            worker = asyncio.create_task(self._worker(i))
-            self._workers.append(worker)
-        
-        # Start background cleanup task
-        self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+        self._shutdown_event.clear()
+        self._supervisor = asyncio.create_task(self._supervise(max_workers))
         
         logger.info(f"Started {max_workers} job workers + cleanup task")
     
+    async def _supervise(self, max_workers: int) -> None:
+        """
+        Own the workers and cleanup loop in a TaskGroup until stop() is requested.
+        
+        Raising the shutdown sentinel inside the group makes the TaskGroup cancel
+        every child and wait for all of them before this task exits.
+        """
+        try:
+            async with asyncio.TaskGroup() as tg:
+                self._task_group = tg
+                for i in range(max_workers):
+                    self._workers.append(tg.create_task(self._run_worker(i)))
+                
+                # Start background cleanup task
+                self._cleanup_task = tg.create_task(self._cleanup_loop())
+                
+                await self._shutdown_event.wait()
+                raise _ShutdownRequested()
+        except* _ShutdownRequested:
+            pass
+        except* Exception as eg:
+            logger.error(f"Job manager task group failed: {eg.exceptions}")
+        finally:
+            self._task_group = None
+            self._cleanup_task = None
+            self._workers.clear()
+    
     async def stop(self) -> None:
         """Stop the job manager and cancel all workers."""
         self._running = False
         
-        # Cancel cleanup task
-        if self._cleanup_task:
-            self._cleanup_task.cancel()
-            try:
-                await self._cleanup_task
-            except asyncio.CancelledError:
-                pass
-            self._cleanup_task = None
-        
-        # Cancel all active jobs
-        for job_id, task in self.active_jobs.items():
-            if job_id in self.jobs:
-                self.jobs[job_id].cancel_event.set()
-            if task:
-                task.cancel()
-        
-        # Cancel workers
-        for worker in self._workers:
-            worker.cancel()
+        # Signal active jobs first so FFmpeg starts terminating before the workers
+        # running them are cancelled
+        for job_id in list(self.active_jobs):
+            job = self.jobs.get(job_id)
+            if job:
+                job.cancel_event.set()
         
-        await asyncio.gather(*self._workers, return_exceptions=True)
-        self._workers.clear()
+        if self._supervisor:
+            self._shutdown_event.set()
+            try:
+                async with asyncio.timeout(self._shutdown_timeout):
+                    await self._supervisor
+            except TimeoutError:
+                logger.warning(
+                    f"Job workers did not stop within {self._shutdown_timeout:.0f}s, abandoning them"
+                )
+            self._supervisor = None
         
         # Final cleanup of all jobs
         await self._cleanup_all_jobs()
         
         logger.info("Job manager stopped")
     
+    async def _run_worker(self, worker_id: int) -> None:
+        """
+        Run a worker inside the task group without letting a crash abort the group.
+        
+        A crashed worker simply finishes; _check_worker_health replaces it.
+        """
+        try:
+            await self._worker(worker_id)
+        except Exception as e:
+            logger.error(f"[WorkerHealth] Worker {worker_id} crashed with: {e}")
+    
     async def _worker(self, worker_id: int) -> None:
         """Worker coroutine that processes jobs from the queue."""
         logger.info(f"Worker {worker_id} started")
@@ -729,7 +772,7 @@ class JobManager:
     
     async def _cleanup_orphaned_dirs(self) -> int:
         """Clean up temp directories that don't have a matching job (orphaned)."""
-        temp_dir = Path(self.engine.temp_dir)
+        temp_dir = self._temp_dir_path
         if not temp_dir.exists():
             return 0
         
@@ -768,22 +811,14 @@ class JobManager:
         
         for i, worker in enumerate(self._workers):
             if worker.done():
-                # Worker finished - check if it was an error
-                try:
-                    exc = worker.exception()
-                    if exc:
-                        logger.error(f"[WorkerHealth] Worker {i} crashed with: {exc}")
-                        dead_workers.append(i)
-                    else:
-                        # Worker finished cleanly (shouldn't happen while running)
-                        dead_workers.append(i)
-                except asyncio.CancelledError:
-                    dead_workers.append(i)
+                # Crashes are logged by _run_worker; a worker that finished while
+                # the manager is running has died either way
+                dead_workers.append(i)
             else:
                 alive_workers.append(i)
         
         # Restart dead workers
-        if dead_workers and self._running:
+        if dead_workers and self._running and self._task_group is not None:
             logger.warning(f"[WorkerHealth] {len(dead_workers)} worker(s) died, restarting...")
             
             # Remove dead workers from list
@@ -792,7 +827,7 @@ class JobManager:
             # Start new workers to replace dead ones
             for i in range(len(dead_workers)):
                 new_worker_id = len(self._workers)
-                new_worker = asyncio.create_task(self._worker(new_worker_id))
+                new_worker = self._task_group.create_task(self._run_worker(new_worker_id))
                 self._workers.append(new_worker)
                 logger.info(f"[WorkerHealth] Started replacement worker {new_worker_id}")
     
@@ -835,7 +870,7 @@ class JobManager:
             "ready_jobs": ready,
             "cleaned_jobs": cleaned,
             "nearly_stale": stale,
-            "temp_dir": str(self.engine.temp_dir)
+            "temp_dir": self._temp_dir_str
         }
 
 
@@ -3,7 +3,7 @@ Modular transcoding package for GhostStream.
 Professional-grade FFmpeg transcoding with HDR support and hardware acceleration.
 """
 
-from .models import QualityPreset, TranscodeProgress, MediaInfo
+from .models import QualityPreset, TranscodeProgress, MediaInfo, EncoderChoice, ResolvedJob, DEFAULT_MEDIA_INFO
 from .constants import (
     QUALITY_LADDER,
     TONEMAP_FILTER,
@@ -20,6 +20,7 @@ from .filters import FilterBuilder
 from .encoders import EncoderSelector
 from .probe import MediaProbe
 from .commands import CommandBuilder
+from .pynvc import PyNvcPipeline, PyNvcPipelineBuilder, HAS_PYNVC
 from .engine import TranscodeEngine
 from .error_classifier import (
     FFmpegError,
@@ -85,6 +86,9 @@ __all__ = [
     "QualityPreset",
     "TranscodeProgress",
     "MediaInfo",
+    "EncoderChoice",
+    "ResolvedJob",
+    "DEFAULT_MEDIA_INFO",
     # Constants
     "QUALITY_LADDER",
     "TONEMAP_FILTER",
@@ -102,6 +106,10 @@ __all__ = [
     "MediaProbe",
     "CommandBuilder",
     "TranscodeEngine",
+    # PyNvVideoCodec backend (optional)
+    "PyNvcPipeline",
+    "PyNvcPipelineBuilder",
+    "HAS_PYNVC",
     # Error Classification
     "FFmpegError",
     "ErrorClassifier",
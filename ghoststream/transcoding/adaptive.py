@@ -1321,6 +1321,7 @@ class AdaptiveTranscodeManager:
 
 # Global instances
 _profiler: Optional[HardwareProfiler] = None
+_quality_selector: Optional[AdaptiveQualitySelector] = None
 _manager: Optional[AdaptiveTranscodeManager] = None
 
 
@@ -1333,10 +1334,12 @@ def get_hardware_profiler(capabilities: Capabilities) -> HardwareProfiler:
 
 
 def get_adaptive_quality_selector(capabilities: Capabilities) -> AdaptiveQualitySelector:
-    """Get adaptive quality selector for current hardware."""
-    profiler = get_hardware_profiler(capabilities)
-    profile = profiler.get_profile()
-    return AdaptiveQualitySelector(profile)
+    """Get adaptive quality selector for current hardware (rebuilt if the profile changes)."""
+    global _quality_selector
+    profile = get_hardware_profiler(capabilities).get_profile()
+    if _quality_selector is None or _quality_selector.profile is not profile:
+        _quality_selector = AdaptiveQualitySelector(profile)
+    return _quality_selector
 
 
 def get_adaptive_manager(capabilities: Capabilities) -> AdaptiveTranscodeManager:
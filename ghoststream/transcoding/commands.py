@@ -3,28 +3,224 @@ FFmpeg command building for various output formats.
 Handles HLS, batch, and ABR transcoding commands.
 """
 
+import atexit
 import os
+import shutil
+import sys
 import logging
+import tempfile
 import httpx
+from bisect import bisect_right
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import List, Tuple, Optional, Sequence
 
 from ..models import OutputConfig, OutputFormat, VideoCodec, Resolution, SubtitleTrack
 from ..config import TranscodingConfig, HardwareConfig
-from .models import MediaInfo, QualityPreset
+from .models import MediaInfo, QualityPreset, ResolvedJob, DEFAULT_MEDIA_INFO
 from .constants import (
-    get_bitrate_map, AUDIO_BITRATE_MAP, QUALITY_LADDER,
+    get_bitrate_map, AUDIO_BITRATE_MAP, QUALITY_LADDER, QUALITY_LADDER_HEIGHTS_ASC,
     BUFSIZE_MULTIPLIER_HW, BUFSIZE_MULTIPLIER_SW,
     LOOKAHEAD_FRAMES_HW, LOOKAHEAD_FRAMES_SW,
     BFRAMES_HIGH_QUALITY, BFRAMES_STANDARD,
     NVENC_TUNING, GOP_SECONDS,
 )
-from .filters import FilterBuilder
-from .encoders import EncoderSelector
-from .hls import HLSPlaylistGenerator, HLSCodecBuilder, HLSConfig
+from .filters import FilterBuilder, HW_SCALE_FILTERS
+from .encoders import EncoderSelector, _nvenc_args
+from .hls import HLSPlaylistGenerator, HLSCodecBuilder, HLSConfig, write_playlist
 
 logger = logging.getLogger(__name__)
 
+# Leading args shared by every command: overwrite output, no build banner,
+# and machine-readable key=value progress on stdout instead of the stderr
+# stats line (stdout rather than a dedicated fd, which Windows can't pass)
+_BASE_ARGS = ("-y", "-hide_banner", "-progress", "pipe:1", "-nostats")
+
+# Hardware encoder families that take nv12 input after CPU filters
+_NV12_FAMILIES = frozenset({"nvenc", "qsv", "amf", "vaapi"})
+
+# Input options for HTTP sources; static, so shared by every command
+_HTTP_SCHEMES = ("http://", "https://")
+_HTTP_PROTOCOL_ARGS = (
+    "-headers", "User-Agent: GhostStream/1.0\r\n",
+    "-reconnect", "1",
+    "-reconnect_streamed", "1",
+    "-reconnect_delay_max", "10",
+    "-timeout", "60000000",  # 60 second timeout
+    "-analyzeduration", "10M",  # Faster analysis
+    "-probesize", "10M",
+    "-fflags", "+genpts+discardcorrupt",
+)
+
+# Once a source has been probed, FFmpeg doesn't need its default 5s/5MB input
+# analysis to find the streams again; a short probe gets frames out sooner
+_FAST_PROBE_ARGS = ("-probesize", "1M", "-analyzeduration", "2M")
+
+# Only containers that declare every stream in their header can take the
+# short probe. MPEG-TS/m2ts, AVI and friends may reveal audio or subtitle
+# streams well past the first MB, and "-map 0:a:0?" would silently drop them.
+_HEADER_FIRST_EXTENSIONS = frozenset({".mp4", ".m4v", ".mov", ".mkv", ".webm"})
+
+# Live ingest: don't buffer input packets before demuxing
+_LIVE_SCHEMES = ("rtmp://", "rtmps://", "rtsp://", "srt://", "udp://")
+_LIVE_INPUT_ARGS = ("-fflags", "+nobuffer")
+
+
+# Bitrate strings come from a small fixed set (quality ladder, bitrate map,
+# user overrides), so parsing results are memoized per string.
+
+@lru_cache(maxsize=64)
+def _parse_bitrate(bitrate: str) -> Tuple[float, str]:
+    """Parse bitrate string into (value, unit). Returns (float_value, 'M' or 'k')."""
+    bitrate = bitrate.strip()
+    if bitrate.upper().endswith('M'):
+        return float(bitrate[:-1]), 'M'
+    elif bitrate.upper().endswith('K'):
+        return float(bitrate[:-1]), 'k'
+    else:
+        return float(bitrate), 'M'
+
+
+@lru_cache(maxsize=64)
+def _get_bufsize(bitrate: str, is_hw_encoder: bool = True) -> str:
+    """Calculate bufsize with proper multiplier for encoder type."""
+    value, unit = _parse_bitrate(bitrate)
+    multiplier = BUFSIZE_MULTIPLIER_HW if is_hw_encoder else BUFSIZE_MULTIPLIER_SW
+    return f"{int(value * multiplier)}{unit}"
+
+
+@lru_cache(maxsize=64)
+def get_bandwidth_bps(bitrate: str) -> int:
+    """Convert bitrate string to bits per second for HLS playlist."""
+    value, unit = _parse_bitrate(bitrate)
+    if unit == 'M':
+        return int(value * 1_000_000)
+    else:  # 'k'
+        return int(value * 1_000)
+
+
+def _abr_encoder_args(family: str, video_encoder: str) -> Tuple[str, ...]:
+    """Encoder-global quality options shared by every ABR rendition."""
+    if family == "nvenc":
+        # NVENC global options (the balanced p4 set)
+        return _nvenc_args("p4")
+    if family == "qsv":
+        return ("-preset", "medium", "-look_ahead", "1", "-look_ahead_depth", "40")
+    if family == "amf":
+        return ("-quality", "quality", "-rc", "vbr_latency", "-vbaq", "1")
+    if video_encoder == "libx264":
+        return ("-preset", "medium", "-tune", "film", "-profile:v", "high")
+    if video_encoder == "libx265":
+        return ("-preset", "medium")
+    return ()
+
+
+@lru_cache(maxsize=16)
+def _select_abr_variants(source_height: int) -> Tuple[QualityPreset, ...]:
+    """Pick up to 4 ladder presets with a good spread for a source height."""
+    # The ladder is sorted by height descending, so presets that fit within the
+    # source are exactly its last `fit` entries
+    fit = bisect_right(QUALITY_LADDER_HEIGHTS_ASC, source_height)
+    possible_variants = QUALITY_LADDER[len(QUALITY_LADDER) - fit:]
+    
+    if not possible_variants:
+        # Source is smaller than smallest preset, just use the smallest
+        return QUALITY_LADDER[-1:]
+        
+    # Select up to 4 variants with good spread
+    # Always include the highest possible (native-ish)
+    # Always include the lowest possible (fallback)
+    # Fill in between
+    
+    if len(possible_variants) <= 4:
+        return possible_variants
+        
+    # We have more than 4, pick 4 strategically
+    selected = []
+    
+    # 1. Highest quality
+    selected.append(possible_variants[0])
+    
+    # 2. Lowest quality (last one)
+    selected.append(possible_variants[-1])
+    
+    # 3. Middle high
+    mid_high_idx = len(possible_variants) // 3
+    if possible_variants[mid_high_idx] not in selected:
+        selected.append(possible_variants[mid_high_idx])
+        
+    # 4. Middle low
+    mid_low_idx = (len(possible_variants) * 2) // 3
+    if len(selected) < 4 and possible_variants[mid_low_idx] not in selected:
+        selected.append(possible_variants[mid_low_idx])
+        
+    # Sort by resolution/bitrate descending (restore order)
+    selected.sort(key=lambda x: (x.height, _parse_bitrate(x.video_bitrate)[0]), reverse=True)
+    
+    return tuple(selected)
+
+
+@lru_cache(maxsize=1)
+def _default_passlog_dir() -> Optional[Path]:
+    """
+    Directory for two-pass stats files when the caller doesn't pick one.
+    
+    Prefers RAM-backed storage (/dev/shm on Linux) so the first pass's stats
+    writes and the second pass's reads skip the disk; %TEMP% on Windows.
+    The files are ephemeral scratch data: job cleanup deletes each job's
+    files (remove_passlog_files) and the directory goes at interpreter
+    exit. Returns None to fall back to the job directory.
+    """
+    if sys.platform.startswith("linux"):
+        candidate = Path("/dev/shm") / f"ghoststream-{os.getpid()}"
+    elif os.name == "nt":
+        candidate = Path(tempfile.gettempdir()) / f"ghoststream-{os.getpid()}"
+    else:
+        return None
+    
+    try:
+        candidate.mkdir(mode=0o700, exist_ok=True)
+    except OSError:
+        return None
+    if not os.access(candidate, os.W_OK):
+        return None
+    atexit.register(shutil.rmtree, candidate, True)
+    return candidate
+
+
+def remove_passlog_files(job_name: str) -> None:
+    """
+    Delete the default-location two-pass stats files of one job.
+    
+    Default prefixes are "<job dir name>-<output stem>", so this covers every
+    pass of the job, x264's .mbtree side files included. Stats files written
+    to the job directory itself go with it.
+    """
+    passlog_dir = _default_passlog_dir()
+    if passlog_dir is None:
+        return
+    for path in passlog_dir.glob(f"{job_name}-*"):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+# Encoder-native lookahead settings used in place of FFmpeg's -pass for
+# hardware encoders: one invocation gets the quality benefit of a first pass
+_HW_TWO_PASS_ARGS = {
+    "nvenc": (("-multipass", "fullres"), ("-rc-lookahead", "32"), ("-temporal-aq", "1")),
+    "amf": (("-preanalysis", "1"), ("-high_motion_quality_boost_enable", "1")),
+}
+
+
+def _set_arg(args: List[str], flag: str, value: str) -> None:
+    """Set flag's value in an argv list in place, appending it if absent."""
+    try:
+        args[args.index(flag) + 1] = value
+    except ValueError:
+        args += (flag, value)
+
 
 class CommandBuilder:
     """Builds FFmpeg commands for transcoding operations."""
@@ -42,16 +238,11 @@ class CommandBuilder:
         self.filter_builder = filter_builder
         self.transcoding_config = transcoding_config
         self.hw_config = hw_config
+        self._bitrate_map = get_bitrate_map()
     
     def _parse_bitrate(self, bitrate: str) -> tuple:
         """Parse bitrate string into (value, unit). Returns (float_value, 'M' or 'k')."""
-        bitrate = bitrate.strip()
-        if bitrate.upper().endswith('M'):
-            return float(bitrate[:-1]), 'M'
-        elif bitrate.upper().endswith('K'):
-            return float(bitrate[:-1]), 'k'
-        else:
-            return float(bitrate), 'M'
+        return _parse_bitrate(bitrate)
     
     def _get_bufsize(self, bitrate: str, is_hw_encoder: bool = True) -> str:
         """
@@ -60,9 +251,7 @@ class CommandBuilder:
         Hardware encoders benefit from larger buffers (2x) for quality.
         Software encoders use 1.5x to balance quality and memory.
         """
-        value, unit = self._parse_bitrate(bitrate)
-        multiplier = BUFSIZE_MULTIPLIER_HW if is_hw_encoder else BUFSIZE_MULTIPLIER_SW
-        return f"{int(value * multiplier)}{unit}"
+        return _get_bufsize(bitrate, is_hw_encoder)
     
     def _get_nvenc_quality_args(self, preset: str, variant_height: int) -> List[str]:
         """
@@ -80,24 +269,24 @@ class CommandBuilder:
         
         # Multipass for better quality (skip for low-latency preset)
         if tuning["multipass"] != "disabled":
-            args.extend(["-multipass", tuning["multipass"]])
+            args += ("-multipass", tuning["multipass"])
         
         # Adaptive quantization for better quality in complex scenes
         if tuning["spatial_aq"]:
-            args.extend(["-spatial-aq", "1", "-aq-strength", str(tuning["aq_strength"])])
+            args += ("-spatial-aq", "1", "-aq-strength", str(tuning["aq_strength"]))
         if tuning["temporal_aq"]:
-            args.extend(["-temporal-aq", "1"])
+            args += ("-temporal-aq", "1")
         
         # Lookahead for better bitrate distribution
-        args.extend(["-rc-lookahead", str(LOOKAHEAD_FRAMES_HW)])
+        args += ("-rc-lookahead", str(LOOKAHEAD_FRAMES_HW))
         
         # B-frames for better compression
         bframes = BFRAMES_HIGH_QUALITY if variant_height >= 1080 else BFRAMES_STANDARD
-        args.extend(["-bf", str(bframes)])
+        args += ("-bf", str(bframes))
         
         # B-frame reference mode
         if tuning["b_ref_mode"] != "disabled":
-            args.extend(["-b_ref_mode", tuning["b_ref_mode"]])
+            args += ("-b_ref_mode", tuning["b_ref_mode"])
         
         return args
     
@@ -114,45 +303,50 @@ class CommandBuilder:
         ]
         
         # Lookahead for better rate control
-        args.extend(["-rc-lookahead", str(LOOKAHEAD_FRAMES_SW)])
+        args += ("-rc-lookahead", str(LOOKAHEAD_FRAMES_SW))
         
         # B-frames
         bframes = BFRAMES_HIGH_QUALITY if variant_height >= 1080 else BFRAMES_STANDARD
-        args.extend(["-bf", str(bframes)])
+        args += ("-bf", str(bframes))
         
         # AQ mode 2 (variance) for better quality distribution
-        args.extend(["-aq-mode", "2"])
+        args += ("-aq-mode", "2")
         
         return args
     
     def _get_bandwidth_bps(self, bitrate: str) -> int:
         """Convert bitrate string to bits per second for HLS playlist."""
-        value, unit = self._parse_bitrate(bitrate)
-        if unit == 'M':
-            return int(value * 1_000_000)
-        else:  # 'k'
-            return int(value * 1_000)
+        return get_bandwidth_bps(bitrate)
     
     def _get_bitrate(self, resolution: Resolution, bitrate: str) -> Optional[str]:
         """Get the target bitrate."""
         if bitrate != "auto":
             return bitrate
-        return get_bitrate_map().get(resolution)
+        return self._bitrate_map.get(resolution)
     
-    def _get_protocol_args(self, source: str) -> List[str]:
-        """Get protocol options for HTTP sources (optimized for Pi/slow networks)."""
-        if source.startswith('http://') or source.startswith('https://'):
-            return [
-                "-headers", "User-Agent: GhostStream/1.0\r\n",
-                "-reconnect", "1",
-                "-reconnect_streamed", "1",
-                "-reconnect_delay_max", "10",
-                "-timeout", "60000000",  # 60 second timeout
-                "-analyzeduration", "10M",  # Faster analysis
-                "-probesize", "10M",
-                "-fflags", "+genpts+discardcorrupt",
-            ]
-        return []
+    def _get_protocol_args(
+        self,
+        source: str,
+        media_info: Optional[MediaInfo] = None
+    ) -> Tuple[str, ...]:
+        """
+        Get input options for the source.
+        
+        HTTP sources get reconnect/timeout options (optimized for Pi/slow
+        networks). Other sources get a short probe when media_info shows the
+        streams are already known and the container lists them up front,
+        plus no input buffering for live protocols.
+        """
+        if source.startswith(_HTTP_SCHEMES):
+            return _HTTP_PROTOCOL_ARGS
+        args = ()
+        if media_info is not None and media_info.video_codec:
+            ext = os.path.splitext(source.split("?", 1)[0])[1].lower()
+            if ext in _HEADER_FIRST_EXTENSIONS:
+                args = _FAST_PROBE_ARGS
+        if source.startswith(_LIVE_SCHEMES):
+            args += _LIVE_INPUT_ARGS
+        return args
     
     def _download_subtitles(self, subtitles: Optional[List[SubtitleTrack]], output_dir: Path) -> List[Tuple[Path, SubtitleTrack]]:
         """Download subtitle files from URLs into the job temp directory.
@@ -190,6 +384,59 @@ class CommandBuilder:
         logger.info(f"[Subtitles] Downloaded {len(downloaded)} of {len(subtitles)} subtitle tracks")
         return downloaded
     
+    def resolve_job(
+        self,
+        output_config: OutputConfig,
+        media_info: Optional[MediaInfo] = None
+    ) -> ResolvedJob:
+        """
+        Resolve encoders, bitrate and tonemapping for a job once.
+        
+        Pass the result to several build_* calls for the same job to skip
+        repeating the lookups. Resolve again after marking an encoder failed.
+        """
+        audio_encoder, audio_args = self.encoder_selector.get_audio_encoder(
+            output_config.audio_codec
+        )
+        return ResolvedJob(
+            video=self.encoder_selector.choose_video_encoder(
+                output_config.video_codec,
+                output_config.hw_accel
+            ),
+            audio_encoder=audio_encoder,
+            audio_args=tuple(audio_args),
+            bitrate=self._get_bitrate(output_config.resolution, output_config.bitrate),
+            needs_tonemap=self.filter_builder.needs_tonemap(media_info, output_config),
+        )
+    
+    def _build_video_filters(
+        self,
+        media_info: Optional[MediaInfo],
+        output_config: OutputConfig,
+        resolved: ResolvedJob,
+        hw_frames: Optional[str]
+    ) -> List[str]:
+        """Video filters for a single-output command, ending in the encoder's pixel format."""
+        video_encoder = resolved.video_encoder
+        if hw_frames in HW_SCALE_FILTERS:
+            # Decoded frames stay on the device; keep the chain there too
+            return self.filter_builder.build_hw_video_filters(
+                media_info, output_config, video_encoder, hw_frames
+            )
+        
+        vf_filters = self.filter_builder.build_video_filters(
+            media_info, output_config, video_encoder
+        )
+        # Ensure compatible pixel format for encoder
+        if vf_filters:
+            if resolved.video.is_software:
+                # Software encoders need yuv420p
+                vf_filters.append("format=yuv420p")
+            elif resolved.video.family in _NV12_FAMILIES:
+                # Hardware encoders need nv12
+                vf_filters.append("format=nv12")
+        return vf_filters
+    
     def build_hls_command(
         self,
         source: str,
@@ -197,114 +444,107 @@ class CommandBuilder:
         output_config: OutputConfig,
         start_time: float = 0,
         media_info: Optional[MediaInfo] = None,
-        subtitles: Optional[List[SubtitleTrack]] = None
+        subtitles: Optional[List[SubtitleTrack]] = None,
+        resolved: Optional[ResolvedJob] = None
     ) -> Tuple[List[str], str]:
         """Build FFmpeg command for HLS output with subtitle muxing support."""
         
-        video_encoder, video_args = self.encoder_selector.get_video_encoder(
-            output_config.video_codec,
-            output_config.hw_accel
-        )
-        audio_encoder, audio_args = self.encoder_selector.get_audio_encoder(
-            output_config.audio_codec
-        )
+        resolved = resolved or self.resolve_job(output_config, media_info)
+        video_encoder, video_args = resolved.video_encoder, resolved.video_args
+        audio_encoder, audio_args = resolved.audio_encoder, resolved.audio_args
         
         # Download subtitle files if provided
         subtitle_files = self._download_subtitles(subtitles, output_dir)
         
-        cmd = [self.ffmpeg_path, "-y", "-hide_banner"]
+        mi = media_info or DEFAULT_MEDIA_INFO
+        
+        cmd = [self.ffmpeg_path, *_BASE_ARGS]
         
-        # Protocol options for HTTP sources
-        cmd.extend(self._get_protocol_args(source))
+        # Protocol/probe options for the input
+        cmd.extend(self._get_protocol_args(source, media_info))
         
         # Hardware decoding (only if not doing HDR tonemap which requires CPU filters)
-        needs_cpu_filters = self.filter_builder.needs_tonemap(media_info, output_config)
-        if not needs_cpu_filters:
-            hw_args, hw_type = self.encoder_selector.get_hw_decode_args(
+        hw_frames = None
+        if not resolved.needs_tonemap:
+            hw_args, hw_frames = self.encoder_selector.get_hw_decode_args(
                 video_encoder, self.hw_config.vaapi_device
             )
             cmd.extend(hw_args)
         
         # Start time (before input for faster seeking)
         if start_time > 0:
-            cmd.extend(["-ss", str(start_time)])
+            cmd += ("-ss", str(start_time))
         
         # Input - video source
-        cmd.extend(["-i", source])
+        cmd += ("-i", source)
         
         # Add subtitle inputs
         for sub_path, _ in subtitle_files:
-            cmd.extend(["-i", str(sub_path)])
+            cmd += ("-i", str(sub_path))
         
         # Map video and audio streams
-        cmd.extend(["-map", "0:v:0", "-map", "0:a:0?"])
+        cmd += ("-map", "0:v:0", "-map", "0:a:0?")
         
         # Map subtitle streams (input indices start at 1 for subtitles)
         for i in range(len(subtitle_files)):
-            cmd.extend(["-map", f"{i+1}:0"])
+            cmd += ("-map", f"{i+1}:0")
         
         # Video encoding
-        cmd.extend(["-c:v", video_encoder])
+        cmd += ("-c:v", video_encoder)
         cmd.extend(video_args)
 
         # Build and apply video filters
-        vf_filters = self.filter_builder.build_video_filters(
-            media_info, output_config, video_encoder
-        )
-        # Ensure compatible pixel format for encoder
+        vf_filters = self._build_video_filters(media_info, output_config, resolved, hw_frames)
         if vf_filters:
-            if "lib" in video_encoder:
-                # Software encoders need yuv420p
-                vf_filters.append("format=yuv420p")
-            elif any(hw in video_encoder for hw in ["nvenc", "qsv", "amf", "vaapi"]):
-                # Hardware encoders need nv12
-                vf_filters.append("format=nv12")
-            cmd.extend(["-vf", ",".join(vf_filters)])
+            cmd += ("-vf", ",".join(vf_filters))
 
         # Video bitrate with maxrate/bufsize for consistent streaming
-        bitrate = self._get_bitrate(output_config.resolution, output_config.bitrate)
+        bitrate = resolved.bitrate
         if bitrate and video_encoder != "copy":
-            cmd.extend(["-b:v", bitrate])
+            cmd += ("-b:v", bitrate)
             # Add maxrate and bufsize for better streaming
-            cmd.extend(["-maxrate", bitrate, "-bufsize", self._get_bufsize(bitrate)])
+            cmd += ("-maxrate", bitrate, "-bufsize", self._get_bufsize(bitrate))
         
         # Keyframe interval for seeking (every 2 seconds)
         if video_encoder != "copy":
-            gop_size = int((media_info.fps if media_info else 30) * 2)
-            cmd.extend([
-                "-g", str(gop_size),
-                "-keyint_min", str(gop_size),
+            gop_size = str(int(mi.fps * 2) or 60)
+            cmd += (
+                "-g", gop_size,
+                "-keyint_min", gop_size,
                 "-sc_threshold", "0",
                 "-flags", "+cgop",
-            ])
+            )
         
         # Audio encoding with proper channel handling
-        cmd.extend(["-c:a", audio_encoder])
+        cmd += ("-c:a", audio_encoder)
         if audio_encoder != "copy":
-            channels = media_info.audio_channels if media_info else 2
+            channels = mi.audio_channels
             audio_br = AUDIO_BITRATE_MAP.get(channels, "128k")
-            cmd.extend(["-b:a", audio_br, "-ac", str(min(channels, 2))])
+            cmd += ("-b:a", audio_br, "-ac", str(min(channels, 2)))
         
         # Subtitle encoding - WebVTT for HLS
         if subtitle_files:
             for i in range(len(subtitle_files)):
-                cmd.extend([f"-c:s:{i}", "webvtt"])
+                cmd += (f"-c:s:{i}", "webvtt")
         
         # HLS specific options
         segment_duration = self.transcoding_config.segment_duration
         
+        # Use forward slashes for FFmpeg paths (works on all platforms)
+        out_posix = output_dir.as_posix()
+        
         # Use var_stream_map for subtitle support (enables master playlist with EXT-X-MEDIA)
         if subtitle_files:
             # With subtitles, use var_stream_map for proper HLS structure
-            segment_path = str(output_dir / "stream_%v_%05d.ts").replace("\\", "/")
-            playlist_path = str(output_dir / "stream_%v.m3u8").replace("\\", "/")
+            segment_path = f"{out_posix}/stream_%v_%05d.ts"
+            playlist_path = f"{out_posix}/stream_%v.m3u8"
             
             # Build var_stream_map: v:0,a:0 for video/audio, then s:0,s:1... for subtitles
             stream_map_parts = ["v:0,a:0"]
             for i in range(len(subtitle_files)):
                 stream_map_parts.append(f"s:{i},sgroup:subs")
             
-            cmd.extend([
+            cmd += (
                 "-f", "hls",
                 "-hls_time", str(segment_duration),
                 "-hls_list_size", "0",
@@ -315,25 +555,54 @@ class CommandBuilder:
                 "-master_pl_name", "master.m3u8",
                 "-var_stream_map", " ".join(stream_map_parts),
                 playlist_path
-            ])
+            )
         else:
             # No subtitles - use simple single-stream HLS
-            playlist_path = output_dir / "master.m3u8"
-            segment_pattern = output_dir / "segment_%05d.ts"
+            playlist_path = f"{out_posix}/master.m3u8"
+            segment_pattern = f"{out_posix}/segment_%05d.ts"
             
-            cmd.extend([
+            cmd += (
                 "-f", "hls",
                 "-hls_time", str(segment_duration),
                 "-hls_list_size", "0",
-                "-hls_segment_filename", str(segment_pattern),
+                "-hls_segment_filename", segment_pattern,
                 "-hls_flags", "independent_segments+append_list",
                 "-hls_segment_type", "mpegts",
                 "-hls_playlist_type", "event",
-                str(playlist_path)
-            ])
+                playlist_path
+            )
         
         return cmd, video_encoder
     
+    @staticmethod
+    def _two_pass_applies(video_encoder: str, video_args: Sequence[str], bitrate: Optional[str]) -> bool:
+        """
+        Whether FFmpeg's -pass 1/2 does anything useful for this encode.
+        
+        Only software (lib*) encoders implement it, and only when they target a
+        bitrate: with CRF/CQ and no -b:v, rate isn't bitrate-driven so a second
+        pass doubles encode time for no gain.
+        """
+        if not video_encoder.startswith("lib"):
+            return False
+        if ("-crf" in video_args or "-cq" in video_args) and not bitrate:
+            return False
+        return True
+    
+    def uses_two_pass(
+        self,
+        output_config: OutputConfig,
+        resolved: Optional[ResolvedJob] = None
+    ) -> bool:
+        """
+        Whether build_batch_command will emit a real two-pass encode for this config.
+        
+        When False, every pass_num yields the complete single-pass command, so
+        callers should run only one pass.
+        """
+        resolved = resolved or self.resolve_job(output_config)
+        return self._two_pass_applies(resolved.video_encoder, resolved.video_args, resolved.bitrate)
+    
     def build_batch_command(
         self,
         source: str,
@@ -343,94 +612,104 @@ class CommandBuilder:
         media_info: Optional[MediaInfo] = None,
         two_pass: bool = False,
         pass_num: int = 1,
-        passlog_prefix: Optional[str] = None
+        passlog_prefix: Optional[str] = None,
+        resolved: Optional[ResolvedJob] = None
     ) -> Tuple[List[str], str]:
-        """Build FFmpeg command for batch transcoding with optional two-pass."""
+        """
+        Build FFmpeg command for batch transcoding with optional two-pass.
         
-        video_encoder, video_args = self.encoder_selector.get_video_encoder(
-            output_config.video_codec,
-            output_config.hw_accel
-        )
-        audio_encoder, audio_args = self.encoder_selector.get_audio_encoder(
-            output_config.audio_codec
-        )
+        two_pass is ignored when it wouldn't help (see uses_two_pass).
+        """
+        
+        resolved = resolved or self.resolve_job(output_config, media_info)
+        video_encoder, audio_encoder = resolved.video_encoder, resolved.audio_encoder
+        video_args = list(resolved.video_args)  # Two-pass may adjust encoder options
+        audio_args = resolved.audio_args
         
-        cmd = [self.ffmpeg_path, "-y", "-hide_banner"]
+        mi = media_info or DEFAULT_MEDIA_INFO
         
-        # Protocol options for HTTP sources
-        cmd.extend(self._get_protocol_args(source))
+        cmd = [self.ffmpeg_path, *_BASE_ARGS]
+        
+        # Protocol/probe options for the input
+        cmd.extend(self._get_protocol_args(source, media_info))
         
         # Hardware decoding (only if not doing HDR tonemap)
-        needs_cpu_filters = self.filter_builder.needs_tonemap(media_info, output_config)
-        if not needs_cpu_filters:
-            hw_args, _ = self.encoder_selector.get_hw_decode_args(
+        hw_frames = None
+        if not resolved.needs_tonemap:
+            hw_args, hw_frames = self.encoder_selector.get_hw_decode_args(
                 video_encoder, self.hw_config.vaapi_device
             )
             cmd.extend(hw_args)
         
         # Start time
         if start_time > 0:
-            cmd.extend(["-ss", str(start_time)])
+            cmd += ("-ss", str(start_time))
         
         # Input
-        cmd.extend(["-i", source])
+        cmd += ("-i", source)
         
         # Map streams explicitly
-        cmd.extend(["-map", "0:v:0", "-map", "0:a:0?"])
+        cmd += ("-map", "0:v:0", "-map", "0:a:0?")
+        
+        # Hardware encoders do their "second pass" inside the encoder
+        if two_pass:
+            for flag, value in _HW_TWO_PASS_ARGS.get(resolved.video.family, ()):
+                _set_arg(video_args, flag, value)
         
         # Video encoding
-        cmd.extend(["-c:v", video_encoder])
+        cmd += ("-c:v", video_encoder)
         cmd.extend(video_args)
         
+        # Video bitrate (resolved early: it decides whether two-pass applies)
+        bitrate = resolved.bitrate
+        
         # Two-pass encoding settings
-        if two_pass and "lib" in video_encoder:
-            cmd.extend(["-pass", str(pass_num)])
-            if passlog_prefix:
-                cmd.extend(["-passlogfile", passlog_prefix])
+        if two_pass and not self._two_pass_applies(video_encoder, video_args, bitrate):
+            if pass_num == 1:
+                logger.info(f"[Batch] Two-pass has no effect for {video_encoder} here, encoding in a single pass")
+            two_pass = False
+        
+        if two_pass:
+            cmd += ("-pass", str(pass_num))
+            if not passlog_prefix:
+                # Derived from the output path so both passes agree on the prefix
+                passlog_dir = _default_passlog_dir() or output_path.parent
+                passlog_prefix = str(passlog_dir / f"{output_path.parent.name}-{output_path.stem}")
+            cmd += ("-passlogfile", passlog_prefix)
 
         # Build and apply video filters
-        vf_filters = self.filter_builder.build_video_filters(
-            media_info, output_config, video_encoder
-        )
-        # Ensure compatible pixel format for encoder
+        vf_filters = self._build_video_filters(media_info, output_config, resolved, hw_frames)
         if vf_filters:
-            if "lib" in video_encoder:
-                # Software encoders need yuv420p
-                vf_filters.append("format=yuv420p")
-            elif any(hw in video_encoder for hw in ["nvenc", "qsv", "amf", "vaapi"]):
-                # Hardware encoders need nv12
-                vf_filters.append("format=nv12")
-            cmd.extend(["-vf", ",".join(vf_filters)])
+            cmd += ("-vf", ",".join(vf_filters))
 
         # Video bitrate
-        bitrate = self._get_bitrate(output_config.resolution, output_config.bitrate)
         if bitrate and video_encoder != "copy":
-            cmd.extend(["-b:v", bitrate])
+            cmd += ("-b:v", bitrate)
         
         # Audio encoding (skip on first pass of two-pass)
         if two_pass and pass_num == 1:
-            cmd.extend(["-an"])
+            cmd.append("-an")
         else:
-            cmd.extend(["-c:a", audio_encoder])
+            cmd += ("-c:a", audio_encoder)
             if audio_encoder != "copy":
-                channels = media_info.audio_channels if media_info else 2
+                channels = mi.audio_channels
                 audio_br = AUDIO_BITRATE_MAP.get(channels, "128k")
-                cmd.extend(["-b:a", audio_br])
+                cmd += ("-b:a", audio_br)
         
         # Output format specific options
         if output_config.format == OutputFormat.MP4:
-            cmd.extend(["-movflags", "+faststart"])
+            cmd += ("-movflags", "+faststart")
         elif output_config.format == OutputFormat.WEBM:
-            cmd.extend(["-f", "webm"])
+            cmd += ("-f", "webm")
         elif output_config.format == OutputFormat.MKV:
-            cmd.extend(["-f", "matroska"])
+            cmd += ("-f", "matroska")
         
         # First pass outputs to null
         if two_pass and pass_num == 1:
             if os.name == 'nt':
-                cmd.extend(["-f", "null", "NUL"])
+                cmd += ("-f", "null", "NUL")
             else:
-                cmd.extend(["-f", "null", "/dev/null"])
+                cmd += ("-f", "null", "/dev/null")
         else:
             cmd.append(str(output_path))
         
@@ -441,52 +720,7 @@ class CommandBuilder:
         Get appropriate ABR variants based on source resolution.
         Ensures a good spread of qualities including low-bandwidth options.
         """
-        variants = []
-        source_height = media_info.height
-        
-        # Filter presets that fit within source resolution
-        possible_variants = []
-        for preset in QUALITY_LADDER:
-            if preset.height <= source_height:
-                possible_variants.append(preset)
-        
-        if not possible_variants:
-            if QUALITY_LADDER:
-                # Source is smaller than smallest preset, just use the smallest
-                possible_variants.append(QUALITY_LADDER[-1])
-            return possible_variants
-            
-        # Select up to 4 variants with good spread
-        # Always include the highest possible (native-ish)
-        # Always include the lowest possible (fallback)
-        # Fill in between
-        
-        if len(possible_variants) <= 4:
-            return possible_variants
-            
-        # We have more than 4, pick 4 strategically
-        selected = []
-        
-        # 1. Highest quality
-        selected.append(possible_variants[0])
-        
-        # 2. Lowest quality (last one)
-        selected.append(possible_variants[-1])
-        
-        # 3. Middle high
-        mid_high_idx = len(possible_variants) // 3
-        if possible_variants[mid_high_idx] not in selected:
-            selected.append(possible_variants[mid_high_idx])
-            
-        # 4. Middle low
-        mid_low_idx = (len(possible_variants) * 2) // 3
-        if len(selected) < 4 and possible_variants[mid_low_idx] not in selected:
-            selected.append(possible_variants[mid_low_idx])
-            
-        # Sort by resolution/bitrate descending (restore order)
-        selected.sort(key=lambda x: (x.height, self._parse_bitrate(x.video_bitrate)[0]), reverse=True)
-        
-        return selected
+        return list(_select_abr_variants(media_info.height))
     
     def build_abr_command(
         self,
@@ -496,15 +730,13 @@ class CommandBuilder:
         media_info: MediaInfo,
         start_time: float = 0,
         variants: Optional[List[QualityPreset]] = None,
-        subtitles: Optional[List[SubtitleTrack]] = None
+        subtitles: Optional[List[SubtitleTrack]] = None,
+        resolved: Optional[ResolvedJob] = None
     ) -> Tuple[List[str], str, List[QualityPreset]]:
         """Build FFmpeg command for ABR HLS with multiple quality variants and subtitle support."""
         
-        video_encoder, video_args = self.encoder_selector.get_video_encoder(
-            output_config.video_codec,
-            output_config.hw_accel
-        )
-        audio_encoder, _ = self.encoder_selector.get_audio_encoder(output_config.audio_codec)
+        resolved = resolved or self.resolve_job(output_config, media_info)
+        video_encoder, audio_encoder = resolved.video_encoder, resolved.audio_encoder
         
         if variants is None:
             variants = self.get_abr_variants(media_info)
@@ -512,134 +744,99 @@ class CommandBuilder:
         # Download subtitle files if provided
         subtitle_files = self._download_subtitles(subtitles, output_dir)
         
-        cmd = [self.ffmpeg_path, "-y", "-hide_banner"]
+        cmd = [self.ffmpeg_path, *_BASE_ARGS]
         
-        # Protocol options for HTTP sources
-        cmd.extend(self._get_protocol_args(source))
+        # Protocol/probe options for the input
+        cmd.extend(self._get_protocol_args(source, media_info))
         
         # Hardware decoding (skip if HDR tonemap needed)
-        needs_cpu_filters = self.filter_builder.needs_tonemap(media_info, output_config)
+        needs_cpu_filters = resolved.needs_tonemap
+        hw_frames = None
         if not needs_cpu_filters:
-            hw_args, _ = self.encoder_selector.get_hw_decode_args(
+            hw_args, hw_frames = self.encoder_selector.get_hw_decode_args(
                 video_encoder, self.hw_config.vaapi_device
             )
             cmd.extend(hw_args)
         
         # Start time
         if start_time > 0:
-            cmd.extend(["-ss", str(start_time)])
+            cmd += ("-ss", str(start_time))
         
         # Input - video source
-        cmd.extend(["-i", source])
+        cmd += ("-i", source)
         
         # Add subtitle inputs
         for sub_path, _ in subtitle_files:
-            cmd.extend(["-i", str(sub_path)])
+            cmd += ("-i", str(sub_path))
         
         # Build filter complex for multiple outputs
         filter_parts = self.filter_builder.build_abr_filter_complex(
-            variants, media_info, needs_cpu_filters, video_encoder
+            variants, media_info, needs_cpu_filters, video_encoder, hw_frames
         )
         
         map_args = []
         stream_maps = []
 
         # Determine if using hardware encoder
-        is_hw = "nvenc" in video_encoder or "qsv" in video_encoder or "vaapi" in video_encoder or "amf" in video_encoder
+        family = resolved.video.family
+        is_hw = family in _NV12_FAMILIES
 
         # Map all video outputs from filter_complex first
         for i in range(len(variants)):
-            map_args.extend(["-map", f"[v{i}]"])
+            map_args += ("-map", f"[v{i}]")
 
         # Map audio ONCE - all variants will share this single audio stream
-        map_args.extend(["-map", "0:a:0?"])
+        map_args += ("-map", "0:a:0?")
 
         # Add encoder-global quality settings (applied once, not per-stream)
         # These options don't support stream specifiers in FFmpeg
-        if "nvenc" in video_encoder:
-            # NVENC global options
-            map_args.extend([
-                "-preset", "p4",
-                "-tune", "hq",
-                "-rc", "vbr",
-                "-multipass", "qres",
-                "-spatial-aq", "1",
-                "-temporal-aq", "1",
-                "-aq-strength", "8",
-                "-rc-lookahead", "32",
-                "-bf", "3",
-                "-b_ref_mode", "middle",
-            ])
-        elif "qsv" in video_encoder:
-            # QSV global options
-            map_args.extend([
-                "-preset", "medium",
-                "-look_ahead", "1",
-                "-look_ahead_depth", "40",
-            ])
-        elif "amf" in video_encoder:
-            # AMF global options
-            map_args.extend([
-                "-quality", "quality",
-                "-rc", "vbr_latency",
-                "-vbaq", "1",
-            ])
-        elif "libx264" in video_encoder:
-            # x264 global options
-            map_args.extend([
-                "-preset", "medium",
-                "-tune", "film",
-                "-profile:v", "high",
-            ])
-        elif "libx265" in video_encoder:
-            map_args.extend(["-preset", "medium"])
+        map_args += _abr_encoder_args(family, video_encoder)
+
+        # GOP/Keyframe alignment for proper ABR switching, same for every variant
+        fps = media_info.fps if media_info.fps > 0 else 30
+        gop = str(int(fps * GOP_SECONDS))  # Use configured GOP seconds
 
         # Per-variant settings (these options support stream specifiers)
+        parse_bitrate = _parse_bitrate
+        get_bufsize = _get_bufsize
         for i, variant in enumerate(variants):
-            # Video codec for this variant
-            map_args.extend([f"-c:v:{i}", video_encoder])
-
-            # Bitrate settings (per-stream)
-            map_args.extend([f"-b:v:{i}", variant.video_bitrate])
-
             # Netflix-level rate control: maxrate slightly above target for headroom
-            value, unit = self._parse_bitrate(variant.video_bitrate)
+            value, unit = parse_bitrate(variant.video_bitrate)
             maxrate = f"{value * 1.1:.1f}{unit}"  # 10% headroom
-            map_args.extend([f"-maxrate:v:{i}", maxrate])
-            map_args.extend([f"-bufsize:v:{i}", self._get_bufsize(variant.video_bitrate, is_hw)])
-
-            # GOP/Keyframe alignment for proper ABR switching (per-stream)
-            fps = media_info.fps if media_info.fps > 0 else 30
-            gop = int(fps * GOP_SECONDS)  # Use configured GOP seconds
-            map_args.extend([
-                f"-g:v:{i}", str(gop),
-                f"-keyint_min:v:{i}", str(gop),
+
+            map_args += (
+                f"-c:v:{i}", video_encoder,
+                f"-b:v:{i}", variant.video_bitrate,
+                f"-maxrate:v:{i}", maxrate,
+                f"-bufsize:v:{i}", get_bufsize(variant.video_bitrate, is_hw),
+                f"-g:v:{i}", gop,
+                f"-keyint_min:v:{i}", gop,
                 f"-sc_threshold:v:{i}", "0",  # Disable scene detection for consistent GOPs
                 f"-flags:v:{i}", "+cgop",     # Closed GOP for better seeking
-            ])
+            )
 
             # Build var_stream_map entry: v:i,a:0 (all video variants share audio stream 0)
             stream_maps.append(f"v:{i},a:0")
 
         # Audio encoding (single stream shared by all variants)
-        map_args.extend(["-c:a:0", audio_encoder])
+        map_args += ("-c:a:0", audio_encoder)
         if audio_encoder != "copy":
-            map_args.extend(["-b:a:0", "128k", "-ac:0", "2"])
+            map_args += ("-b:a:0", "128k", "-ac:0", "2")
         
         # Map subtitle streams if present
         if subtitle_files:
             for sub_idx in range(len(subtitle_files)):
                 # Subtitle input indices start after video source (input 0)
                 input_idx = sub_idx + 1
-                map_args.extend(["-map", f"{input_idx}:0"])
+                map_args += ("-map", f"{input_idx}:0")
                 # Subtitle codec
-                map_args.extend([f"-c:s:{sub_idx}", "webvtt"])
+                map_args += (f"-c:s:{sub_idx}", "webvtt")
                 # Add subtitle streams to var_stream_map with sgroup
                 stream_maps.append(f"s:{sub_idx},sgroup:subs")
         
         # Apply filter complex
         if filter_parts:
-            cmd.extend(["-filter_complex", ";".join(filter_parts)])
+            cmd += ("-filter_complex", ";".join(filter_parts))
         
         cmd.extend(map_args)
         
@@ -647,10 +844,11 @@ class CommandBuilder:
         segment_duration = self.transcoding_config.segment_duration
         
         # Use forward slashes for FFmpeg paths (works on all platforms)
-        segment_path = str(output_dir / "stream_%v_%05d.ts").replace("\\", "/")
-        playlist_path = str(output_dir / "stream_%v.m3u8").replace("\\", "/")
+        out_posix = output_dir.as_posix()
+        segment_path = f"{out_posix}/stream_%v_%05d.ts"
+        playlist_path = f"{out_posix}/stream_%v.m3u8"
         
-        cmd.extend([
+        cmd += (
             "-f", "hls",
             "-hls_time", str(segment_duration),
             "-hls_list_size", "0",
@@ -661,22 +859,111 @@ class CommandBuilder:
             "-hls_segment_filename", segment_path,
             "-var_stream_map", " ".join(stream_maps),
             playlist_path
-        ])
+        )
         
         return cmd, video_encoder, variants
     
+    def build_variant_hls_command(
+        self,
+        source: str,
+        output_dir: Path,
+        index: int,
+        variant: QualityPreset,
+        output_config: OutputConfig,
+        media_info: MediaInfo,
+        start_time: float = 0,
+        threads: Optional[int] = None,
+        resolved: Optional[ResolvedJob] = None
+    ) -> List[str]:
+        """
+        Build FFmpeg command for a single ABR rendition.
+        
+        Writes ``stream_{index}.m3u8`` and its segments, the same layout
+        build_abr_command produces, so the renditions of one job can run as
+        separate processes behind a master playlist written up front.
+        """
+        resolved = resolved or self.resolve_job(output_config, media_info)
+        video_encoder, audio_encoder = resolved.video_encoder, resolved.audio_encoder
+        
+        cmd = [self.ffmpeg_path, *_BASE_ARGS]
+        cmd.extend(self._get_protocol_args(source, media_info))
+        
+        # Hardware decoding (skip if HDR tonemap needed)
+        needs_cpu_filters = resolved.needs_tonemap
+        hw_frames = None
+        if not needs_cpu_filters:
+            hw_args, hw_frames = self.encoder_selector.get_hw_decode_args(
+                video_encoder, self.hw_config.vaapi_device
+            )
+            cmd.extend(hw_args)
+        
+        if start_time > 0:
+            cmd += ("-ss", str(start_time))
+        cmd += ("-i", source)
+        
+        # Same scale/tonemap chain as one branch of the ABR filter graph. With
+        # a thread share, the graph gets it too; FFmpeg's default of one
+        # filter thread per CPU oversubscribes renditions running side by side.
+        filter_parts = self.filter_builder.build_abr_filter_complex(
+            [variant], media_info, needs_cpu_filters, video_encoder, hw_frames
+        )
+        if threads:
+            cmd += ("-filter_complex_threads", str(threads))
+        cmd += ("-filter_complex", ";".join(filter_parts), "-map", "[v0]", "-map", "0:a:0?")
+        
+        fps = media_info.fps if media_info.fps > 0 else 30
+        gop = str(int(fps * GOP_SECONDS))
+        value, unit = _parse_bitrate(variant.video_bitrate)
+        
+        cmd += ("-c:v", video_encoder, *_abr_encoder_args(resolved.video.family, video_encoder))
+        cmd += (
+            "-b:v", variant.video_bitrate,
+            "-maxrate", f"{value * 1.1:.1f}{unit}",  # 10% headroom
+            "-bufsize", _get_bufsize(variant.video_bitrate, resolved.video.family in _NV12_FAMILIES),
+            "-g", gop,
+            "-keyint_min", gop,
+            "-sc_threshold", "0",
+            "-flags", "+cgop",
+        )
+        if threads:
+            cmd += ("-threads", str(threads))
+        
+        cmd += ("-c:a", audio_encoder)
+        if audio_encoder != "copy":
+            cmd += ("-b:a", "128k", "-ac", "2")
+        
+        out_posix = output_dir.as_posix()
+        cmd += (
+            "-f", "hls",
+            "-hls_time", str(self.transcoding_config.segment_duration),
+            "-hls_list_size", "0",
+            "-hls_flags", "independent_segments+append_list",
+            "-hls_segment_type", "mpegts",
+            "-hls_playlist_type", "event",
+            "-hls_segment_filename", f"{out_posix}/stream_{index}_%05d.ts",
+            f"{out_posix}/stream_{index}.m3u8"
+        )
+        
+        return cmd
+    
     def generate_master_playlist(
         self,
         output_dir: Path,
         variants: List[QualityPreset],
         media_info: Optional[MediaInfo] = None,
-        video_codec: str = "h264"
+        video_codec: str = "h264",
+        audio_codec: Optional[str] = "aac",
+        audio_channels: int = 2
     ) -> str:
         """
         Generate Netflix-quality HLS master playlist.
         
         Includes proper CODECS, BANDWIDTH, AVERAGE-BANDWIDTH,
         and RESOLUTION attributes for optimal player compatibility.
+        
+        Without media_info, video_codec and audio_codec name what the
+        renditions carry (codec or encoder names); audio_codec is None
+        when they have no audio.
         """
         # Use the HLS module for Netflix-level playlist generation
         hls_gen = HLSPlaylistGenerator(HLSConfig(
@@ -688,39 +975,27 @@ class CommandBuilder:
             return hls_gen.generate_master_playlist(output_dir, hls_variants)
         
         # Fallback to basic playlist if no media info
-        lines = [
-            "#EXTM3U",
-            "#EXT-X-VERSION:6",
-            "#EXT-X-INDEPENDENT-SEGMENTS",
-        ]
-        
-        # Sort by bandwidth descending
-        sorted_variants = sorted(
-            enumerate(variants),
-            key=lambda x: self._get_bandwidth_bps(x[1].video_bitrate),
-            reverse=True
+        header = "#EXTM3U\n#EXT-X-VERSION:6\n#EXT-X-INDEPENDENT-SEGMENTS\n"
+        
+        # Sort by bandwidth descending, keeping the original index for the stream URI
+        bandwidths = [get_bandwidth_bps(v.video_bitrate) for v in variants]
+        order = sorted(range(len(variants)), key=bandwidths.__getitem__, reverse=True)
+        
+        # Unknown audio is left out rather than advertised as AAC
+        audio = audio_codec and HLSCodecBuilder.get_audio_codec(audio_codec, audio_channels)
+        audio_suffix = f",{audio}" if audio else ""
+        
+        body = "\n".join(
+            f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidths[i]},"
+            f"AVERAGE-BANDWIDTH={int(bandwidths[i] / 1.4)},"  # Average is ~70% of peak
+            f"RESOLUTION={variants[i].width}x{variants[i].height},"
+            f'CODECS="{HLSCodecBuilder.get_video_codec(video_codec, variants[i].width, variants[i].height)}{audio_suffix}",'
+            f'NAME="{variants[i].name}"\n'
+            f"stream_{i}.m3u8"
+            for i in order
         )
         
-        for orig_idx, variant in sorted_variants:
-            bandwidth = self._get_bandwidth_bps(variant.video_bitrate)
-            avg_bandwidth = int(bandwidth / 1.4)  # Average is ~70% of peak
-            
-            # Get proper codec string
-            codecs = HLSCodecBuilder.get_full_codec_string(
-                video_codec, variant.width, variant.height
-            )
-            
-            lines.append(
-                f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},"
-                f"AVERAGE-BANDWIDTH={avg_bandwidth},"
-                f"RESOLUTION={variant.width}x{variant.height},"
-                f'CODECS="{codecs}",'
-                f"NAME=\"{variant.name}\""
-            )
-            lines.append(f"stream_{orig_idx}.m3u8")
-        
-        master_content = "\n".join(lines)
         master_path = output_dir / "master.m3u8"
-        master_path.write_text(master_content)
+        write_playlist(master_path, header + body + "\n")
         
         return str(master_path)
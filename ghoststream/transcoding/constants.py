@@ -2,7 +2,9 @@
 Constants and presets for transcoding operations.
 """
 
-from typing import List, Dict, Tuple, TYPE_CHECKING
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Mapping, Tuple, TYPE_CHECKING
 from .models import QualityPreset
 
 if TYPE_CHECKING:
@@ -18,7 +20,8 @@ if TYPE_CHECKING:
 # - Hardware presets tuned for quality vs speed
 # - Audio bitrates matched to video quality tier
 
-QUALITY_LADDER: List[QualityPreset] = [
+# Ordered by height descending; immutable so derived lookups can be cached
+QUALITY_LADDER: Tuple[QualityPreset, ...] = (
     # 4K tier - high quality for premium content
     QualityPreset("4K", 3840, 2160, "18M", "256k", 18, "p4"),
     QualityPreset("4K-mid", 3840, 2160, "12M", "192k", 20, "p4"),
@@ -32,7 +35,10 @@ QUALITY_LADDER: List[QualityPreset] = [
     QualityPreset("480p", 854, 480, "1M", "96k", 24, "p5"),
     QualityPreset("360p", 640, 360, "600k", "64k", 26, "p6"),
     QualityPreset("240p", 426, 240, "300k", "48k", 28, "p6"),
-]
+)
+
+# Ladder heights in ascending order, for bisecting by source height
+QUALITY_LADDER_HEIGHTS_ASC: Tuple[int, ...] = tuple(sorted(p.height for p in QUALITY_LADDER))
 
 
 # HDR to SDR tone mapping filter (Mobius for natural colors)
@@ -72,27 +78,29 @@ BITRATE_MAP_RAW: Dict[str, str] = {
 }
 
 
-def get_resolution_map():
-    """Get resolution map with proper Resolution enum keys."""
+@lru_cache(maxsize=1)
+def get_resolution_map() -> Mapping["Resolution", Tuple[int, int]]:
+    """Get resolution map with proper Resolution enum keys (built once, read-only)."""
     from ..models import Resolution
-    return {
+    return MappingProxyType({
         Resolution.UHD_4K: (3840, 2160),
         Resolution.FHD_1080P: (1920, 1080),
         Resolution.HD_720P: (1280, 720),
         Resolution.SD_480P: (854, 480),
-    }
+    })
 
 
-def get_bitrate_map():
-    """Get bitrate map with proper Resolution enum keys."""
+@lru_cache(maxsize=1)
+def get_bitrate_map() -> Mapping["Resolution", str]:
+    """Get bitrate map with proper Resolution enum keys (built once, read-only)."""
     from ..models import Resolution
-    return {
+    return MappingProxyType({
         Resolution.UHD_4K: "20M",
         Resolution.FHD_1080P: "8M",
         Resolution.HD_720P: "4M",
         Resolution.SD_480P: "1.5M",
         Resolution.ORIGINAL: "8M",
-    }
+    })
 
 
 # For backwards compatibility - these are populated lazily
@@ -125,10 +133,16 @@ TRANSIENT_INFINITE_RETRY = True  # Keep retrying transient network errors indefi
 # Stall timeout configuration
 MIN_STALL_TIMEOUT = 120  # Minimum stall timeout in seconds
 STALL_TIMEOUT_PER_SEGMENT = 10  # Additional seconds per segment duration
+READER_DRAIN_TIMEOUT = 2.0  # Seconds to drain pipes after a stall/cancel kill
+
+# Probe result reuse (a job's manager, engine and fallback paths all probe)
+PROBE_CACHE_TTL = 30.0  # Seconds a successful probe is reused per source
+PROBE_CACHE_SIZE = 256  # Sources kept before the oldest is evicted
 
 # Stderr buffer configuration
 STDERR_BUFFER_SIZE = 200  # Lines to keep in stderr buffer
 STDERR_EARLY_BUFFER_SIZE = 50  # Lines to preserve from early stderr (errors)
+STDERR_LINE_LIMIT = 1024 * 1024  # Pipe reader line limit (asyncio's 64KiB default trips on filter graph dumps)
 
 
 # =============================================================================
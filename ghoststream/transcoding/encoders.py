@@ -4,12 +4,17 @@ Handles hardware acceleration detection and fallback.
 """
 
 import logging
+import re
 import time
-from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Tuple
 
 from ..models import VideoCodec, AudioCodec, HWAccel
-from ..hardware import HWAccelType, Capabilities
+from ..hardware import HWAccelType, HWAccelCapability, Capabilities
 from ..config import HardwareConfig
+from .models import EncoderChoice
 
 logger = logging.getLogger(__name__)
 
@@ -81,6 +86,20 @@ QSV_QUALITY_ARGS = {
     ],
 }
 
+
+
+@lru_cache(maxsize=None)
+def _nvenc_args(preset: str) -> Tuple[str, ...]:
+    """NVENC quality args for a preset as a shared tuple (unknown presets use p4)."""
+    return tuple(NVENC_QUALITY_ARGS.get(preset, NVENC_QUALITY_ARGS["p4"]))
+
+
+@lru_cache(maxsize=None)
+def _qsv_args(preset: str) -> Tuple[str, ...]:
+    """QSV quality args for a preset as a shared tuple (unknown presets use medium)."""
+    return tuple(QSV_QUALITY_ARGS.get(preset, QSV_QUALITY_ARGS["medium"]))
+
+
 # AMF quality tuning - AMD
 AMF_QUALITY_ARGS = [
     "-quality", "quality",
@@ -104,139 +123,312 @@ VIDEOTOOLBOX_QUALITY_ARGS = [
 ]
 
 
+# Substrings in FFmpeg output that indicate a hardware encode/decode failure,
+# fused into a single case-insensitive pattern so stderr is scanned once
+_HW_ERROR_SUBSTRINGS = (
+    "no capable devices found",
+    "cannot open",
+    "initialization failed",
+    "not available",
+    "driver",
+    "cuda",
+    "nvenc",
+    "qsv",
+    "vaapi",
+    "device",
+    "gpu",
+    "hw_frames_ctx",
+    "hwaccel",
+)
+# Entries containing a shorter entry ("no capable devices found" has "device")
+# can never decide a match, so they're left out of the alternation
+_HW_ERROR_RE = re.compile(
+    "|".join(
+        re.escape(needle) for needle in _HW_ERROR_SUBSTRINGS
+        if not any(other != needle and other in needle for other in _HW_ERROR_SUBSTRINGS)
+    ),
+    re.IGNORECASE,
+)
+
+
+# =============================================================================
+# ENCODER TABLES
+# =============================================================================
+# Static encoder names per codec and hardware type. Quality args for the
+# hardware families are attached in _build_encoder_map, since NVENC and QSV
+# args depend on the configured preset.
+
+_VIDEO_ENCODERS: Dict[VideoCodec, Dict[HWAccelType, str]] = {
+    VideoCodec.H264: {
+        HWAccelType.NVENC: "h264_nvenc",
+        HWAccelType.QSV: "h264_qsv",
+        HWAccelType.VAAPI: "h264_vaapi",
+        HWAccelType.VIDEOTOOLBOX: "h264_videotoolbox",
+        HWAccelType.AMF: "h264_amf",
+        HWAccelType.SOFTWARE: "libx264",
+    },
+    VideoCodec.H265: {
+        HWAccelType.NVENC: "hevc_nvenc",
+        HWAccelType.QSV: "hevc_qsv",
+        HWAccelType.VAAPI: "hevc_vaapi",
+        HWAccelType.VIDEOTOOLBOX: "hevc_videotoolbox",
+        HWAccelType.AMF: "hevc_amf",
+        HWAccelType.SOFTWARE: "libx265",
+    },
+    VideoCodec.VP9: {
+        HWAccelType.VAAPI: "vp9_vaapi",
+        HWAccelType.QSV: "vp9_qsv",
+        HWAccelType.SOFTWARE: "libvpx-vp9",
+    },
+    VideoCodec.AV1: {
+        HWAccelType.NVENC: "av1_nvenc",
+        HWAccelType.QSV: "av1_qsv",
+        HWAccelType.VAAPI: "av1_vaapi",
+        HWAccelType.SOFTWARE: "libsvtav1",
+    },
+}
+
+# Software encoder quality args
+_SOFTWARE_ENCODER_ARGS: Dict[str, Tuple[str, ...]] = {
+    "libx264": (
+        "-preset", "medium",
+        "-tune", "film",
+        "-profile:v", "high",
+        "-rc-lookahead", "40",
+        "-bf", "3",
+        "-aq-mode", "2",
+    ),
+    "libx265": (
+        "-preset", "medium",
+        "-x265-params", "aq-mode=2:rc-lookahead=20",
+    ),
+    "libvpx-vp9": (
+        "-cpu-used", "4",
+        "-crf", "30",
+        "-b:v", "0",
+        "-row-mt", "1",
+    ),
+    "libsvtav1": ("-preset", "6", "-crf", "30"),
+}
+
+# Used for codecs without an entry in _VIDEO_ENCODERS
+_DEFAULT_VIDEO_ENCODER: Tuple[str, Tuple[str, ...]] = ("libx264", ("-preset", "medium", "-crf", "23"))
+
+
+@lru_cache(maxsize=8)
+def _build_encoder_map(
+    codec: VideoCodec,
+    nvenc_preset: str,
+    qsv_preset: str
+) -> Mapping[HWAccelType, Tuple[str, Tuple[str, ...]]]:
+    """Resolve encoder names and quality args for a codec and preset pair."""
+    encoders = _VIDEO_ENCODERS.get(codec)
+    if encoders is None:
+        return MappingProxyType({HWAccelType.SOFTWARE: _DEFAULT_VIDEO_ENCODER})
+    
+    hw_args = {
+        HWAccelType.NVENC: _nvenc_args(nvenc_preset),
+        HWAccelType.QSV: _qsv_args(qsv_preset),
+        HWAccelType.VAAPI: tuple(VAAPI_QUALITY_ARGS),
+        HWAccelType.VIDEOTOOLBOX: tuple(VIDEOTOOLBOX_QUALITY_ARGS),
+        HWAccelType.AMF: tuple(AMF_QUALITY_ARGS),
+    }
+    return MappingProxyType({
+        hw_type: (
+            encoder,
+            _SOFTWARE_ENCODER_ARGS[encoder] if hw_type == HWAccelType.SOFTWARE else hw_args[hw_type],
+        )
+        for hw_type, encoder in encoders.items()
+    })
+
+
+# Requested accel -> hardware type. Both enums share their values, so the
+# table follows them when a new backend is added (AUTO has no counterpart
+# and is resolved per selector).
+_ACCEL_TO_HW_TYPE: Dict[HWAccel, HWAccelType] = {
+    accel: hw_type
+    for accel in HWAccel
+    for hw_type in HWAccelType
+    if accel.value == hw_type.value
+}
+
+_AUDIO_ENCODERS: Dict[AudioCodec, Tuple[str, Tuple[str, ...]]] = {
+    AudioCodec.COPY: ("copy", ()),
+    AudioCodec.AAC: ("aac", ("-b:a", "192k")),
+    AudioCodec.OPUS: ("libopus", ("-b:a", "128k")),
+    AudioCodec.MP3: ("libmp3lame", ("-b:a", "192k")),
+    AudioCodec.FLAC: ("flac", ()),
+    AudioCodec.AC3: ("ac3", ("-b:a", "384k")),
+}
+
+
+class _EncoderClass(NamedTuple):
+    """Everything derived from an encoder's name."""
+    family: str                       # nvenc, qsv, vaapi, videotoolbox, amf or software
+    hw_type: Optional[HWAccelType]    # None for software encoders
+    decode_args: Tuple[str, ...]      # hw decode args; "{device}" is the vaapi device
+    decode_type: Optional[str]        # hw frame type reported by get_hw_decode_args
+
+
+_SOFTWARE_CLASS = _EncoderClass("software", None, (), None)
+
+# Hardware encoders are named <codec>_<family> (h264_nvenc, hevc_qsv, ...), so
+# the family suffix identifies everything in one lookup.
+_ENCODER_CLASSES: Dict[str, _EncoderClass] = {
+    "nvenc": _EncoderClass(
+        "nvenc", HWAccelType.NVENC,
+        ("-hwaccel", "cuda", "-hwaccel_output_format", "cuda"), "cuda",
+    ),
+    "qsv": _EncoderClass(
+        "qsv", HWAccelType.QSV,
+        ("-hwaccel", "qsv", "-hwaccel_output_format", "qsv"), "qsv",
+    ),
+    "vaapi": _EncoderClass(
+        "vaapi", HWAccelType.VAAPI,
+        ("-hwaccel", "vaapi", "-hwaccel_device", "{device}", "-hwaccel_output_format", "vaapi"), "vaapi",
+    ),
+    "videotoolbox": _EncoderClass(
+        "videotoolbox", HWAccelType.VIDEOTOOLBOX, ("-hwaccel", "videotoolbox"), "videotoolbox",
+    ),
+    "amf": _EncoderClass("amf", HWAccelType.AMF, ("-hwaccel", "d3d11va"), "amf"),
+}
+
+
+@lru_cache(maxsize=64)
+def _classify_encoder(encoder: str) -> _EncoderClass:
+    """Classify an encoder name by its family ("h264_nvenc" -> nvenc)."""
+    prefix, _, suffix = encoder.rpartition("_")
+    entry = _ENCODER_CLASSES.get(suffix)
+    if entry is None and prefix:
+        # Legacy <family>_<codec> aliases such as nvenc_h264
+        entry = _ENCODER_CLASSES.get(encoder.partition("_")[0])
+    return entry or _SOFTWARE_CLASS
+
+
+@lru_cache(maxsize=32)
+def _encoder_choice(encoder: str, args: Tuple[str, ...]) -> EncoderChoice:
+    """Wrap a resolved encoder with its family (hw family, "software" or "copy")."""
+    family = "copy" if encoder == "copy" else _classify_encoder(encoder).family
+    return EncoderChoice(encoder, args, family == "software", family)
+
+
+# Stream copy needs no selection at all
+_COPY_CHOICE = EncoderChoice("copy", (), False, "copy")
+
+
+@dataclass(slots=True)
+class _EncoderState:
+    """Failure tracking for one encoder."""
+    failures: int = 0
+    next_retry: float = 0.0  # time.monotonic() when a disabled encoder may be retried
+    failed: bool = False
+
+
 class EncoderSelector:
     """Selects appropriate encoders based on codec and hardware capabilities."""
     
+    # Consulted on every build; fixed attributes keep instances small and lookups cheap
+    __slots__ = (
+        "capabilities",
+        "hw_config",
+        "_state",
+        "_cooldown_seconds",
+        "_encoder_maps",
+        "_hw_by_type",
+        "_available_hw",
+        "_best_hw_accel",
+    )
+    
     def __init__(self, capabilities: Capabilities, hw_config: HardwareConfig):
         self.capabilities = capabilities
         self.hw_config = hw_config
-        self._failed_encoders: set = set()  # Track encoders that have failed
-        self._failure_counts: Dict[str, int] = {}  # Track failure count per encoder
-        self._last_failure_time: Dict[str, float] = {}  # Track when failure occurred
+        self._state: Dict[str, _EncoderState] = {}  # Failure tracking per encoder
         self._cooldown_seconds = 300  # 5 minute cooldown before retry
+        # Presets are fixed for the selector's lifetime, so resolve every map up front
+        self._encoder_maps: Dict[VideoCodec, Mapping[HWAccelType, Tuple[str, Tuple[str, ...]]]] = {
+            codec: _build_encoder_map(codec, hw_config.nvenc_preset, hw_config.qsv_preset)
+            for codec in _VIDEO_ENCODERS
+        }
+        self.refresh_capabilities()
     
-    def get_video_encoder(
-        self,
-        codec: VideoCodec,
-        hw_accel: HWAccel
-    ) -> Tuple[str, List[str]]:
-        """Get the video encoder and extra args based on codec and hw acceleration."""
-        
-        # Determine which hw accel to use
-        if hw_accel == HWAccel.AUTO:
-            best_accel = self.capabilities.get_best_hw_accel()
-        else:
-            accel_map = {
-                HWAccel.NVENC: HWAccelType.NVENC,
-                HWAccel.QSV: HWAccelType.QSV,
-                HWAccel.VAAPI: HWAccelType.VAAPI,
-                HWAccel.VIDEOTOOLBOX: HWAccelType.VIDEOTOOLBOX,
-                HWAccel.AMF: HWAccelType.AMF,
-                HWAccel.SOFTWARE: HWAccelType.SOFTWARE,
-            }
-            best_accel = accel_map.get(hw_accel, HWAccelType.SOFTWARE)
+    def refresh_capabilities(self, capabilities: Optional[Capabilities] = None) -> None:
+        """
+        Re-index hw accel entries by type, optionally switching to new capabilities.
         
-        # Check if requested hw accel is available
-        hw_available = False
+        Call after replacing or re-detecting capabilities; the index holds the
+        same HWAccelCapability objects, so availability flips still show up
+        in capabilities.hw_accels.
+        """
+        if capabilities is not None:
+            self.capabilities = capabilities
+        self._hw_by_type: Dict[HWAccelType, HWAccelCapability] = {}
         for hw in self.capabilities.hw_accels:
-            if hw.type == best_accel and hw.available:
-                hw_available = True
-                break
-        
-        if not hw_available and self.hw_config.fallback_to_software:
-            best_accel = HWAccelType.SOFTWARE
+            self._hw_by_type.setdefault(hw.type, hw)  # First entry wins, as the old scans did
+        self._refresh_hw_state()
+    
+    def _refresh_hw_state(self) -> None:
+        """
+        Snapshot available hw accel types and the best one for AUTO.
         
+        Must be called whenever this selector flips hw.available so encoder
+        resolution (which reads the snapshot) sees the change.
+        """
+        self._available_hw: FrozenSet[HWAccelType] = frozenset(
+            hw.type for hw in self.capabilities.hw_accels if hw.available
+        )
+        self._best_hw_accel = self.capabilities.get_best_hw_accel()
+    
+    def _resolve(self, codec: VideoCodec, hw_accel: HWAccel) -> Tuple[str, Tuple[str, ...]]:
+        """Resolve (encoder, shared args tuple) for a codec and hw acceleration."""
         if codec == VideoCodec.COPY:
-            return "copy", []
+            return "copy", ()
         
-        # Map codec to encoder based on hw accel
-        encoder_map = self._get_encoder_map(codec)
+        if hw_accel == HWAccel.AUTO:
+            best_accel = self._best_hw_accel
+        else:
+            best_accel = _ACCEL_TO_HW_TYPE.get(hw_accel, HWAccelType.SOFTWARE)
+        if best_accel not in self._available_hw and self.hw_config.fallback_to_software:
+            best_accel = HWAccelType.SOFTWARE
         
-        # Handle codecs with limited hw support
-        if codec in (VideoCodec.VP9, VideoCodec.AV1):
-            if best_accel not in encoder_map:
-                best_accel = HWAccelType.SOFTWARE
+        encoder_map = self._get_encoder_map(codec)
         
-        encoder, extra_args = encoder_map.get(
+        # Codecs with limited hw support (VP9, AV1) and unknown codecs only have a
+        # subset of hw types in their map, so fall through to software
+        return encoder_map.get(
             best_accel,
-            encoder_map.get(HWAccelType.SOFTWARE, ("libx264", ["-preset", "medium", "-crf", "23"]))
+            encoder_map.get(HWAccelType.SOFTWARE, _DEFAULT_VIDEO_ENCODER)
         )
-        
-        return encoder, extra_args
     
-    def _get_encoder_map(self, codec: VideoCodec) -> dict:
+    def get_video_encoder(
+        self,
+        codec: VideoCodec,
+        hw_accel: HWAccel
+    ) -> Tuple[str, List[str]]:
+        """Get the video encoder and extra args based on codec and hw acceleration."""
+        if codec == VideoCodec.COPY:
+            return "copy", []
+        encoder, extra_args = self._resolve(codec, hw_accel)
+        return encoder, list(extra_args)
+    
+    def choose_video_encoder(self, codec: VideoCodec, hw_accel: HWAccel) -> EncoderChoice:
+        """Like get_video_encoder, but returns an EncoderChoice with the family resolved."""
+        if codec == VideoCodec.COPY:
+            return _COPY_CHOICE
+        return _encoder_choice(*self._resolve(codec, hw_accel))
+    
+    def _get_encoder_map(self, codec: VideoCodec) -> Mapping[HWAccelType, Tuple[str, Tuple[str, ...]]]:
         """Get encoder mapping for a specific codec with full quality args."""
-        config = self.hw_config
-
-        # Get quality args for each encoder type
-        nvenc_args = NVENC_QUALITY_ARGS.get(config.nvenc_preset, NVENC_QUALITY_ARGS["p4"])
-        qsv_args = QSV_QUALITY_ARGS.get(config.qsv_preset, QSV_QUALITY_ARGS["medium"])
-
-        if codec == VideoCodec.H264:
-            return {
-                HWAccelType.NVENC: ("h264_nvenc", nvenc_args.copy()),
-                HWAccelType.QSV: ("h264_qsv", qsv_args.copy()),
-                HWAccelType.VAAPI: ("h264_vaapi", VAAPI_QUALITY_ARGS.copy()),
-                HWAccelType.VIDEOTOOLBOX: ("h264_videotoolbox", VIDEOTOOLBOX_QUALITY_ARGS.copy()),
-                HWAccelType.AMF: ("h264_amf", AMF_QUALITY_ARGS.copy()),
-                HWAccelType.SOFTWARE: ("libx264", [
-                    "-preset", "medium",
-                    "-tune", "film",
-                    "-profile:v", "high",
-                    "-rc-lookahead", "40",
-                    "-bf", "3",
-                    "-aq-mode", "2",
-                ]),
-            }
-        elif codec == VideoCodec.H265:
-            return {
-                HWAccelType.NVENC: ("hevc_nvenc", nvenc_args.copy()),
-                HWAccelType.QSV: ("hevc_qsv", qsv_args.copy()),
-                HWAccelType.VAAPI: ("hevc_vaapi", VAAPI_QUALITY_ARGS.copy()),
-                HWAccelType.VIDEOTOOLBOX: ("hevc_videotoolbox", VIDEOTOOLBOX_QUALITY_ARGS.copy()),
-                HWAccelType.AMF: ("hevc_amf", AMF_QUALITY_ARGS.copy()),
-                HWAccelType.SOFTWARE: ("libx265", [
-                    "-preset", "medium",
-                    "-x265-params", "aq-mode=2:rc-lookahead=20",
-                ]),
-            }
-        elif codec == VideoCodec.VP9:
-            return {
-                HWAccelType.VAAPI: ("vp9_vaapi", VAAPI_QUALITY_ARGS.copy()),
-                HWAccelType.QSV: ("vp9_qsv", qsv_args.copy()),
-                HWAccelType.SOFTWARE: ("libvpx-vp9", [
-                    "-cpu-used", "4",
-                    "-crf", "30",
-                    "-b:v", "0",
-                    "-row-mt", "1",
-                ]),
-            }
-        elif codec == VideoCodec.AV1:
-            return {
-                HWAccelType.NVENC: ("av1_nvenc", nvenc_args.copy()),
-                HWAccelType.QSV: ("av1_qsv", qsv_args.copy()),
-                HWAccelType.VAAPI: ("av1_vaapi", VAAPI_QUALITY_ARGS.copy()),
-                HWAccelType.SOFTWARE: ("libsvtav1", ["-preset", "6", "-crf", "30"]),
-            }
-        else:
-            return {
-                HWAccelType.SOFTWARE: ("libx264", ["-preset", "medium", "-crf", "23"]),
-            }
+        encoder_map = self._encoder_maps.get(codec)
+        if encoder_map is None:
+            encoder_map = _build_encoder_map(codec, self.hw_config.nvenc_preset, self.hw_config.qsv_preset)
+        return encoder_map
     
     def get_audio_encoder(self, codec: AudioCodec) -> Tuple[str, List[str]]:
         """Get the audio encoder based on codec."""
         if codec == AudioCodec.COPY:
             return "copy", []
-        
-        encoder_map = {
-            AudioCodec.AAC: ("aac", ["-b:a", "192k"]),
-            AudioCodec.OPUS: ("libopus", ["-b:a", "128k"]),
-            AudioCodec.MP3: ("libmp3lame", ["-b:a", "192k"]),
-            AudioCodec.FLAC: ("flac", []),
-            AudioCodec.AC3: ("ac3", ["-b:a", "384k"]),
-        }
-        
-        return encoder_map.get(codec, ("aac", ["-b:a", "192k"]))
+        encoder, args = _AUDIO_ENCODERS.get(codec, _AUDIO_ENCODERS[AudioCodec.AAC])
+        return encoder, list(args)
     
     def get_hw_decode_args(
         self,
@@ -244,55 +436,19 @@ class EncoderSelector:
         vaapi_device: str = "/dev/dri/renderD128"
     ) -> Tuple[List[str], str | None]:
         """Get hardware decoding arguments based on encoder."""
-        if "nvenc" in video_encoder:
-            return ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda"], "cuda"
-        elif "qsv" in video_encoder:
-            return ["-hwaccel", "qsv", "-hwaccel_output_format", "qsv"], "qsv"
-        elif "vaapi" in video_encoder:
-            return [
-                "-hwaccel", "vaapi",
-                "-hwaccel_device", vaapi_device,
-                "-hwaccel_output_format", "vaapi"
-            ], "vaapi"
-        elif "videotoolbox" in video_encoder:
-            return ["-hwaccel", "videotoolbox"], "videotoolbox"
-        elif "amf" in video_encoder:
-            return ["-hwaccel", "d3d11va"], "amf"
-        return [], None
+        entry = _classify_encoder(video_encoder)
+        args, hw_type = entry.decode_args, entry.decode_type
+        if hw_type == "vaapi":
+            return [vaapi_device if arg == "{device}" else arg for arg in args], hw_type
+        return list(args), hw_type
     
     def detect_hw_accel_used(self, encoder: str) -> str:
         """Determine which hardware acceleration was used."""
-        if "nvenc" in encoder:
-            return "nvenc"
-        elif "qsv" in encoder:
-            return "qsv"
-        elif "vaapi" in encoder:
-            return "vaapi"
-        elif "videotoolbox" in encoder:
-            return "videotoolbox"
-        elif "amf" in encoder:
-            return "amf"
-        return "software"
+        return _classify_encoder(encoder).family
     
     def is_hw_error(self, error_msg: str) -> bool:
         """Check if error is related to hardware encoding failure."""
-        hw_errors = [
-            "no capable devices found",
-            "cannot open",
-            "initialization failed",
-            "not available",
-            "driver",
-            "cuda",
-            "nvenc",
-            "qsv",
-            "vaapi",
-            "device",
-            "gpu",
-            "hw_frames_ctx",
-            "hwaccel",
-        ]
-        error_lower = error_msg.lower()
-        return any(err in error_lower for err in hw_errors)
+        return _HW_ERROR_RE.search(error_msg) is not None
     
     def mark_hw_failed(self, encoder: str, job_id: Optional[str] = None) -> None:
         """
@@ -301,85 +457,81 @@ class EncoderSelector:
         Uses exponential backoff instead of permanently disabling.
         Only disables globally after multiple consecutive failures.
         """
-        self._failure_counts[encoder] = self._failure_counts.get(encoder, 0) + 1
-        self._last_failure_time[encoder] = time.time()
+        state = self._state.get(encoder)
+        if state is None:
+            state = self._state[encoder] = _EncoderState()
+        state.failures += 1
 
-        failures = self._failure_counts[encoder]
+        failures = state.failures
         logger.warning(f"[Encoder] Encoder {encoder} failed (count: {failures})")
 
         # Only disable globally after multiple consecutive failures (3+)
         if failures >= 3:
-            self._failed_encoders.add(encoder)
+            # Exponential backoff: 5 min, 10 min, 20 min, 40 min, capped at 1 hour.
+            # Worked out here so availability checks are a single comparison.
+            cooldown = min(self._cooldown_seconds * (2 ** (failures - 3)), 3600)
+            state.next_retry = time.monotonic() + cooldown
+            state.failed = True
+            logger.info(f"[Encoder] {encoder} can be retried in {cooldown}s")
             hw_type = self._encoder_to_hw_type(encoder)
             if hw_type:
-                for hw in self.capabilities.hw_accels:
-                    if hw.type == hw_type:
-                        hw.available = False
-                        logger.warning(f"[Encoder] Disabled {hw_type.value} after {failures} failures")
-                        break
+                hw = self._hw_by_type.get(hw_type)
+                if hw:
+                    hw.available = False
+                    logger.warning(f"[Encoder] Disabled {hw_type.value} after {failures} failures")
+                self._refresh_hw_state()
 
     def is_encoder_available(self, encoder: str) -> bool:
         """Check if encoder is available (considering cooldown)."""
-        if encoder not in self._failed_encoders:
+        state = self._state.get(encoder)
+        if state is None or not state.failed:
             return True
 
         # Check if cooldown has passed
-        last_failure = self._last_failure_time.get(encoder, 0)
-        failures = self._failure_counts.get(encoder, 0)
-
-        # Exponential backoff: 5 min, 10 min, 20 min, 40 min, etc.
-        cooldown = self._cooldown_seconds * (2 ** (failures - 3))  # Start at 5 min after 3 failures
-        cooldown = min(cooldown, 3600)  # Cap at 1 hour
-
-        if time.time() - last_failure > cooldown:
+        if time.monotonic() >= state.next_retry:
             # Reset and allow retry
-            self._failed_encoders.discard(encoder)
-            logger.info(f"[Encoder] Re-enabling {encoder} after {cooldown}s cooldown")
+            state.failed = False
+            logger.info(f"[Encoder] Re-enabling {encoder} after cooldown")
 
             # Re-enable hw accel capability
             hw_type = self._encoder_to_hw_type(encoder)
             if hw_type:
-                for hw in self.capabilities.hw_accels:
-                    if hw.type == hw_type:
-                        hw.available = True
-                        break
+                hw = self._hw_by_type.get(hw_type)
+                if hw:
+                    hw.available = True
+                self._refresh_hw_state()
             return True
 
         return False
 
     def reset_encoder(self, encoder: str) -> None:
         """Reset failure state for a specific encoder (e.g., after successful encode)."""
-        self._failed_encoders.discard(encoder)
-        self._failure_counts.pop(encoder, None)
-        self._last_failure_time.pop(encoder, None)
+        self._state.pop(encoder, None)
 
         hw_type = self._encoder_to_hw_type(encoder)
         if hw_type:
-            for hw in self.capabilities.hw_accels:
-                if hw.type == hw_type:
-                    hw.available = True
-                    break
+            hw = self._hw_by_type.get(hw_type)
+            if hw:
+                hw.available = True
+            self._refresh_hw_state()
         logger.debug(f"[Encoder] Reset failure state for {encoder}")
     
     def _encoder_to_hw_type(self, encoder: str) -> HWAccelType | None:
         """Map encoder name to hardware acceleration type."""
-        if "nvenc" in encoder:
-            return HWAccelType.NVENC
-        elif "qsv" in encoder:
-            return HWAccelType.QSV
-        elif "vaapi" in encoder:
-            return HWAccelType.VAAPI
-        elif "videotoolbox" in encoder:
-            return HWAccelType.VIDEOTOOLBOX
-        elif "amf" in encoder:
-            return HWAccelType.AMF
-        return None
+        return _classify_encoder(encoder).hw_type
+    
+    @property
+    def _failed_encoders(self) -> FrozenSet[str]:
+        """Names of encoders currently disabled."""
+        return frozenset(name for name, state in self._state.items() if state.failed)
     
     def is_encoder_failed(self, encoder: str) -> bool:
         """Check if an encoder has been marked as failed."""
-        return encoder in self._failed_encoders
+        state = self._state.get(encoder)
+        return state is not None and state.failed
     
     def reset_failed_encoders(self) -> None:
         """Reset the list of failed encoders (e.g., after system restart)."""
-        self._failed_encoders.clear()
+        for state in self._state.values():
+            state.failed = False
         logger.info("[Encoder] Reset failed encoders list")
@@ -4,6 +4,7 @@ Main transcoding engine that orchestrates all transcoding operations.
 
 import asyncio
 import os
+import random
 import re
 import shutil
 import signal
@@ -11,6 +12,7 @@ import subprocess
 import sys
 import time
 import logging
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
@@ -19,36 +21,129 @@ from typing import Optional, Callable, List, Tuple, Dict, Any, Set
 from ..models import OutputConfig, OutputFormat, VideoCodec, HWAccel, TranscodeMode
 from ..hardware import get_capabilities
 from ..config import get_config
-from .models import MediaInfo, TranscodeProgress, QualityPreset
+from .models import MediaInfo, TranscodeProgress, QualityPreset, ResolvedJob
 from .constants import (
     MAX_RETRIES, 
     RETRY_DELAY, 
     MIN_STALL_TIMEOUT, 
     STALL_TIMEOUT_PER_SEGMENT,
+    READER_DRAIN_TIMEOUT,
+    PROBE_CACHE_TTL,
+    PROBE_CACHE_SIZE,
     MAX_RETRY_DELAY,
     TRANSIENT_INFINITE_RETRY,
     STDERR_BUFFER_SIZE,
     STDERR_EARLY_BUFFER_SIZE,
+    STDERR_LINE_LIMIT,
 )
 from .filters import FilterBuilder
 from .encoders import EncoderSelector
 from .probe import MediaProbe
-from .commands import CommandBuilder
+from .commands import CommandBuilder, remove_passlog_files
 from .adaptive import HardwareProfiler, AdaptiveQualitySelector, SystemProfile
+from .pynvc import PyNvcPipelineBuilder, run_pynvc_video
 
 # Import modular components
 from .error_classifier import ErrorClassifier, get_error_classifier, FFmpegError, FFMPEG_ERROR_MAP
 from .job_context import JobContext, JobRegistry, JobRegistryEntry
-from .ffmpeg_runner import FFmpegRunner, ProgressParser, StallConfig
+from .ffmpeg_runner import (
+    FFmpegRunner, ProgressParser, StallConfig, parse_progress_line, parse_progress_field,
+    directory_size, signal_process_group, track_process_group
+)
 from .hls import HLSPlaylistGenerator, HLSConfig, StreamingRecommendations
 
-# Thread pool for blocking I/O operations (cleanup, etc.)
-# Scale workers based on CPU count
+# Thread pool for blocking I/O operations (output validation), shared by
+# all engines. Scale workers based on CPU count, but never below two per
+# concurrent job so one job's validation doesn't queue behind another's.
 _io_workers = min(max(os.cpu_count() or 4, 2), 8)
-_executor = ThreadPoolExecutor(max_workers=_io_workers, thread_name_prefix="ghoststream_io")
+_executor: Optional[ThreadPoolExecutor] = None
+
+# Deleting a large ABR job directory can take a while; it gets its own small
+# pool so it never holds up validation or other offloaded work
+_cleanup_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ghoststream_cleanup")
+
+
+def _get_io_executor(max_concurrent_jobs: int) -> ThreadPoolExecutor:
+    """Create the shared I/O pool on first use, sized for the job limit."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(_io_workers, max_concurrent_jobs * 2),
+            thread_name_prefix="ghoststream_io"
+        )
+    return _executor
 
 logger = logging.getLogger(__name__)
 
+# Output file extension per container, built once rather than per command
+_OUTPUT_EXTENSIONS = {
+    OutputFormat.MP4: ".mp4",
+    OutputFormat.WEBM: ".webm",
+    OutputFormat.MKV: ".mkv",
+    OutputFormat.HLS: ".m3u8",
+    OutputFormat.DASH: ".mpd",
+}
+
+# Sequence numbers in segment file names (the last run of digits is used)
+_SEGMENT_NUMBER_RE = re.compile(r"\d+")
+
+# Segment headers are read with a raw fd (one open, fstat and read per file)
+_SEGMENT_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+
+
+def _clear_dir(root: str) -> None:
+    """
+    Delete everything inside root, skipping entries that can't be removed.
+    
+    Job directories hold segment files and at most one level of variant
+    subdirectories, so a scandir walk with plain unlinks is all it takes.
+    Raises OSError only if root itself can't be listed.
+    """
+    with os.scandir(root) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    _remove_tree(entry.path)
+                else:
+                    os.unlink(entry.path)
+            except OSError:
+                pass
+
+
+def _remove_tree(root: str) -> None:
+    """Delete a job directory tree, ignoring errors like ``rmtree(ignore_errors=True)``."""
+    try:
+        _clear_dir(root)
+        os.rmdir(root)
+    except OSError:
+        pass
+
+
+def _collect_ts_segments(root: Path) -> List[Path]:
+    """
+    Collect ``*.ts`` files in root and its immediate subdirectories.
+    
+    One scandir pass per directory; top-level segments come first.
+    Equivalent to ``glob("*.ts") + glob("*/*.ts")``.
+    """
+    segments: List[Path] = []
+    subdirs: List[str] = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.name.endswith(".ts") and entry.is_file():
+                segments.append(Path(entry.path))
+            elif entry.is_dir():
+                subdirs.append(entry.path)
+    
+    for subdir in subdirs:
+        with os.scandir(subdir) as entries:
+            segments.extend(
+                Path(entry.path) for entry in entries
+                if entry.name.endswith(".ts") and entry.is_file()
+            )
+    return segments
+
+
 # Note: FFmpegError, FFMPEG_ERROR_MAP, JobContext, JobRegistry, JobRegistryEntry,
 # ProgressParser are now imported from modular files for cleaner architecture
 
@@ -76,6 +171,7 @@ class TranscodeEngine:
         
         # Initialize modular components
         self.probe = MediaProbe(self._find_ffprobe())
+        self._probe_cache: Dict[str, Tuple[float, MediaInfo]] = {}
         self.filter_builder = FilterBuilder(self.ffmpeg_path)
         self.encoder_selector = EncoderSelector(
             self.capabilities,
@@ -88,14 +184,17 @@ class TranscodeEngine:
             self.config.transcoding,
             self.config.hardware
         )
+        self.pynvc_builder = PyNvcPipelineBuilder(self.ffmpeg_path, self.encoder_selector)
         
         # Initialize adaptive hardware profiling
         self.hardware_profiler = HardwareProfiler(self.capabilities)
         self._hardware_profile: Optional[SystemProfile] = None
+        self._quality_selector: Optional[AdaptiveQualitySelector] = None
         
         # Concurrency control: semaphore to enforce max concurrent transcodes
         max_concurrent = self.config.transcoding.max_concurrent_jobs
         self._transcode_semaphore = asyncio.Semaphore(max_concurrent)
+        self._io_executor = _get_io_executor(max_concurrent)
         
         # Optional job registry for tracking active/queued jobs
         self._job_registry = JobRegistry()
@@ -126,8 +225,16 @@ class TranscodeEngine:
         return self._hardware_profile
     
     def get_adaptive_quality_selector(self) -> AdaptiveQualitySelector:
-        """Get adaptive quality selector for current hardware."""
-        return AdaptiveQualitySelector(self.hardware_profile)
+        """Get adaptive quality selector for current hardware (lazily initialized)."""
+        if self._quality_selector is None:
+            self._quality_selector = AdaptiveQualitySelector(self.hardware_profile)
+        return self._quality_selector
+    
+    def refresh_hardware_profile(self) -> SystemProfile:
+        """Re-detect the hardware profile and drop the selector built on the old one."""
+        self._hardware_profile = self.hardware_profiler.get_profile(force_refresh=True)
+        self._quality_selector = None
+        return self._hardware_profile
     
     def get_optimal_presets(self, media_info: MediaInfo) -> List[QualityPreset]:
         """Get optimal quality presets for the source media given hardware limits."""
@@ -158,8 +265,32 @@ class TranscodeEngine:
         return "ffprobe"
     
     async def get_media_info(self, source: str, retry_count: int = 0) -> MediaInfo:
-        """Get media information using ffprobe with retry logic."""
-        return await self.probe.get_media_info(source, retry_count)
+        """
+        Get media information using ffprobe with retry logic.
+        
+        Successful probes are reused for a short while, so the job manager,
+        the transcode and an ABR fallback share one ffprobe run per source.
+        """
+        cached = self._probe_cache.get(source)
+        if cached is not None and time.monotonic() - cached[0] < PROBE_CACHE_TTL:
+            return cached[1]
+        
+        info = await self.probe.get_media_info(source, retry_count)
+        if info.duration > 0:
+            cache = self._probe_cache
+            cache.pop(source, None)
+            if len(cache) >= PROBE_CACHE_SIZE:
+                cache.pop(next(iter(cache)))
+            cache[source] = (time.monotonic(), info)
+        return info
+    
+    def resolve_job(
+        self,
+        output_config: OutputConfig,
+        media_info: Optional[MediaInfo] = None
+    ) -> ResolvedJob:
+        """Resolve encoders, bitrate and tonemapping once for several builds."""
+        return self.command_builder.resolve_job(output_config, media_info)
     
     def build_hls_command(
         self,
@@ -168,11 +299,12 @@ class TranscodeEngine:
         output_config: OutputConfig,
         start_time: float = 0,
         media_info: Optional[MediaInfo] = None,
-        subtitles: Optional[List] = None
+        subtitles: Optional[List] = None,
+        resolved: Optional[ResolvedJob] = None
     ) -> Tuple[List[str], str]:
         """Build FFmpeg command for HLS output."""
         return self.command_builder.build_hls_command(
-            source, output_dir, output_config, start_time, media_info, subtitles
+            source, output_dir, output_config, start_time, media_info, subtitles, resolved
         )
     
     def build_batch_command(
@@ -184,12 +316,13 @@ class TranscodeEngine:
         media_info: Optional[MediaInfo] = None,
         two_pass: bool = False,
         pass_num: int = 1,
-        passlog_prefix: Optional[str] = None
+        passlog_prefix: Optional[str] = None,
+        resolved: Optional[ResolvedJob] = None
     ) -> Tuple[List[str], str]:
         """Build FFmpeg command for batch transcoding."""
         return self.command_builder.build_batch_command(
             source, output_path, output_config, start_time, media_info,
-            two_pass, pass_num, passlog_prefix
+            two_pass, pass_num, passlog_prefix, resolved
         )
     
     def build_abr_command(
@@ -200,11 +333,30 @@ class TranscodeEngine:
         media_info: MediaInfo,
         start_time: float = 0,
         variants: Optional[List[QualityPreset]] = None,
-        subtitles: Optional[List] = None
+        subtitles: Optional[List] = None,
+        resolved: Optional[ResolvedJob] = None
     ) -> Tuple[List[str], str, List[QualityPreset]]:
         """Build FFmpeg command for ABR HLS."""
         return self.command_builder.build_abr_command(
-            source, output_dir, output_config, media_info, start_time, variants, subtitles
+            source, output_dir, output_config, media_info, start_time, variants, subtitles, resolved
+        )
+    
+    def build_variant_hls_command(
+        self,
+        source: str,
+        output_dir: Path,
+        index: int,
+        variant: QualityPreset,
+        output_config: OutputConfig,
+        media_info: MediaInfo,
+        start_time: float = 0,
+        threads: Optional[int] = None,
+        resolved: Optional[ResolvedJob] = None
+    ) -> List[str]:
+        """Build FFmpeg command for a single ABR rendition."""
+        return self.command_builder.build_variant_hls_command(
+            source, output_dir, index, variant, output_config, media_info,
+            start_time, threads, resolved
         )
     
     def get_abr_variants(self, media_info: MediaInfo) -> List[QualityPreset]:
@@ -214,10 +366,16 @@ class TranscodeEngine:
     def generate_master_playlist(
         self,
         output_dir: Path,
-        variants: List[QualityPreset]
+        variants: List[QualityPreset],
+        video_codec: str = "h264",
+        audio_codec: Optional[str] = "aac",
+        audio_channels: int = 2
     ) -> str:
         """Generate HLS master playlist for ABR variants."""
-        return self.command_builder.generate_master_playlist(output_dir, variants)
+        return self.command_builder.generate_master_playlist(
+            output_dir, variants, video_codec=video_codec,
+            audio_codec=audio_codec, audio_channels=audio_channels
+        )
     
     def _calculate_stall_timeout(self, media_info: MediaInfo) -> float:
         """
@@ -244,8 +402,10 @@ class TranscodeEngine:
         
         timeout = base_timeout + (segment_factor * resolution_factor)
         
-        logger.debug(f"[Transcode] Dynamic stall timeout: {timeout:.0f}s "
-                    f"(base={base_timeout}, segment={segment_duration}s, res_factor={resolution_factor})")
+        # Called for every FFmpeg run; skip building the message unless it's logged
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[Transcode] Dynamic stall timeout: {timeout:.0f}s "
+                        f"(base={base_timeout}, segment={segment_duration}s, res_factor={resolution_factor})")
         
         return timeout
     
@@ -285,14 +445,7 @@ class TranscodeEngine:
     
     def _resolve_output_extension(self, output_format: OutputFormat) -> str:
         """Resolve file extension for output format."""
-        ext_map = {
-            OutputFormat.MP4: ".mp4",
-            OutputFormat.WEBM: ".webm",
-            OutputFormat.MKV: ".mkv",
-            OutputFormat.HLS: ".m3u8",
-            OutputFormat.DASH: ".mpd",
-        }
-        return ext_map.get(output_format, ".mp4")
+        return _OUTPUT_EXTENSIONS.get(output_format, ".mp4")
     
     def _check_file_growth(self, job_dir: Path, last_size: int) -> Tuple[int, bool]:
         """
@@ -302,10 +455,7 @@ class TranscodeEngine:
             Tuple of (current_total_size, has_grown)
         """
         try:
-            total_size = 0
-            for f in job_dir.glob("**/*"):
-                if f.is_file():
-                    total_size += f.stat().st_size
+            total_size = directory_size(str(job_dir))
             return total_size, total_size > last_size
         except Exception:
             return last_size, False
@@ -342,9 +492,9 @@ class TranscodeEngine:
             except asyncio.TimeoutError:
                 pass
             
-            # Escalate to SIGTERM
+            # Escalate to SIGTERM (whole process group)
             try:
-                process.terminate()
+                signal_process_group(process, signal.SIGTERM)
                 await asyncio.wait_for(process.wait(), timeout=3.0)
                 logger.debug("[Transcode] FFmpeg terminated with SIGTERM")
                 return
@@ -353,7 +503,7 @@ class TranscodeEngine:
             
             # Last resort: SIGKILL
             try:
-                process.kill()
+                signal_process_group(process, getattr(signal, "SIGKILL", signal.SIGTERM))
                 await process.wait()
                 logger.warning("[Transcode] FFmpeg killed forcefully")
             except (ProcessLookupError, OSError):
@@ -382,7 +532,8 @@ class TranscodeEngine:
             failed to start or was killed unexpectedly.
         """
         log_prefix = job_context.log_prefix if job_context else "[Transcode]"
-        logger.info(f"{log_prefix} Running FFmpeg: {' '.join(cmd[:10])}...")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s Running FFmpeg: %s...", log_prefix, " ".join(cmd[:10]))
         
         # Calculate timeouts
         stall_timeout = self._calculate_stall_timeout(media_info)
@@ -397,25 +548,29 @@ class TranscodeEngine:
         progress = TranscodeProgress(stage=stage)
         progress_parser = ProgressParser(throttle_interval=0.5)
         state = {
-            "stderr_lines": [],
+            "stderr_lines": deque(maxlen=STDERR_BUFFER_SIZE),
             "stderr_early": [],  # Preserve early errors separately
             "stdout_bytes": 0,
-            "last_progress_time": time.time(),
+            "last_progress_time": time.monotonic(),
             "last_file_size": 0,
             "stalled": False,
             "cancelled": False,
-            "start_time": time.time(),
+            "start_time": time.monotonic(),
         }
         job_dir = job_context.job_dir if job_context else None
         
-        # Create reader tasks
-        stdout_task = asyncio.create_task(
-            self._read_stdout(process, state, log_prefix)
-        )
-        stderr_task = asyncio.create_task(
-            self._read_stderr(process, state, progress, progress_parser, 
-                            media_info, progress_callback, log_prefix)
-        )
+        # Create reader tasks (stdout is only piped when it carries progress)
+        tasks = [
+            asyncio.create_task(
+                self._read_stderr(process, state, progress, progress_parser,
+                                media_info, progress_callback, log_prefix)
+            )
+        ]
+        if process.stdout is not None:
+            tasks.append(asyncio.create_task(
+                self._read_stdout(process, state, progress, progress_parser,
+                                media_info, progress_callback, log_prefix)
+            ))
         monitor_task = asyncio.create_task(
             self._monitor_stall_and_cancel(
                 process, state, stall_timeout, grace_period, 
@@ -424,22 +579,43 @@ class TranscodeEngine:
         )
         
         try:
-            await asyncio.gather(stdout_task, stderr_task, monitor_task, return_exceptions=True)
-        except Exception as e:
-            logger.warning(f"{log_prefix} Error during FFmpeg execution: {e}")
+            try:
+                await monitor_task
+            except Exception as e:
+                logger.warning(f"{log_prefix} Error during FFmpeg execution: {e}")
+            
+            if state["stalled"] or state["cancelled"]:
+                # The process was torn down; don't hang on pipes a stuck child
+                # may still hold open
+                _, pending = await asyncio.wait(tasks, timeout=READER_DRAIN_TIMEOUT)
+                for task in pending:
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            # Only reached with live tasks if we were cancelled ourselves
+            for task in (*tasks, monitor_task):
+                task.cancel()
+        
+        # Deliver the last update if throttling held it back
+        if progress_callback and progress_parser.take_pending(progress, media_info):
+            try:
+                progress_callback(progress)
+            except Exception as e:
+                logger.warning(f"{log_prefix} Progress callback error: {e}")
         
-        # Ensure process has terminated
-        try:
-            await asyncio.wait_for(process.wait(), timeout=10.0)
-        except asyncio.TimeoutError:
-            logger.error(f"{log_prefix} FFmpeg did not exit, force killing")
-            await self._graceful_terminate(process)
+        # Ensure process has terminated (usually already reaped by now)
+        if process.returncode is None:
+            try:
+                await asyncio.wait_for(process.wait(), timeout=10.0)
+            except asyncio.TimeoutError:
+                logger.error(f"{log_prefix} FFmpeg did not exit, force killing")
+                await self._graceful_terminate(process)
         
         # Determine return code
         return_code = process.returncode if process.returncode is not None else -1
         
         # Build error output with context
-        error_output = "".join(state["stderr_lines"])
+        error_output = b"".join(state["stderr_lines"]).decode("utf-8", errors="ignore")
         if state["stalled"]:
             error_output = f"[STALLED after {stall_timeout:.0f}s] " + error_output
         if state["cancelled"]:
@@ -454,14 +630,20 @@ class TranscodeEngine:
     ) -> Optional[asyncio.subprocess.Process]:
         """Spawn FFmpeg subprocess with platform-specific options."""
         try:
+            # Outputs always go to files; stdout only carries -progress output
             kwargs: Dict[str, Any] = {
-                "stdout": asyncio.subprocess.PIPE,
+                "stdout": asyncio.subprocess.PIPE if "-progress" in cmd else asyncio.subprocess.DEVNULL,
                 "stderr": asyncio.subprocess.PIPE,
+                "limit": STDERR_LINE_LIMIT,
             }
             if sys.platform == "win32":
                 kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+            else:
+                # Own process group, so a kill reaches any helpers FFmpeg spawns
+                kwargs["start_new_session"] = True
             
-            return await asyncio.create_subprocess_exec(*cmd, **kwargs)
+            # Tracked so the children are reaped at exit (kill_process_groups)
+            return track_process_group(await asyncio.create_subprocess_exec(*cmd, **kwargs))
         except Exception as e:
             logger.error(f"{log_prefix} Failed to start FFmpeg: {e}")
             return None
@@ -470,19 +652,52 @@ class TranscodeEngine:
         self,
         process: asyncio.subprocess.Process,
         state: Dict[str, Any],
+        progress: TranscodeProgress,
+        parser: ProgressParser,
+        media_info: MediaInfo,
+        progress_callback: Optional[Callable[[TranscodeProgress], None]],
         log_prefix: str
     ) -> None:
-        """Read stdout in separate task to prevent pipe blocking."""
+        """
+        Read stdout in separate task to prevent pipe blocking.
+        
+        Commands run with ``-progress pipe:1``, so stdout carries key=value
+        progress blocks. Those drive progress and stall tracking; any other
+        output only counts towards ``stdout_bytes``.
+        """
+        pending = b""
         try:
             while True:
                 chunk = await process.stdout.read(4096)
                 if not chunk:
                     break
-                state["stdout_bytes"] += len(chunk)
                 
-                # Verbose forwarding if enabled
-                if self._verbose_ffmpeg:
-                    logger.debug(f"{log_prefix} stdout: {chunk.decode('utf-8', errors='ignore')[:200]}")
+                *lines, pending = (pending + chunk).split(b"\n")
+                for raw in lines:
+                    if progress_callback is None and b"=" in raw:
+                        # Nobody reads progress; block ends still feed the stall watchdog
+                        if raw.startswith(b"progress="):
+                            state["last_progress_time"] = time.monotonic()
+                        continue
+                    
+                    key, sep, value = raw.decode("utf-8", errors="ignore").strip().partition("=")
+                    if not sep:
+                        state["stdout_bytes"] += len(raw) + 1
+                        continue
+                    if not parse_progress_field(key, value, progress, media_info):
+                        continue
+                    
+                    # End of a progress block
+                    state["last_progress_time"] = time.monotonic()
+                    if progress_callback and parser.should_callback():
+                        try:
+                            progress_callback(progress)
+                        except Exception as e:
+                            logger.warning(f"{log_prefix} Progress callback error: {e}")
+                
+                # Verbose forwarding if enabled (decoding a chunk isn't free)
+                if self._verbose_ffmpeg and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"{log_prefix} stdout: {chunk[:200].decode('utf-8', errors='ignore')}")
         except Exception as e:
             logger.debug(f"{log_prefix} stdout reader error: {e}")
     
@@ -498,35 +713,31 @@ class TranscodeEngine:
     ) -> None:
         """Read stderr and parse progress with throttled callbacks."""
         try:
-            while True:
-                line = await process.stderr.readline()
-                if not line:
-                    break
-                
-                line_str = line.decode("utf-8", errors="ignore")
-                
+            async for line in process.stderr:
+                # Buffers keep raw bytes; only progress lines are decoded here,
+                # everything else once when the error output is built.
                 # Preserve early errors in separate buffer (first N lines)
                 if len(state["stderr_early"]) < STDERR_EARLY_BUFFER_SIZE:
-                    state["stderr_early"].append(line_str)
-                
-                # Rolling buffer for recent lines
-                state["stderr_lines"].append(line_str)
+                    state["stderr_early"].append(line)
                 
-                # Keep last N lines to avoid memory growth while preserving more context
-                if len(state["stderr_lines"]) > STDERR_BUFFER_SIZE:
-                    state["stderr_lines"].pop(0)
+                # Rolling buffer for recent lines (bounded deque drops the oldest)
+                state["stderr_lines"].append(line)
                 
                 # Parse progress using centralized parser
-                if parser.should_parse(line_str):
-                    state["last_progress_time"] = time.time()
-                    parser.parse(line_str, progress, media_info)
+                if parser.should_parse(line):
+                    state["last_progress_time"] = time.monotonic()
+                    if not progress_callback:
+                        continue  # Nobody reads progress; the stall stamp is enough
                     
-                    # Throttled callback
-                    if progress_callback and parser.should_callback():
+                    # Throttled: parse only lines that will be published
+                    if parser.should_callback():
+                        parser.parse(line.decode("utf-8", errors="ignore"), progress, media_info)
                         try:
                             progress_callback(progress)
                         except Exception as e:
                             logger.warning(f"{log_prefix} Progress callback error: {e}")
+                    else:
+                        parser.defer(line)
         except Exception as e:
             logger.debug(f"{log_prefix} stderr reader error: {e}")
     
@@ -559,9 +770,8 @@ class TranscodeEngine:
                 try:
                     # Non-blocking check if process is still running
                     if sys.platform != "win32":
-                        import os as os_module
                         try:
-                            os_module.kill(process.pid, 0)  # Signal 0 = check existence
+                            os.kill(process.pid, 0)  # Signal 0 = check existence
                         except ProcessLookupError:
                             # Process doesn't exist - zombie or exited
                             logger.warning(f"{log_prefix} Process {process.pid} no longer exists (zombie)")
@@ -579,8 +789,9 @@ class TranscodeEngine:
                 await self._graceful_terminate(process)
                 return
             
-            elapsed = time.time() - state["start_time"]
-            time_since_progress = time.time() - state["last_progress_time"]
+            now = time.monotonic()
+            elapsed = now - state["start_time"]
+            time_since_progress = now - state["last_progress_time"]
             
             # Skip stall detection during grace period
             if elapsed < grace_period:
@@ -596,16 +807,16 @@ class TranscodeEngine:
                     )
                     if has_grown:
                         # Files are growing, update progress time
-                        state["last_progress_time"] = time.time()
+                        state["last_progress_time"] = time.monotonic()
                         state["last_file_size"] = new_size
-                        logger.debug(f"{log_prefix} File growth detected, resetting stall timer")
+                        logger.debug("%s File growth detected, resetting stall timer", log_prefix)
                         await asyncio.sleep(1.0)
                         continue
                 
                 # Also check stdout bytes as progress indicator
                 if state["stdout_bytes"] > 0:
                     # Some progress via stdout
-                    state["last_progress_time"] = time.time()
+                    state["last_progress_time"] = time.monotonic()
                     state["stdout_bytes"] = 0  # Reset for next check
                     await asyncio.sleep(1.0)
                     continue
@@ -628,71 +839,7 @@ class TranscodeEngine:
         
         Handles various FFmpeg output formats and edge cases.
         """
-        # Frame count - multiple possible formats
-        match = re.search(r"frame=\s*(\d+)", line)
-        if match:
-            try:
-                progress.frame = int(match.group(1))
-            except (ValueError, TypeError):
-                pass
-        
-        # FPS - may have decimals or be "N/A"
-        match = re.search(r"fps=\s*([\d.]+|N/A)", line)
-        if match and match.group(1) != "N/A":
-            try:
-                progress.fps = float(match.group(1))
-            except (ValueError, TypeError):
-                pass
-        
-        # Bitrate - various formats like "1234kbits/s", "1.2Mbits/s", "N/A"
-        match = re.search(r"bitrate=\s*([\d.]+\s*[kMG]?bits/s|N/A)", line)
-        if match and match.group(1) != "N/A":
-            progress.bitrate = match.group(1).strip()
-        
-        # Size - may be in kB, MB, or bytes
-        match = re.search(r"size=\s*(\d+)\s*(kB|MB|B)?", line)
-        if match:
-            try:
-                size_val = int(match.group(1))
-                unit = match.group(2) or "kB"
-                if unit == "MB":
-                    progress.total_size = size_val * 1024 * 1024
-                elif unit == "kB":
-                    progress.total_size = size_val * 1024
-                else:
-                    progress.total_size = size_val
-            except (ValueError, TypeError):
-                pass
-        
-        # Time - format HH:MM:SS.ms or MM:SS.ms
-        match = re.search(r"time=\s*(\d+):(\d+):(\d+\.?\d*)", line)
-        if match:
-            try:
-                h, m, s = match.groups()
-                progress.time = int(h) * 3600 + int(m) * 60 + float(s)
-            except (ValueError, TypeError):
-                pass
-        else:
-            # Try MM:SS.ms format
-            match = re.search(r"time=\s*(\d+):(\d+\.?\d*)", line)
-            if match:
-                try:
-                    m, s = match.groups()
-                    progress.time = int(m) * 60 + float(s)
-                except (ValueError, TypeError):
-                    pass
-        
-        # Speed - may be "N/A" or have various decimal formats
-        match = re.search(r"speed=\s*([\d.]+)x", line)
-        if match:
-            try:
-                progress.speed = float(match.group(1))
-            except (ValueError, TypeError):
-                pass
-        
-        # Calculate percentage
-        if media_info.duration > 0 and progress.time > 0:
-            progress.percent = min(99.9, (progress.time / media_info.duration) * 100)
+        parse_progress_line(line, progress, media_info)
     
     async def _prepare_job(self, job_id: str, source: str) -> Tuple[Optional[MediaInfo], Optional[Path], Optional[str]]:
         """
@@ -764,33 +911,27 @@ class TranscodeEngine:
         """
         master_path = Path(output_path)
         
-        # Check master playlist exists
-        if not master_path.exists():
+        # Check master playlist exists (the read doubles as the existence check)
+        try:
+            content = master_path.read_text()
+        except FileNotFoundError:
             return False, "Master playlist not found"
         
         # Check master playlist has content
-        content = master_path.read_text()
         if not content.strip():
             return False, "Master playlist is empty"
         
-        # Check for at least one variant/stream reference
-        has_variant = False
-        segment_patterns = []
-        
-        for line in content.split("\n"):
-            line = line.strip()
-            if line.endswith(".m3u8") or line.endswith(".ts"):
-                has_variant = True
-                segment_patterns.append(line)
+        # Check for at least one variant/stream reference (stops at the first)
+        has_variant = any(
+            line.rstrip().endswith((".m3u8", ".ts")) for line in content.splitlines()
+        )
         
-        if not has_variant:
-            # Check for direct segment references
-            segment_files = list(job_dir.glob("*.ts"))
-            if not segment_files:
-                return False, "No variant playlists or segments found"
+        # One directory walk covers direct and variant-subdir segments
+        segment_files = _collect_ts_segments(job_dir)
+        if not has_variant and not any(f.parent == job_dir for f in segment_files):
+            return False, "No variant playlists or segments found"
         
         # Verify at least one segment exists
-        segment_files = list(job_dir.glob("*.ts")) + list(job_dir.glob("*/*.ts"))
         if not segment_files:
             return False, "No segment files generated"
         
@@ -828,7 +969,7 @@ class TranscodeEngine:
         # Extract segment numbers safely
         segment_numbers = []
         for f in segment_files:
-            matches = re.findall(r"(\d+)", f.name)
+            matches = _SEGMENT_NUMBER_RE.findall(f.name)
             if matches:
                 try:
                     # Take the last number in filename (usually the sequence number)
@@ -921,18 +1062,20 @@ class TranscodeEngine:
         sizes = []
         for segment in segment_files[:10]:  # Check first 10 segments
             try:
-                size = segment.stat().st_size
-                sizes.append(size)
-                
-                # Check minimum size
-                if size < min_segment_size:
-                    return False, f"Segment {segment.name} too small: {size} bytes"
-                
-                # Check MPEG-TS sync byte
-                with open(segment, 'rb') as f:
-                    header = f.read(4)
-                    if not header or header[0:1] != ts_sync_byte:
+                fd = os.open(segment, _SEGMENT_OPEN_FLAGS)
+                try:
+                    size = os.fstat(fd).st_size
+                    sizes.append(size)
+                    
+                    # Check minimum size
+                    if size < min_segment_size:
+                        return False, f"Segment {segment.name} too small: {size} bytes"
+                    
+                    # Check MPEG-TS sync byte
+                    if os.read(fd, 1) != ts_sync_byte:
                         return False, f"Segment {segment.name} missing MPEG-TS sync byte"
+                finally:
+                    os.close(fd)
                         
             except Exception as e:
                 return False, f"Error checking segment {segment.name}: {e}"
@@ -954,12 +1097,12 @@ class TranscodeEngine:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        path = Path(output_path)
-        
-        if not path.exists():
+        # One stat covers both the existence and size checks
+        try:
+            size = os.stat(output_path).st_size
+        except FileNotFoundError:
             return False, "Output file not found"
         
-        size = path.stat().st_size
         if size == 0:
             return False, "Output file is empty"
         
@@ -969,7 +1112,7 @@ class TranscodeEngine:
         
         return True, ""
     
-    def _validate_output(
+    async def _validate_output(
         self,
         mode: TranscodeMode,
         output_path: str,
@@ -978,13 +1121,18 @@ class TranscodeEngine:
         """
         Validate transcoding output based on mode.
         
+        The checks read playlists, glob and stat segments, so they run on the
+        I/O thread pool rather than blocking the event loop.
+        
         Returns:
             Tuple of (is_valid, error_message)
         """
+        loop = asyncio.get_running_loop()
         if mode == TranscodeMode.STREAM:
-            return self._validate_hls_output(output_path, job_dir)
-        else:
-            return self._validate_batch_output(output_path)
+            return await loop.run_in_executor(
+                self._io_executor, self._validate_hls_output, output_path, job_dir
+            )
+        return await loop.run_in_executor(self._io_executor, self._validate_batch_output, output_path)
     
     async def _execute_with_retry(
         self,
@@ -996,13 +1144,17 @@ class TranscodeEngine:
         media_info: MediaInfo,
         current_config: OutputConfig,
         progress_callback: Optional[Callable[[TranscodeProgress], None]],
-        cancel_event: Optional[asyncio.Event]
+        cancel_event: Optional[asyncio.Event],
+        start_time: float = 0,
+        subtitles: Optional[List] = None
     ) -> Tuple[bool, str, Optional[str]]:
         """
         Execute FFmpeg with retry logic and per-job hardware fallback.
         
         Hardware fallback state is tracked per-job via JobContext,
         NOT globally. Uses proper FFmpeg error map for classification.
+        The fallback rebuild uses the job's own inputs (source, start_time,
+        subtitles) rather than recovering them from the failed command.
         
         Returns:
             Tuple of (success, output_path_or_error, hw_accel_used)
@@ -1016,7 +1168,7 @@ class TranscodeEngine:
             if cancel_event and cancel_event.is_set():
                 return False, "Cancelled", None
             
-            logger.info(f"{log_prefix} Attempt {attempt + 1}/{retry_count + 1} with encoder: {encoder_used}")
+            logger.info("%s Attempt %d/%d with encoder: %s", log_prefix, attempt + 1, retry_count + 1, encoder_used)
             
             return_code, error_output = await self._run_ffmpeg(
                 cmd, media_info, progress_callback, cancel_event,
@@ -1028,11 +1180,11 @@ class TranscodeEngine:
             
             if return_code == 0:
                 # Validate output
-                is_valid, validation_error = self._validate_output(mode, output_path, job_dir)
+                is_valid, validation_error = await self._validate_output(mode, output_path, job_dir)
                 
                 if is_valid:
                     hw_accel_used = self.encoder_selector.detect_hw_accel_used(encoder_used)
-                    logger.info(f"{log_prefix} Complete. HW accel: {hw_accel_used}")
+                    logger.info("%s Complete. HW accel: %s", log_prefix, hw_accel_used)
                     
                     # Set progress to 100% on successful completion
                     if progress_callback:
@@ -1048,18 +1200,18 @@ class TranscodeEngine:
                     
                     return True, output_path, hw_accel_used
                 else:
-                    logger.warning(f"{log_prefix} FFmpeg returned success but validation failed: {validation_error}")
+                    logger.warning("%s FFmpeg returned success but validation failed: %s", log_prefix, validation_error)
                     error_output = f"Validation failed: {validation_error}. " + error_output
             
             error_msg = error_output[-1000:] if error_output else "Unknown error"
-            logger.warning(f"{log_prefix} FFmpeg failed (code {return_code}): {error_msg[:200]}")
+            logger.warning("%s FFmpeg failed (code %s): %.200s", log_prefix, return_code, error_msg)
             
             # Classify error using proper FFmpeg error map
             error_info, error_category = self._classify_error(error_msg)
             
             # Hardware fallback (per-job, not global)
             if not job_context.hw_fallback_attempted and error_category == "hardware":
-                logger.info(f"{log_prefix} Hardware error detected, falling back to software")
+                logger.info("%s Hardware error detected, falling back to software", log_prefix)
                 current_config.hw_accel = HWAccel.SOFTWARE
                 job_context.hw_fallback_attempted = True
                 
@@ -1069,24 +1221,24 @@ class TranscodeEngine:
                 # Clean partial output
                 await self._async_cleanup_dir(job_dir)
                 
-                # Rebuild command with software encoder using explicit source
+                # Rebuild command with software encoder from the job's inputs
                 cmd, encoder_used, output_path = self._build_transcode_command(
-                    mode, source, job_dir, current_config, 0, media_info
+                    mode, source, job_dir, current_config, start_time, media_info, subtitles
                 )
                 continue
             
-            # Transient error retry using proper error classification with exponential backoff
-            if self._is_transient_error(error_msg):
+            # Transient error retry with exponential backoff, reusing the
+            # classification above instead of scanning the error map again
+            if error_info is not None and error_info.retryable:
                 # Calculate delay with exponential backoff and jitter
-                import random
                 base_delay = min(RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY)
                 jitter = random.uniform(0, base_delay * 0.1)  # 10% jitter
                 delay = base_delay + jitter
-                desc = error_info.description if error_info else "Transient error"
+                desc = error_info.description
                 
                 # For transient errors, keep retrying indefinitely if configured
                 if TRANSIENT_INFINITE_RETRY or attempt < retry_count:
-                    logger.info(f"{log_prefix} {desc}, retrying in {delay:.1f}s (attempt {attempt + 1})...")
+                    logger.info("%s %s, retrying in %.1fs (attempt %d)...", log_prefix, desc, delay, attempt + 1)
                     await asyncio.sleep(delay)
                     # Don't increment attempt counter for infinite retry mode - reset loop
                     if TRANSIENT_INFINITE_RETRY:
@@ -1100,21 +1252,107 @@ class TranscodeEngine:
         
         return False, "Max retries exceeded", None
     
+    async def _try_pynvc_transcode(
+        self,
+        job_context: JobContext,
+        output_config: OutputConfig,
+        media_info: MediaInfo,
+        start_time: float,
+        progress_callback: Optional[Callable[[TranscodeProgress], None]],
+        cancel_event: Optional[asyncio.Event]
+    ) -> Optional[Tuple[bool, str, Optional[str]]]:
+        """
+        Run a batch job through the PyNvVideoCodec pipeline (hardware.use_pynvc).
+        
+        Returns None when the job isn't eligible or the pipeline fails, in
+        which case the caller runs the regular FFmpeg path.
+        """
+        source = job_context.source
+        if not self.pynvc_builder.can_build(source, output_config, media_info, start_time):
+            return None
+        
+        log_prefix = job_context.log_prefix
+        job_dir = job_context.job_dir
+        ext = self._resolve_output_extension(output_config.format)
+        bitrate = self.command_builder._get_bitrate(output_config.resolution, output_config.bitrate) or "8M"
+        pipeline = self.pynvc_builder.build(
+            source, job_dir / f"output{ext}", output_config, media_info,
+            bitrate, self.config.hardware.nvenc_preset
+        )
+        logger.info(f"{log_prefix} Using PyNvVideoCodec pipeline ({pipeline.encoder_codec}, {bitrate})")
+        
+        loop = asyncio.get_running_loop()
+        total_frames = max(int(media_info.duration * media_info.fps), 1)
+        report_every = max(int(media_info.fps), 1)  # About once per second of video
+        
+        def on_frame(frames: int) -> None:
+            if progress_callback and frames % report_every == 0:
+                progress = TranscodeProgress(
+                    frame=frames,
+                    time=frames / media_info.fps,
+                    percent=min(frames / total_frames * 100, 99.0)
+                )
+                loop.call_soon_threadsafe(progress_callback, progress)
+        
+        try:
+            if pipeline.audio_cmd:
+                return_code, error_output = await self._run_ffmpeg(
+                    pipeline.audio_cmd, media_info, None, cancel_event,
+                    stage="audio", job_context=job_context
+                )
+                if return_code != 0:
+                    raise RuntimeError(f"audio extract failed: {error_output[-200:]}")
+            
+            await loop.run_in_executor(
+                None, run_pynvc_video, pipeline, on_frame,
+                cancel_event.is_set if cancel_event else None
+            )
+            
+            return_code, error_output = await self._run_ffmpeg(
+                pipeline.mux_cmd, media_info, None, cancel_event,
+                stage="remuxing", job_context=job_context
+            )
+            if return_code != 0:
+                raise RuntimeError(f"mux failed: {error_output[-200:]}")
+            
+            is_valid, validation_error = await self._validate_output(
+                TranscodeMode.BATCH, str(pipeline.output_path), job_dir
+            )
+            if not is_valid:
+                raise RuntimeError(validation_error)
+        except Exception as e:
+            if cancel_event and cancel_event.is_set():
+                return False, "Cancelled", None
+            logger.warning(f"{log_prefix} PyNvVideoCodec pipeline failed, falling back to FFmpeg: {e}")
+            await self._async_cleanup_dir(job_dir)
+            return None
+        
+        for intermediate in (pipeline.video_path, pipeline.audio_path):
+            intermediate.unlink(missing_ok=True)
+        
+        if progress_callback:
+            progress_callback(TranscodeProgress(stage="complete", percent=100.0, time=media_info.duration))
+        logger.info(f"{log_prefix} Complete. HW accel: nvenc (PyNvVideoCodec)")
+        return True, str(pipeline.output_path), "nvenc"
+    
     async def _async_cleanup_dir(self, dir_path: Path) -> None:
-        """Asynchronously clean directory contents using thread executor."""
-        loop = asyncio.get_event_loop()
+        """Asynchronously clean directory contents on the dedicated cleanup pool."""
+        loop = asyncio.get_running_loop()
         
         def cleanup():
-            for f in dir_path.glob("*"):
+            remove_passlog_files(dir_path.name)
+            # Empty the directory in place; create it if it has gone missing
+            try:
+                _clear_dir(str(dir_path))
+            except FileNotFoundError:
                 try:
-                    if f.is_file():
-                        f.unlink()
-                    elif f.is_dir():
-                        shutil.rmtree(f, ignore_errors=True)
+                    dir_path.mkdir(parents=True, exist_ok=True)
                 except Exception as e:
-                    logger.debug(f"Failed to clean {f}: {e}")
+                    logger.debug(f"Failed to recreate {dir_path}: {e}")
+            except OSError as e:
+                logger.debug(f"Failed to clean {dir_path}: {e}")
         
-        await loop.run_in_executor(_executor, cleanup)
+        await loop.run_in_executor(_cleanup_executor, cleanup)
     
     async def transcode(
         self,
@@ -1160,7 +1398,28 @@ class TranscodeEngine:
                     job_dir=job_dir
                 )
                 
-                current_config = OutputConfig(**output_config.model_dump())
+                # Fields are all scalars/enums, so a shallow copy isolates the
+                # per-job hw_accel fallback from the caller's config
+                current_config = output_config.model_copy()
+                
+                # Optional in-process NVDEC -> NVENC pipeline for batch jobs
+                if mode != TranscodeMode.STREAM and self.config.hardware.use_pynvc:
+                    pynvc_result = await self._try_pynvc_transcode(
+                        job_context, current_config, media_info, start_time,
+                        progress_callback, cancel_event
+                    )
+                    if pynvc_result is not None:
+                        success = pynvc_result[0]
+                        if success:
+                            status = "completed"
+                        elif cancel_event and cancel_event.is_set():
+                            status = "cancelled"
+                        else:
+                            status = "failed"
+                        await self._job_registry.update_status(
+                            job_id, status, progress=100.0 if success else 0.0
+                        )
+                        return pynvc_result
                 
                 # Build command
                 cmd, encoder_used, output_path = self._build_transcode_command(
@@ -1172,7 +1431,8 @@ class TranscodeEngine:
                 # Execute with retry
                 success, result, hw_accel = await self._execute_with_retry(
                     cmd, encoder_used, output_path, mode, job_context, media_info,
-                    current_config, progress_callback, cancel_event
+                    current_config, progress_callback, cancel_event,
+                    start_time=start_time, subtitles=subtitles
                 )
                 
                 # Update registry with final status
@@ -1200,6 +1460,91 @@ class TranscodeEngine:
                 # Always remove from registry after completion
                 await self._job_registry.remove(job_id)
     
+    async def _run_abr_variants(
+        self,
+        source: str,
+        job_dir: Path,
+        output_config: OutputConfig,
+        media_info: MediaInfo,
+        start_time: float,
+        variants: List[QualityPreset],
+        resolved: ResolvedJob,
+        progress_callback: Optional[Callable[[TranscodeProgress], None]],
+        cancel_event: Optional[asyncio.Event],
+        job_context: JobContext
+    ) -> Tuple[int, str]:
+        """
+        Encode each ABR rendition in its own FFmpeg process.
+        
+        A single process runs every rendition off one frame pipeline, which
+        leaves cores idle with software encoders. Concurrency is bounded by the
+        CPU count and each process gets an even share of threads. The master
+        playlist is written first, since the stream URL is handed out before
+        the transcode finishes. The first failure stops the other renditions.
+        
+        Returns:
+            Tuple of (return_code, error_output) of the first failure, or
+            (0, "") once every rendition succeeded.
+        """
+        cpu_count = os.cpu_count() or 1
+        parallel = min(len(variants), cpu_count)
+        threads = max(1, cpu_count // parallel)
+        gate = asyncio.Semaphore(parallel)
+        
+        # CODECS must match what the renditions carry: copied audio keeps the
+        # source codec and layout, encoded audio is downmixed to stereo
+        if not media_info.audio_codec:
+            audio_codec, audio_channels = None, 2
+        elif resolved.audio_encoder == "copy":
+            audio_codec, audio_channels = media_info.audio_codec, media_info.audio_channels
+        else:
+            audio_codec, audio_channels = resolved.audio_encoder, 2
+        self.generate_master_playlist(
+            job_dir, variants, resolved.video_encoder, audio_codec, audio_channels
+        )
+        
+        # Per-batch stop signal, also set when the caller cancels
+        abort = asyncio.Event()
+        failures: List[Tuple[int, str]] = []
+        
+        async def relay_cancel() -> None:
+            await cancel_event.wait()
+            abort.set()
+        
+        async def run_variant(index: int, variant: QualityPreset) -> None:
+            cmd = self.build_variant_hls_command(
+                source, job_dir, index, variant, output_config, media_info,
+                start_time, threads, resolved
+            )
+            async with gate:
+                if abort.is_set():
+                    return
+                # The top rendition is the slowest, so it drives progress
+                result = await self._run_ffmpeg(
+                    cmd, media_info, progress_callback if index == 0 else None,
+                    abort, job_context=job_context
+                )
+            if result[0] != 0 and not abort.is_set():
+                failures.append(result)
+                abort.set()
+        
+        relay = asyncio.create_task(relay_cancel()) if cancel_event else None
+        try:
+            await asyncio.gather(*(run_variant(i, v) for i, v in enumerate(variants)))
+        except Exception:
+            # Don't leave the surviving renditions encoding unattended
+            abort.set()
+            raise
+        finally:
+            if relay:
+                relay.cancel()
+        
+        if failures:
+            return failures[0]
+        if abort.is_set():
+            return -1, "[CANCELLED]"
+        return 0, ""
+    
     async def transcode_abr(
         self,
         job_id: str,
@@ -1245,14 +1590,25 @@ class TranscodeEngine:
                     job_dir=job_dir
                 )
                 
-                current_config = OutputConfig(**output_config.model_dump())
+                # Fields are all scalars/enums, so a shallow copy isolates the
+                # per-job hw_accel fallback from the caller's config
+                current_config = output_config.model_copy()
+                resolved = self.resolve_job(current_config, media_info)
                 
                 # Get hardware-optimized variants
                 variants = self.get_optimal_presets(media_info)
                 
-                cmd, encoder_used, variants = self.build_abr_command(
-                    source, job_dir, current_config, media_info, start_time, variants, subtitles
-                )
+                # Software renditions scale better as separate processes; hardware
+                # encoders keep the shared decode, and subtitle groups need
+                # FFmpeg's own master playlist
+                run_parallel = resolved.video.is_software and len(variants) > 1 and not subtitles
+                if run_parallel:
+                    encoder_used = resolved.video_encoder
+                else:
+                    cmd, encoder_used, variants = self.build_abr_command(
+                        source, job_dir, current_config, media_info, start_time, variants,
+                        subtitles, resolved
+                    )
                 
                 # Validate bitrate spacing
                 spacing_ok, spacing_warnings = self._validate_hls_bitrate_spacing(variants)
@@ -1263,10 +1619,16 @@ class TranscodeEngine:
                 await self._job_registry.update_status(job_id, "running", encoder=encoder_used)
                 logger.info(f"{log_prefix} Starting ABR transcode with {len(variants)} variants")
                 
-                return_code, error_output = await self._run_ffmpeg(
-                    cmd, media_info, progress_callback, cancel_event,
-                    job_context=job_context
-                )
+                if run_parallel:
+                    return_code, error_output = await self._run_abr_variants(
+                        source, job_dir, current_config, media_info, start_time,
+                        variants, resolved, progress_callback, cancel_event, job_context
+                    )
+                else:
+                    return_code, error_output = await self._run_ffmpeg(
+                        cmd, media_info, progress_callback, cancel_event,
+                        job_context=job_context
+                    )
                 
                 if cancel_event and cancel_event.is_set():
                     await self._job_registry.update_status(job_id, "cancelled")
@@ -1326,17 +1688,18 @@ class TranscodeEngine:
     
     def cleanup_job(self, job_id: str) -> None:
         """Clean up job files (sync version for compatibility)."""
+        remove_passlog_files(job_id)
         job_dir = self.temp_dir / job_id
         if job_dir.exists():
             try:
-                shutil.rmtree(job_dir, ignore_errors=True)
+                _remove_tree(str(job_dir))
                 logger.info(f"Cleaned up job directory: {job_dir}")
             except Exception as e:
                 logger.warning(f"Failed to cleanup job {job_id}: {e}")
     
     async def cleanup_job_async(self, job_id: str) -> None:
         """
-        Asynchronously clean up job files using thread executor.
+        Asynchronously clean up job files on the dedicated cleanup pool.
         
         Prevents blocking the event loop during large directory deletions.
         Also removes job from registry if present.
@@ -1344,20 +1707,21 @@ class TranscodeEngine:
         # Remove from registry
         await self._job_registry.remove(job_id)
         
+        loop = asyncio.get_running_loop()
         job_dir = self.temp_dir / job_id
-        if not job_dir.exists():
-            return
-        
-        loop = asyncio.get_event_loop()
         
         def do_cleanup():
+            # Two-pass stats live outside the job directory by default
+            remove_passlog_files(job_id)
+            if not job_dir.exists():
+                return
             try:
-                shutil.rmtree(job_dir, ignore_errors=True)
+                _remove_tree(str(job_dir))
                 logger.info(f"Cleaned up job directory: {job_dir}")
             except Exception as e:
                 logger.warning(f"Failed to cleanup job {job_id}: {e}")
         
-        await loop.run_in_executor(_executor, do_cleanup)
+        await loop.run_in_executor(_cleanup_executor, do_cleanup)
     
     async def get_active_jobs(self) -> List[JobRegistryEntry]:
         """Get list of active (queued/running) jobs from the registry."""
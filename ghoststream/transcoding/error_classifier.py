@@ -7,14 +7,33 @@ Provides structured error categorization to determine whether to:
 - Fail immediately (fatal errors)
 """
 
+import functools
 import logging
 from dataclasses import dataclass
 from typing import List, Tuple, Optional
 
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    ahocorasick = None
+    HAS_AHOCORASICK = False
+
 logger = logging.getLogger(__name__)
 
+# FFmpeg repeats the same failure text across retries and helper checks
+CLASSIFY_CACHE_SIZE = 512
+
+# Oversized messages (whole stderr dumps) are classified on their tail only,
+# where FFmpeg prints the fatal error
+CLASSIFY_MAX_LENGTH = 4096
+CLASSIFY_TAIL_LENGTH = 1024
+
+# Shared result for messages that match nothing in the map
+_UNCLASSIFIED: Tuple[Optional["FFmpegError"], str] = (None, "unknown")
+
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class FFmpegError:
     """Represents a classified FFmpeg error."""
     pattern: str
@@ -117,6 +136,26 @@ class ErrorClassifier:
     
     def __init__(self, error_map: Optional[List[FFmpegError]] = None):
         self.error_map = error_map or FFMPEG_ERROR_MAP
+        # Needles are lowercased once here, since messages are lowercased per scan
+        self._patterns = tuple((error.pattern.lower(), error) for error in self.error_map)
+        self._automaton = self._build_automaton(self._patterns)
+        self._classify_cached = functools.lru_cache(maxsize=CLASSIFY_CACHE_SIZE)(self._scan)
+    
+    @staticmethod
+    def _build_automaton(patterns: Tuple[Tuple[str, FFmpegError], ...]):
+        """Build an Aho-Corasick automaton over the patterns, if available.
+        
+        Each pattern maps to its lowest index in the map, so a scan can
+        honour list-order priority instead of position in the message.
+        """
+        if not HAS_AHOCORASICK:
+            return None
+        automaton = ahocorasick.Automaton()
+        for index, (pattern, _) in enumerate(patterns):
+            if automaton.get(pattern, None) is None:
+                automaton.add_word(pattern, index)
+        automaton.make_automaton()
+        return automaton
     
     def classify(self, error_msg: str) -> Tuple[Optional[FFmpegError], str]:
         """
@@ -128,13 +167,28 @@ class ErrorClassifier:
         Returns:
             Tuple of (matched_error, category). Category is 'unknown' if no match.
         """
+        if len(error_msg) > CLASSIFY_MAX_LENGTH:
+            error_msg = error_msg[-CLASSIFY_TAIL_LENGTH:]
+        return self._classify_cached(error_msg)
+    
+    def _scan(self, error_msg: str) -> Tuple[Optional[FFmpegError], str]:
+        """Match error_msg against the map; memoized per instance by classify."""
         error_lower = error_msg.lower()
         
-        for error in self.error_map:
-            if error.pattern in error_lower:
+        if self._automaton is not None:
+            best = min((index for _, index in self._automaton.iter(error_lower)), default=None)
+            if best is None:
+                return _UNCLASSIFIED
+            error = self._patterns[best][1]
+            return error, error.category
+        
+        # C-level substring checks; a regex alternation, a first-character
+        # dispatch and generated if-chains measured no better on stderr tails
+        for pattern, error in self._patterns:
+            if pattern in error_lower:
                 return error, error.category
         
-        return None, "unknown"
+        return _UNCLASSIFIED
     
     def is_hardware_error(self, error_msg: str) -> bool:
         """Check if error is hardware-related."""
@@ -187,14 +241,10 @@ class ErrorClassifier:
         if category == "hardware":
             return False
         
-        # Transient errors retry if within limit
+        # Transient and retryable resource errors retry if within limit
         if error and error.retryable:
             return attempt < max_retries
         
-        # Resource errors may retry with a delay
-        if category == "resource" and error and error.retryable:
-            return attempt < max_retries
-        
         # Unknown errors get limited retries
         if category == "unknown":
             return attempt < min(max_retries, 1)  # At most 1 retry for unknown
@@ -206,13 +256,7 @@ class ErrorClassifier:
         return self.is_hardware_error(error_msg)
 
 
-# Global classifier instance
-_classifier: Optional[ErrorClassifier] = None
-
-
+@functools.cache
 def get_error_classifier() -> ErrorClassifier:
     """Get or create the global error classifier."""
-    global _classifier
-    if _classifier is None:
-        _classifier = ErrorClassifier()
-    return _classifier
+    return ErrorClassifier()
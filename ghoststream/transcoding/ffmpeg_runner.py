@@ -6,6 +6,7 @@ and detecting stalls with graceful termination.
 """
 
 import asyncio
+import atexit
 import os
 import re
 import signal
@@ -13,16 +14,55 @@ import subprocess
 import sys
 import time
 import logging
+import weakref
+from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Callable, List, Dict, Any, Tuple
+from typing import Optional, Callable, List, Dict, Any, Tuple, Union
 
 from .models import MediaInfo, TranscodeProgress
 from .job_context import JobContext
-from .constants import STDERR_BUFFER_SIZE, STDERR_EARLY_BUFFER_SIZE
+from .constants import (
+    STDERR_BUFFER_SIZE, STDERR_EARLY_BUFFER_SIZE, STDERR_LINE_LIMIT, READER_DRAIN_TIMEOUT
+)
 
 logger = logging.getLogger(__name__)
 
+# Every FFmpeg we started, so kill_process_groups can reap them at exit.
+# Weak, so finished jobs drop out without explicit bookkeeping.
+_spawned_processes: "weakref.WeakSet[asyncio.subprocess.Process]" = weakref.WeakSet()
+
+
+def track_process_group(process: asyncio.subprocess.Process) -> asyncio.subprocess.Process:
+    """Register a freshly spawned FFmpeg for kill_process_groups; returns it."""
+    _spawned_processes.add(process)
+    return process
+
+
+def kill_process_groups() -> None:
+    """
+    Kill every tracked FFmpeg that is still running. Registered with atexit.
+    
+    FFmpeg runs in its own session (its own process group on Windows), so a
+    Ctrl-C at the terminal or a signal sent to the service's process group
+    doesn't reach it. The in-process cancel path stops jobs it knows about;
+    this catches whatever is left when the interpreter exits. Nothing runs
+    if the service itself is SIGKILLed.
+    """
+    for process in list(_spawned_processes):
+        if process.returncode is not None:
+            continue
+        try:
+            if sys.platform == "win32":
+                os.kill(process.pid, signal.SIGTERM)  # TerminateProcess
+            else:
+                os.killpg(process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+
+
+atexit.register(kill_process_groups)
+
 
 @dataclass
 class StallConfig:
@@ -35,31 +75,182 @@ class StallConfig:
     hdr_grace_bonus: float = 15.0
 
 
+# All progress fields in one alternation, so a stderr line is scanned once.
+# Each alternative is wrapped in a named group; match.lastgroup names the field.
+_PROGRESS_RE = re.compile(
+    r"(?P<frame>frame=\s*(?P<frame_v>\d+))"
+    r"|(?P<fps>fps=\s*(?P<fps_v>\d+(?:\.\d*)?|N/A))"
+    r"|(?P<bitrate>bitrate=\s*(?P<bitrate_v>\d+(?:\.\d*)?\s*[kMG]?bits/s|N/A))"
+    r"|(?P<size>size=\s*(?P<size_v>\d+)\s*(?P<size_unit>kB|MB|B)?)"
+    r"|(?P<time>time=\s*(?:(?P<hours>\d+):)?(?P<minutes>\d+):(?P<seconds>\d+(?:\.\d*)?))"
+    r"|(?P<speed>speed=\s*(?P<speed_v>\d+(?:\.\d*)?)x)"
+)
+
+# FFmpeg reports size in kB unless it says otherwise
+_SIZE_MULTIPLIERS = {"MB": 1024 * 1024, "kB": 1024, "B": 1, None: 1024}
+
+
+def parse_progress_line(line: str, progress: TranscodeProgress, media_info: MediaInfo) -> bool:
+    """
+    Update progress from one FFmpeg stderr line.
+    
+    Numeric groups only match well-formed numbers, so no conversion can fail.
+    Returns True if the line carried frame, size or time.
+    """
+    found_progress = False
+    
+    for match in _PROGRESS_RE.finditer(line):
+        field = match.lastgroup
+        if field == "frame":
+            progress.frame = int(match["frame_v"])
+            found_progress = True
+        elif field == "fps":
+            value = match["fps_v"]
+            if value != "N/A":
+                progress.fps = float(value)
+        elif field == "bitrate":
+            value = match["bitrate_v"]
+            if value != "N/A":
+                progress.bitrate = value
+        elif field == "size":
+            progress.total_size = int(match["size_v"]) * _SIZE_MULTIPLIERS[match["size_unit"]]
+            found_progress = True
+        elif field == "time":
+            hours = match["hours"]
+            progress.time = (
+                (int(hours) * 3600 if hours else 0)
+                + int(match["minutes"]) * 60
+                + float(match["seconds"])
+            )
+            found_progress = True
+        elif field == "speed":
+            progress.speed = float(match["speed_v"])
+    
+    # Calculate percentage
+    if media_info.duration > 0 and progress.time > 0:
+        progress.percent = min(99.9, (progress.time / media_info.duration) * 100)
+    
+    return found_progress
+
+
+def _set_frame(progress: TranscodeProgress, value: str) -> None:
+    progress.frame = int(value)
+
+
+def _set_fps(progress: TranscodeProgress, value: str) -> None:
+    progress.fps = float(value)
+
+
+def _set_bitrate(progress: TranscodeProgress, value: str) -> None:
+    progress.bitrate = value.strip()
+
+
+def _set_total_size(progress: TranscodeProgress, value: str) -> None:
+    progress.total_size = int(value)
+
+
+def _set_out_time(progress: TranscodeProgress, value: str) -> None:
+    # out_time_ms is also in microseconds (a long-standing FFmpeg quirk).
+    # Before the first frame older FFmpeg builds report INT64_MIN here.
+    micros = int(value)
+    if micros >= 0:
+        progress.time = micros / 1_000_000
+
+
+def _set_speed(progress: TranscodeProgress, value: str) -> None:
+    progress.speed = float(value.rstrip("x"))
+
+
+# -progress keys we track; the rest of each block (stream_*_q, out_time,
+# dup_frames, drop_frames, ...) misses this table in a single lookup
+_PROGRESS_SETTERS: Dict[str, Callable[[TranscodeProgress, str], None]] = {
+    "frame": _set_frame,
+    "fps": _set_fps,
+    "bitrate": _set_bitrate,
+    "total_size": _set_total_size,
+    "out_time_us": _set_out_time,
+    "out_time_ms": _set_out_time,
+    "speed": _set_speed,
+}
+
+
+def parse_progress_field(key: str, value: str, progress: TranscodeProgress,
+                         media_info: MediaInfo) -> bool:
+    """
+    Update progress from one ``key=value`` line of FFmpeg's ``-progress`` output.
+    
+    FFmpeg writes a block of fields terminated by ``progress=continue`` (or
+    ``progress=end``); returns True on that terminator so callers can publish
+    one update per block. Unknown keys and ``N/A`` values are ignored.
+    """
+    setter = _PROGRESS_SETTERS.get(key)
+    if setter is None:
+        if key == "progress":
+            if media_info.duration > 0 and progress.time > 0:
+                progress.percent = min(99.9, (progress.time / media_info.duration) * 100)
+            return True
+        return False
+    
+    if value != "N/A":
+        try:
+            setter(progress, value)
+        except ValueError:
+            pass
+    return False
+
+
+def signal_process_group(process: asyncio.subprocess.Process, sig: int) -> None:
+    """
+    Send sig (SIGTERM or SIGKILL) to FFmpeg and anything it spawned.
+    
+    On POSIX FFmpeg is started as the leader of its own session, so its pid is
+    also the group id and helpers holding pipes or GPU contexts go with it.
+    On Windows only the process itself is terminated (TerminateProcess,
+    whichever signal was asked for).
+    """
+    if sys.platform == "win32":
+        process.kill()
+        return
+    os.killpg(process.pid, sig)
+
+
+def directory_size(root: str) -> int:
+    """
+    Total size of the files under root.
+    
+    One scandir walk with a single stat per file; directory entries carry
+    their type, so telling files from subdirectories costs no extra syscall.
+    """
+    total = 0
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                total += directory_size(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                total += entry.stat(follow_symlinks=False).st_size
+    return total
+
+
 class ProgressParser:
     """
     Centralized FFmpeg progress parsing with throttling.
     
     Moves regex parsing out of the hot stderr loop and provides
-    throttled updates to avoid overwhelming callbacks.
+    throttled updates to avoid overwhelming callbacks. Stats lines that
+    arrive while throttled aren't parsed; each carries every field, so only
+    the latest is kept in case it has to be flushed at exit.
     """
     
-    # Pre-compiled regex patterns for efficiency
-    _RE_FRAME = re.compile(r"frame=\s*(\d+)")
-    _RE_FPS = re.compile(r"fps=\s*([\d.]+|N/A)")
-    _RE_BITRATE = re.compile(r"bitrate=\s*([\d.]+\s*[kMG]?bits/s|N/A)")
-    _RE_SIZE = re.compile(r"size=\s*(\d+)\s*(kB|MB|B)?")
-    _RE_TIME_FULL = re.compile(r"time=\s*(\d+):(\d+):(\d+\.?\d*)")
-    _RE_TIME_SHORT = re.compile(r"time=\s*(\d+):(\d+\.?\d*)")
-    _RE_SPEED = re.compile(r"speed=\s*([\d.]+)x")
-    _RE_QUALITY = re.compile(r"q=\s*([\d.-]+)")
-    
     def __init__(self, throttle_interval: float = 0.5):
         self.throttle_interval = throttle_interval
-        self._last_callback_time = 0.0
-        self._pending_line: Optional[str] = None
+        self._last_callback_time = float("-inf")
+        self._pending_update = False
+        self._deferred_line: Optional[bytes] = None
     
-    def should_parse(self, line: str) -> bool:
-        """Check if line contains progress info worth parsing."""
+    def should_parse(self, line: Union[str, bytes]) -> bool:
+        """Check if line (raw or decoded) contains progress info worth parsing."""
+        if isinstance(line, bytes):
+            return b"frame=" in line or b"size=" in line or b"time=" in line
         return "frame=" in line or "size=" in line or "time=" in line
     
     def parse(self, line: str, progress: TranscodeProgress, 
@@ -69,87 +260,35 @@ class ProgressParser:
         
         Returns True if parsing found progress data.
         """
-        found_progress = False
-        
-        # Frame count
-        match = self._RE_FRAME.search(line)
-        if match:
-            try:
-                progress.frame = int(match.group(1))
-                found_progress = True
-            except (ValueError, TypeError):
-                pass
-        
-        # FPS
-        match = self._RE_FPS.search(line)
-        if match and match.group(1) != "N/A":
-            try:
-                progress.fps = float(match.group(1))
-            except (ValueError, TypeError):
-                pass
-        
-        # Bitrate
-        match = self._RE_BITRATE.search(line)
-        if match and match.group(1) != "N/A":
-            progress.bitrate = match.group(1).strip()
-        
-        # Size
-        match = self._RE_SIZE.search(line)
-        if match:
-            try:
-                size_val = int(match.group(1))
-                unit = match.group(2) or "kB"
-                if unit == "MB":
-                    progress.total_size = size_val * 1024 * 1024
-                elif unit == "kB":
-                    progress.total_size = size_val * 1024
-                else:
-                    progress.total_size = size_val
-                found_progress = True
-            except (ValueError, TypeError):
-                pass
-        
-        # Time - full format HH:MM:SS.ms
-        match = self._RE_TIME_FULL.search(line)
-        if match:
-            try:
-                h, m, s = match.groups()
-                progress.time = int(h) * 3600 + int(m) * 60 + float(s)
-                found_progress = True
-            except (ValueError, TypeError):
-                pass
-        else:
-            # Try short format MM:SS.ms
-            match = self._RE_TIME_SHORT.search(line)
-            if match:
-                try:
-                    m, s = match.groups()
-                    progress.time = int(m) * 60 + float(s)
-                    found_progress = True
-                except (ValueError, TypeError):
-                    pass
-        
-        # Speed
-        match = self._RE_SPEED.search(line)
-        if match:
-            try:
-                progress.speed = float(match.group(1))
-            except (ValueError, TypeError):
-                pass
-        
-        # Calculate percentage
-        if media_info.duration > 0 and progress.time > 0:
-            progress.percent = min(99.9, (progress.time / media_info.duration) * 100)
-        
-        return found_progress
+        return parse_progress_line(line, progress, media_info)
     
     def should_callback(self) -> bool:
         """Check if enough time has passed to fire callback (throttling)."""
-        now = time.time()
+        now = time.monotonic()
         if now - self._last_callback_time >= self.throttle_interval:
             self._last_callback_time = now
+            self._pending_update = False
+            self._deferred_line = None
             return True
+        self._pending_update = True
         return False
+    
+    def defer(self, line: bytes) -> None:
+        """Hold a throttled stats line unparsed until a flush needs it."""
+        self._deferred_line = line
+    
+    def take_pending(self, progress: TranscodeProgress, media_info: MediaInfo) -> bool:
+        """
+        Return True (once) if the latest update was throttled away.
+        
+        A deferred stats line is parsed into progress first, so the
+        caller can publish it as is.
+        """
+        line, self._deferred_line = self._deferred_line, None
+        if line is not None:
+            parse_progress_line(line.decode("utf-8", errors="ignore"), progress, media_info)
+        pending, self._pending_update = self._pending_update, False
+        return pending
 
 
 class FFmpegRunner:
@@ -192,8 +331,9 @@ class FFmpegRunner:
         
         timeout = base_timeout + (segment_factor * resolution_factor)
         
-        logger.debug(f"[FFmpegRunner] Stall timeout: {timeout:.0f}s "
-                    f"(base={base_timeout}, segment={segment_duration}s, res_factor={resolution_factor})")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[FFmpegRunner] Stall timeout: {timeout:.0f}s "
+                        f"(base={base_timeout}, segment={segment_duration}s, res_factor={resolution_factor})")
         
         return timeout
     
@@ -236,7 +376,8 @@ class FFmpegRunner:
             failed to start or was killed unexpectedly.
         """
         log_prefix = job_context.log_prefix if job_context else "[FFmpeg]"
-        logger.info(f"{log_prefix} Running: {' '.join(cmd[:10])}...")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("%s Running: %s...", log_prefix, " ".join(cmd[:10]))
         
         # Calculate timeouts
         stall_timeout = self.calculate_stall_timeout(media_info, segment_duration)
@@ -251,25 +392,29 @@ class FFmpegRunner:
         progress = TranscodeProgress(stage=stage)
         progress_parser = ProgressParser(throttle_interval=0.5)
         state = {
-            "stderr_lines": [],
+            "stderr_lines": deque(maxlen=STDERR_BUFFER_SIZE),
             "stderr_early": [],
             "stdout_bytes": 0,
-            "last_progress_time": time.time(),
+            "last_progress_time": time.monotonic(),
             "last_file_size": 0,
             "stalled": False,
             "cancelled": False,
-            "start_time": time.time(),
+            "start_time": time.monotonic(),
         }
         job_dir = job_context.job_dir if job_context else None
         
-        # Create reader tasks
-        stdout_task = asyncio.create_task(
-            self._read_stdout(process, state, log_prefix)
-        )
-        stderr_task = asyncio.create_task(
-            self._read_stderr(process, state, progress, progress_parser,
-                            media_info, progress_callback, log_prefix)
-        )
+        # Create reader tasks (stdout is only piped when it carries progress)
+        tasks = [
+            asyncio.create_task(
+                self._read_stderr(process, state, progress, progress_parser,
+                                media_info, progress_callback, log_prefix)
+            )
+        ]
+        if process.stdout is not None:
+            tasks.append(asyncio.create_task(
+                self._read_stdout(process, state, progress, progress_parser,
+                                media_info, progress_callback, log_prefix)
+            ))
         monitor_task = asyncio.create_task(
             self._monitor_stall_and_cancel(
                 process, state, stall_timeout, grace_period,
@@ -278,22 +423,43 @@ class FFmpegRunner:
         )
         
         try:
-            await asyncio.gather(stdout_task, stderr_task, monitor_task, return_exceptions=True)
-        except Exception as e:
-            logger.warning(f"{log_prefix} Error during FFmpeg execution: {e}")
+            try:
+                await monitor_task
+            except Exception as e:
+                logger.warning(f"{log_prefix} Error during FFmpeg execution: {e}")
+            
+            if state["stalled"] or state["cancelled"]:
+                # The process was torn down; don't hang on pipes a stuck child
+                # may still hold open
+                _, pending = await asyncio.wait(tasks, timeout=READER_DRAIN_TIMEOUT)
+                for task in pending:
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            # Only reached with live tasks if we were cancelled ourselves
+            for task in (*tasks, monitor_task):
+                task.cancel()
         
-        # Ensure process has terminated
-        try:
-            await asyncio.wait_for(process.wait(), timeout=10.0)
-        except asyncio.TimeoutError:
-            logger.error(f"{log_prefix} FFmpeg did not exit, force killing")
-            await self._graceful_terminate(process)
+        # Deliver the last update if throttling held it back
+        if progress_callback and progress_parser.take_pending(progress, media_info):
+            try:
+                progress_callback(progress)
+            except Exception as e:
+                logger.warning(f"{log_prefix} Progress callback error: {e}")
+        
+        # Ensure process has terminated (usually already reaped by now)
+        if process.returncode is None:
+            try:
+                await asyncio.wait_for(process.wait(), timeout=10.0)
+            except asyncio.TimeoutError:
+                logger.error(f"{log_prefix} FFmpeg did not exit, force killing")
+                await self._graceful_terminate(process)
         
         # Determine return code
         return_code = process.returncode if process.returncode is not None else -1
         
         # Build error output with context
-        error_output = "".join(state["stderr_lines"])
+        error_output = b"".join(state["stderr_lines"]).decode("utf-8", errors="ignore")
         if state["stalled"]:
             error_output = f"[STALLED after {stall_timeout:.0f}s] " + error_output
         if state["cancelled"]:
@@ -308,14 +474,20 @@ class FFmpegRunner:
     ) -> Optional[asyncio.subprocess.Process]:
         """Spawn FFmpeg subprocess with platform-specific options."""
         try:
+            # Outputs always go to files; stdout only carries -progress output
             kwargs: Dict[str, Any] = {
-                "stdout": asyncio.subprocess.PIPE,
+                "stdout": asyncio.subprocess.PIPE if "-progress" in cmd else asyncio.subprocess.DEVNULL,
                 "stderr": asyncio.subprocess.PIPE,
+                "limit": STDERR_LINE_LIMIT,
             }
             if sys.platform == "win32":
                 kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+            else:
+                # Own process group, so a kill reaches any helpers FFmpeg spawns
+                kwargs["start_new_session"] = True
             
-            return await asyncio.create_subprocess_exec(*cmd, **kwargs)
+            # Tracked so the children are reaped at exit (kill_process_groups)
+            return track_process_group(await asyncio.create_subprocess_exec(*cmd, **kwargs))
         except Exception as e:
             logger.error(f"{log_prefix} Failed to start FFmpeg: {e}")
             return None
@@ -324,18 +496,44 @@ class FFmpegRunner:
         self,
         process: asyncio.subprocess.Process,
         state: Dict[str, Any],
+        progress: TranscodeProgress,
+        parser: ProgressParser,
+        media_info: MediaInfo,
+        progress_callback: Optional[Callable[[TranscodeProgress], None]],
         log_prefix: str
     ) -> None:
-        """Read stdout in separate task to prevent pipe blocking."""
+        """Read stdout in separate task, parsing ``-progress pipe:1`` blocks."""
+        pending = b""
         try:
             while True:
                 chunk = await process.stdout.read(4096)
                 if not chunk:
                     break
-                state["stdout_bytes"] += len(chunk)
                 
-                if self.verbose:
-                    logger.debug(f"{log_prefix} stdout: {chunk.decode('utf-8', errors='ignore')[:200]}")
+                *lines, pending = (pending + chunk).split(b"\n")
+                for raw in lines:
+                    if progress_callback is None and b"=" in raw:
+                        # Nobody reads progress; block ends still feed the stall watchdog
+                        if raw.startswith(b"progress="):
+                            state["last_progress_time"] = time.monotonic()
+                        continue
+                    
+                    key, sep, value = raw.decode("utf-8", errors="ignore").strip().partition("=")
+                    if not sep:
+                        state["stdout_bytes"] += len(raw) + 1
+                        continue
+                    if not parse_progress_field(key, value, progress, media_info):
+                        continue
+                    
+                    state["last_progress_time"] = time.monotonic()
+                    if progress_callback and parser.should_callback():
+                        try:
+                            progress_callback(progress)
+                        except Exception as e:
+                            logger.warning(f"{log_prefix} Progress callback error: {e}")
+                
+                if self.verbose and logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"{log_prefix} stdout: {chunk[:200].decode('utf-8', errors='ignore')}")
         except Exception as e:
             logger.debug(f"{log_prefix} stdout reader error: {e}")
     
@@ -351,33 +549,31 @@ class FFmpegRunner:
     ) -> None:
         """Read stderr and parse progress with throttled callbacks."""
         try:
-            while True:
-                line = await process.stderr.readline()
-                if not line:
-                    break
-                
-                line_str = line.decode("utf-8", errors="ignore")
-                
+            async for line in process.stderr:
+                # Buffers keep raw bytes; only progress lines are decoded here,
+                # everything else once when the error output is built.
                 # Preserve early errors
                 if len(state["stderr_early"]) < STDERR_EARLY_BUFFER_SIZE:
-                    state["stderr_early"].append(line_str)
+                    state["stderr_early"].append(line)
                 
-                # Rolling buffer for recent lines
-                state["stderr_lines"].append(line_str)
-                if len(state["stderr_lines"]) > STDERR_BUFFER_SIZE:
-                    state["stderr_lines"].pop(0)
+                # Rolling buffer for recent lines (bounded deque drops the oldest)
+                state["stderr_lines"].append(line)
                 
                 # Parse progress
-                if parser.should_parse(line_str):
-                    state["last_progress_time"] = time.time()
-                    parser.parse(line_str, progress, media_info)
+                if parser.should_parse(line):
+                    state["last_progress_time"] = time.monotonic()
+                    if not progress_callback:
+                        continue  # Nobody reads progress; the stall stamp is enough
                     
-                    # Throttled callback
-                    if progress_callback and parser.should_callback():
+                    # Throttled: parse only lines that will be published
+                    if parser.should_callback():
+                        parser.parse(line.decode("utf-8", errors="ignore"), progress, media_info)
                         try:
                             progress_callback(progress)
                         except Exception as e:
                             logger.warning(f"{log_prefix} Progress callback error: {e}")
+                    else:
+                        parser.defer(line)
         except Exception as e:
             logger.debug(f"{log_prefix} stderr reader error: {e}")
     
@@ -420,8 +616,9 @@ class FFmpegRunner:
                 await self._graceful_terminate(process)
                 return
             
-            elapsed = time.time() - state["start_time"]
-            time_since_progress = time.time() - state["last_progress_time"]
+            now = time.monotonic()
+            elapsed = now - state["start_time"]
+            time_since_progress = now - state["last_progress_time"]
             
             # Skip stall detection during grace period
             if elapsed < grace_period:
@@ -436,15 +633,15 @@ class FFmpegRunner:
                         job_dir, state["last_file_size"]
                     )
                     if has_grown:
-                        state["last_progress_time"] = time.time()
+                        state["last_progress_time"] = time.monotonic()
                         state["last_file_size"] = new_size
-                        logger.debug(f"{log_prefix} File growth detected, resetting stall timer")
+                        logger.debug("%s File growth detected, resetting stall timer", log_prefix)
                         await asyncio.sleep(1.0)
                         continue
                 
                 # Check stdout bytes
                 if state["stdout_bytes"] > 0:
-                    state["last_progress_time"] = time.time()
+                    state["last_progress_time"] = time.monotonic()
                     state["stdout_bytes"] = 0
                     await asyncio.sleep(1.0)
                     continue
@@ -459,10 +656,7 @@ class FFmpegRunner:
     def _check_file_growth(self, job_dir: Path, last_size: int) -> Tuple[int, bool]:
         """Check if output files are growing."""
         try:
-            total_size = 0
-            for f in job_dir.glob("**/*"):
-                if f.is_file():
-                    total_size += f.stat().st_size
+            total_size = directory_size(str(job_dir))
             return total_size, total_size > last_size
         except Exception:
             return last_size, False
@@ -492,9 +686,9 @@ class FFmpegRunner:
             except asyncio.TimeoutError:
                 pass
             
-            # Escalate to SIGTERM
+            # Escalate to SIGTERM (whole process group)
             try:
-                process.terminate()
+                signal_process_group(process, signal.SIGTERM)
                 await asyncio.wait_for(process.wait(), timeout=3.0)
                 logger.debug("[FFmpeg] Terminated with SIGTERM")
                 return
@@ -503,7 +697,7 @@ class FFmpegRunner:
             
             # Last resort: SIGKILL
             try:
-                process.kill()
+                signal_process_group(process, getattr(signal, "SIGKILL", signal.SIGTERM))
                 await process.wait()
                 logger.warning("[FFmpeg] Killed forcefully")
             except (ProcessLookupError, OSError):
@@ -17,6 +17,24 @@ from .constants import (
 
 logger = logging.getLogger(__name__)
 
+# Device-side scale filters for the hw frame types returned by
+# EncoderSelector.get_hw_decode_args. With -hwaccel_output_format set, decoded
+# frames stay on the GPU; scaling them there avoids a download/upload round
+# trip per frame for every ABR variant.
+HW_SCALE_FILTERS = {
+    "cuda": "scale_cuda={w}:{h}:format=nv12",
+    "qsv": "scale_qsv=w={w}:h={h}:format=nv12",
+    "vaapi": "scale_vaapi=w={w}:h={h}:format=nv12",
+}
+
+
+def _fit_even(src_w: int, src_h: int, box_w: int, box_h: int) -> tuple:
+    """Largest even WxH with the source aspect ratio that fits inside the box."""
+    if src_w <= 0 or src_h <= 0:
+        return box_w, box_h
+    ratio = min(box_w / src_w, box_h / src_h)
+    return max(2, int(src_w * ratio) // 2 * 2), max(2, int(src_h * ratio) // 2 * 2)
+
 
 class FilterBuilder:
     """Builds FFmpeg video and audio filter chains."""
@@ -125,14 +143,48 @@ class FilterBuilder:
         
         return vf_filters
     
+    def build_hw_video_filters(
+        self,
+        media_info: Optional[MediaInfo],
+        output_config: OutputConfig,
+        video_encoder: str,
+        hw_frames: str
+    ) -> List[str]:
+        """
+        Build the video filter chain for frames decoded onto the device.
+        
+        hw_frames is a frame type from HW_SCALE_FILTERS. CPU filters can't
+        take device frames, so scaling and the 8-bit conversion h264 needs
+        both run in the device scaler, which outputs nv12.
+        """
+        hw_scale = HW_SCALE_FILTERS[hw_frames]
+        
+        target = None
+        if media_info and output_config.resolution != Resolution.ORIGINAL:
+            target = get_resolution_map().get(output_config.resolution)
+        if target and (media_info.width > target[0] or media_info.height > target[1]):
+            w, h = _fit_even(media_info.width, media_info.height, *target)
+            return [hw_scale.format(w=w, h=h)]
+        
+        # Unscaled 8-bit frames already suit the encoder
+        if "h264" in video_encoder and (media_info is None or media_info.is_10bit):
+            return [hw_scale.format(w="iw", h="ih")]
+        return []
+    
     def build_abr_filter_complex(
         self,
         variants: list,
         media_info: MediaInfo,
         needs_tonemap: bool,
-        video_encoder: str = "libx264"
+        video_encoder: str = "libx264",
+        hw_frames: Optional[str] = None
     ) -> List[str]:
-        """Build filter_complex for ABR multi-output encoding."""
+        """
+        Build filter_complex for ABR multi-output encoding.
+        
+        hw_frames is the hw frame type from get_hw_decode_args ("cuda", "qsv",
+        "vaapi"). When set, frames are split and scaled on the device.
+        """
         if not variants:
             return []
         
@@ -142,6 +194,17 @@ class FilterBuilder:
         # Split input stream for multiple outputs
         split_outputs = "".join(f"[s{i}]" for i in range(num_variants))
         
+        hw_scale = HW_SCALE_FILTERS.get(hw_frames) if not needs_tonemap else None
+        if hw_scale:
+            # Decode once, split device frames, scale each branch on the GPU.
+            # Device scalers have no pad, so fit the source aspect ratio to
+            # even dimensions here instead of letterboxing.
+            filter_parts.append(f"[0:v]split={num_variants}{split_outputs}")
+            for i, variant in enumerate(variants):
+                w, h = _fit_even(media_info.width, media_info.height, variant.width, variant.height)
+                filter_parts.append(f"[s{i}]{hw_scale.format(w=w, h=h)}[v{i}]")
+            return filter_parts
+        
         # Determine pixel format based on encoder
         # Hardware encoders (nvenc, qsv, amf, vaapi) need nv12; software needs yuv420p
         if "lib" in video_encoder:
@@ -10,6 +10,7 @@ Implements industry best practices for adaptive bitrate streaming:
 """
 
 import logging
+import os
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List, Optional, Dict, Tuple
@@ -24,6 +25,23 @@ SEGMENT_DURATION_LIVE = 2  # Low latency for live
 SEGMENT_DURATION_VOD = 4   # Standard VOD (good balance)
 SEGMENT_DURATION_FILM = 6  # Long-form content (fewer requests)
 
+# O_BINARY keeps Windows from translating "\n" to "\r\n"; HLS wants bare LF
+_PLAYLIST_OPEN_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0)
+
+
+def write_playlist(path: Path, content: str) -> None:
+    """
+    Write a playlist with one os.write on a raw fd.
+    
+    Playlists are a few hundred bytes, so the buffered text-file layer of
+    Path.write_text costs more than the write itself.
+    """
+    fd = os.open(path, _PLAYLIST_OPEN_FLAGS, 0o644)
+    try:
+        os.write(fd, content.encode("utf-8"))
+    finally:
+        os.close(fd)
+
 
 @dataclass
 class HLSVariant:
@@ -181,6 +199,17 @@ class HLSCodecBuilder:
         
         return f"hvc1.{profile_num}.4.{tier}{level}"
     
+    # Non-AAC audio, by FFmpeg codec or encoder name
+    AUDIO_CODECS = {
+        "mp3": "mp4a.40.34",
+        "libmp3lame": "mp4a.40.34",
+        "ac3": "ac-3",
+        "eac3": "ec-3",
+        "opus": "Opus",
+        "libopus": "Opus",
+        "flac": "fLaC",
+    }
+    
     @classmethod
     def get_aac_codec(cls, channels: int = 2) -> str:
         """Generate AAC codec string."""
@@ -189,6 +218,33 @@ class HLSCodecBuilder:
         else:
             return "mp4a.40.5"  # HE-AAC for multichannel
     
+    @classmethod
+    def get_audio_codec(cls, audio_codec: str, channels: int = 2) -> Optional[str]:
+        """
+        Generate the codec string for an FFmpeg audio codec or encoder name.
+        
+        Returns None for codecs without a known HLS codec string, so callers
+        can leave them out of CODECS instead of advertising the wrong one.
+        """
+        audio_codec = audio_codec.lower()
+        if audio_codec == "aac":
+            return cls.get_aac_codec(channels)
+        return cls.AUDIO_CODECS.get(audio_codec)
+    
+    @classmethod
+    def get_video_codec(
+        cls,
+        video_codec: str,
+        width: int,
+        height: int,
+        fps: float = 30.0
+    ) -> str:
+        """Get codec string for a video codec or encoder name (libx265, hevc_nvenc, ...)."""
+        video_codec = video_codec.lower()
+        if "265" in video_codec or "hevc" in video_codec:
+            return cls.get_hevc_codec(width, height)
+        return cls.get_h264_codec(width, height, fps=fps)
+    
     @classmethod
     def get_full_codec_string(
         cls,
@@ -199,11 +255,7 @@ class HLSCodecBuilder:
         audio_channels: int = 2
     ) -> str:
         """Get full codec string for video + audio."""
-        if "h265" in video_codec.lower() or "hevc" in video_codec.lower():
-            video = cls.get_hevc_codec(width, height)
-        else:
-            video = cls.get_h264_codec(width, height, fps=fps)
-        
+        video = cls.get_video_codec(video_codec, width, height, fps)
         audio = cls.get_aac_codec(audio_channels)
         return f"{video},{audio}"
 
@@ -338,7 +390,7 @@ class HLSPlaylistGenerator:
         
         # Write to file
         master_path = output_dir / "master.m3u8"
-        master_path.write_text(content)
+        write_playlist(master_path, content)
         
         logger.info(f"[HLS] Generated master playlist with {len(variants)} variants")
         return str(master_path)
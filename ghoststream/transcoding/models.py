@@ -3,6 +3,7 @@ Data models for transcoding operations.
 """
 
 from dataclasses import dataclass
+from typing import Optional, Tuple
 
 
 @dataclass
@@ -49,3 +50,36 @@ class MediaInfo:
     is_hdr: bool = False
     is_10bit: bool = False
     has_bframes: bool = True
+
+
+@dataclass(frozen=True, slots=True)
+class EncoderChoice:
+    """A selected video encoder with its family known up front."""
+    name: str
+    args: Tuple[str, ...]
+    is_software: bool
+    family: str  # nvenc, qsv, vaapi, videotoolbox, amf, software or copy
+
+
+@dataclass(frozen=True)
+class ResolvedJob:
+    """Per-job encoder/filter decisions shared by the command builders."""
+    video: EncoderChoice
+    audio_encoder: str
+    audio_args: Tuple[str, ...]
+    bitrate: Optional[str]
+    needs_tonemap: bool
+    
+    @property
+    def video_encoder(self) -> str:
+        return self.video.name
+    
+    @property
+    def video_args(self) -> Tuple[str, ...]:
+        return self.video.args
+
+
+# Stand-in for fields read while building commands when the source wasn't
+# probed. Filters still receive the real (possibly None) media_info, since
+# they treat a missing probe differently from zero dimensions.
+DEFAULT_MEDIA_INFO = MediaInfo(fps=30.0, audio_channels=2)
@@ -14,6 +14,9 @@ from .constants import MAX_RETRIES, RETRY_DELAY
 
 logger = logging.getLogger(__name__)
 
+# ffprobe stderr fragments (lowercase) that mark a failure worth retrying
+_TRANSIENT_KEYWORDS = ("connection", "timeout", "refused", "reset", "temporary")
+
 
 class MediaProbe:
     """Probes media files to extract information."""
@@ -82,9 +85,9 @@ class MediaProbe:
             
             if process.returncode != 0:
                 stderr_text = stderr.decode().strip()
-                # Retry on transient errors
-                if retry_count < MAX_RETRIES and any(err in stderr_text.lower() for err in
-                    ["connection", "timeout", "refused", "reset", "temporary"]):
+                # Retry on transient errors (lowercased once, not per keyword)
+                stderr_lower = stderr_text.lower()
+                if retry_count < MAX_RETRIES and any(err in stderr_lower for err in _TRANSIENT_KEYWORDS):
                     logger.warning(f"[Probe] ffprobe failed (transient), retrying ({retry_count + 1}/{MAX_RETRIES})")
                     await asyncio.sleep(RETRY_DELAY)
                     return await self.get_media_info(source, retry_count + 1)
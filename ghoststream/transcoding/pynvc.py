@@ -0,0 +1,215 @@
+"""
+Optional PyNvVideoCodec backend for NVENC batch transcodes.
+
+Decodes with NVDEC and encodes with NVENC in-process, keeping frames in GPU
+memory the whole way, instead of driving the GPU through an FFmpeg
+subprocess. FFmpeg is still used for the audio track and for the final
+stream-copy mux.
+
+Enabled with `hardware.use_pynvc`; requires the PyNvVideoCodec package.
+Anything the pipeline can't handle (scaling, tonemapping, seeking, 10-bit)
+goes through the regular FFmpeg command path.
+"""
+
+import logging
+from dataclasses import dataclass
+from fractions import Fraction
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from ..models import OutputConfig, OutputFormat, VideoCodec, Resolution
+from .models import MediaInfo
+from .encoders import EncoderSelector
+from .commands import get_bandwidth_bps
+
+try:
+    import PyNvVideoCodec as nvc
+    HAS_PYNVC = True
+except ImportError:
+    nvc = None
+    HAS_PYNVC = False
+
+logger = logging.getLogger(__name__)
+
+
+# Output codec -> PyNvVideoCodec encoder codec name
+_ENCODER_CODECS = {
+    VideoCodec.H264: "h264",
+    VideoCodec.H265: "hevc",
+    VideoCodec.AV1: "av1",
+}
+
+# Source codecs (ffprobe names) NVDEC can decode
+_DECODABLE_CODECS = frozenset({
+    "h264", "hevc", "av1", "vp8", "vp9", "mpeg1video", "mpeg2video", "mpeg4", "vc1", "mjpeg",
+})
+
+# Containers that can take the raw elementary stream via stream copy
+_MUX_FORMATS = {
+    OutputFormat.MP4: ("-movflags", "+faststart"),
+    OutputFormat.MKV: ("-f", "matroska"),
+}
+
+
+@dataclass
+class PyNvcPipeline:
+    """Descriptor for one PyNvVideoCodec transcode plus its FFmpeg audio/mux steps."""
+    source: str
+    encoder_codec: str
+    width: int
+    height: int
+    fps: float
+    frame_rate: Fraction      # Exact source rate (24000/1001, ...) for the mux timestamps
+    bitrate: str
+    preset: str
+    video_path: Path          # Raw elementary stream written by NVENC
+    audio_path: Path          # Audio track extracted by FFmpeg
+    output_path: Path         # Final muxed file
+    audio_cmd: Optional[List[str]]  # FFmpeg: source audio -> audio_path; None without audio
+    mux_cmd: List[str]        # FFmpeg: video_path (+ audio_path) -> output_path
+
+
+class PyNvcPipelineBuilder:
+    """Builds PyNvVideoCodec pipeline descriptors for batch jobs it can handle."""
+
+    def __init__(self, ffmpeg_path: str, encoder_selector: EncoderSelector):
+        self.ffmpeg_path = ffmpeg_path
+        self.encoder_selector = encoder_selector
+
+    def can_build(
+        self,
+        source: str,
+        output_config: OutputConfig,
+        media_info: Optional[MediaInfo],
+        start_time: float = 0
+    ) -> bool:
+        """Whether this job fits the direct NVDEC -> NVENC pipeline."""
+        if not HAS_PYNVC or media_info is None:
+            return False
+        if output_config.format not in _MUX_FORMATS or output_config.video_codec not in _ENCODER_CODECS:
+            return False
+        # No scaler, tonemapper or seek in the pipeline
+        if output_config.resolution != Resolution.ORIGINAL or start_time > 0:
+            return False
+        if media_info.is_hdr or media_info.is_10bit or media_info.fps <= 0:
+            return False
+        if media_info.video_codec not in _DECODABLE_CODECS:
+            return False
+        # Only when NVENC would have been picked for the FFmpeg path anyway
+        choice = self.encoder_selector.choose_video_encoder(
+            output_config.video_codec, output_config.hw_accel
+        )
+        return choice.family == "nvenc"
+
+    def build(
+        self,
+        source: str,
+        output_path: Path,
+        output_config: OutputConfig,
+        media_info: MediaInfo,
+        bitrate: str,
+        preset: str = "p4"
+    ) -> PyNvcPipeline:
+        """Build the pipeline descriptor. Call can_build() first."""
+        encoder_codec = _ENCODER_CODECS[output_config.video_codec]
+        job_dir = output_path.parent
+        video_path = job_dir / f"video.{encoder_codec}"
+        audio_path = job_dir / "audio.mka"
+
+        # A silent source would leave the extract step with no output stream
+        audio_cmd = None
+        audio_input, audio_map = (), ()
+        if media_info.audio_codec:
+            audio_encoder, audio_args = self.encoder_selector.get_audio_encoder(output_config.audio_codec)
+            audio_cmd = [
+                self.ffmpeg_path, "-y", "-hide_banner",
+                "-i", source,
+                "-vn", "-map", "0:a:0",
+                "-c:a", audio_encoder, *audio_args,
+                str(audio_path),
+            ]
+            audio_input, audio_map = ("-i", str(audio_path)), ("-map", "1:a:0")
+
+        # Raw elementary streams carry no timestamps; take them from the source
+        # rate, as a fraction so NTSC rates don't drift over long files
+        frame_rate = Fraction(media_info.fps).limit_denominator(1001)
+        mux_cmd = [
+            self.ffmpeg_path, "-y", "-hide_banner",
+            "-framerate", f"{frame_rate.numerator}/{frame_rate.denominator}", "-i", str(video_path),
+            *audio_input,
+            "-map", "0:v:0", *audio_map,
+            "-c", "copy",
+            *_MUX_FORMATS[output_config.format],
+            str(output_path),
+        ]
+
+        return PyNvcPipeline(
+            source=source,
+            encoder_codec=encoder_codec,
+            width=media_info.width,
+            height=media_info.height,
+            fps=media_info.fps,
+            frame_rate=frame_rate,
+            bitrate=bitrate,
+            preset=preset,
+            video_path=video_path,
+            audio_path=audio_path,
+            output_path=output_path,
+            audio_cmd=audio_cmd,
+            mux_cmd=mux_cmd,
+        )
+
+
+def run_pynvc_video(
+    pipeline: PyNvcPipeline,
+    on_frame: Optional[Callable[[int], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    gpu_id: int = 0
+) -> int:
+    """
+    Decode and re-encode the video track on the GPU. Blocking; run in an executor.
+
+    Returns the number of frames encoded. Raises RuntimeError if stopped.
+    """
+    if not HAS_PYNVC:
+        raise RuntimeError("PyNvVideoCodec is not installed")
+
+    # NVENC's rate control here only takes whole frame rates. Scale the
+    # bitrate so its per-frame budget matches the real rate the mux step
+    # stamps, and the file lands on the requested bitrate.
+    encoder_fps = max(round(pipeline.frame_rate), 1)
+    bitrate = round(get_bandwidth_bps(pipeline.bitrate) * encoder_fps / pipeline.frame_rate)
+
+    demuxer = nvc.CreateDemuxer(filename=pipeline.source)
+    decoder = nvc.CreateDecoder(
+        gpuid=gpu_id,
+        codec=demuxer.GetNvCodecId(),
+        cudacontext=0,
+        cudastream=0,
+        usedevicememory=True,
+    )
+    encoder = nvc.CreateEncoder(
+        pipeline.width,
+        pipeline.height,
+        "NV12",
+        False,  # Input frames are already in device memory
+        codec=pipeline.encoder_codec,
+        preset=pipeline.preset.upper(),
+        bitrate=bitrate,
+        fps=encoder_fps,
+        gpu_id=gpu_id,
+    )
+
+    frames = 0
+    with open(pipeline.video_path, "wb") as out:
+        for packet in demuxer:
+            for frame in decoder.Decode(packet):
+                out.write(bytearray(encoder.Encode(frame)))
+                frames += 1
+                if on_frame:
+                    on_frame(frames)
+            if should_stop and should_stop():
+                raise RuntimeError("Cancelled")
+        out.write(bytearray(encoder.EndEncode()))
+
+    return frames
@@ -14,14 +14,24 @@ import signal
 import subprocess
 import sys
 import time
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Optional, Dict, List, Callable, Any, Tuple
+from typing import Optional, Dict, List, Callable, Any, Tuple, Deque
 from pathlib import Path
 
+from .models import MediaInfo, TranscodeProgress
+from .ffmpeg_runner import (
+    parse_progress_field, parse_progress_line, signal_process_group, track_process_group
+)
+from .constants import READER_DRAIN_TIMEOUT, STDERR_BUFFER_SIZE, STDERR_LINE_LIMIT
+
 logger = logging.getLogger(__name__)
 
+# Progress is parsed without a duration; percent isn't reported here
+_NO_MEDIA_INFO = MediaInfo()
+
 
 class WorkerState(str, Enum):
     """FFmpeg worker process state."""
@@ -68,8 +78,7 @@ class FFmpegWorker:
     process: Optional[asyncio.subprocess.Process] = None
     stats: WorkerStats = field(default_factory=WorkerStats)
     _cancel_event: asyncio.Event = field(default_factory=asyncio.Event)
-    _stdout_buffer: List[bytes] = field(default_factory=list)
-    _stderr_buffer: List[str] = field(default_factory=list)
+    _stderr_buffer: Deque[str] = field(default_factory=lambda: deque(maxlen=STDERR_BUFFER_SIZE))
     
     async def start(self) -> bool:
         """Start the FFmpeg process."""
@@ -84,18 +93,23 @@ class FFmpegWorker:
             kwargs: Dict[str, Any] = {
                 "stdout": asyncio.subprocess.PIPE,
                 "stderr": asyncio.subprocess.PIPE,
+                "limit": STDERR_LINE_LIMIT,
             }
             
             if self.working_dir:
                 kwargs["cwd"] = str(self.working_dir)
             
-            # Windows-specific process group for signal handling
+            # Own process group for signal handling
             if sys.platform == "win32":
                 kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+            else:
+                # Own process group, so a kill reaches any helpers FFmpeg spawns
+                kwargs["start_new_session"] = True
             
-            self.process = await asyncio.create_subprocess_exec(
+            # Tracked so the children are reaped at exit (kill_process_groups)
+            self.process = track_process_group(await asyncio.create_subprocess_exec(
                 *self.command, **kwargs
-            )
+            ))
             
             self.state = WorkerState.RUNNING
             logger.info(f"[Worker {self.worker_id}] Started FFmpeg process (PID: {self.process.pid})")
@@ -146,9 +160,9 @@ class FFmpegWorker:
             except asyncio.TimeoutError:
                 pass
             
-            # Escalate to terminate
+            # Escalate to terminate (whole process group)
             try:
-                self.process.terminate()
+                signal_process_group(self.process, signal.SIGTERM)
                 await asyncio.wait_for(self.process.wait(), timeout=timeout * 0.3)
                 self.state = WorkerState.STOPPED
                 self.stats.end_time = datetime.utcnow()
@@ -159,7 +173,7 @@ class FFmpegWorker:
             
             # Force kill
             try:
-                self.process.kill()
+                signal_process_group(self.process, getattr(signal, "SIGKILL", signal.SIGTERM))
                 await self.process.wait()
             except (ProcessLookupError, OSError):
                 pass
@@ -326,54 +340,57 @@ class FFmpegWorkerPool:
                 return -1, worker.stats.error_message
             
             # Read output concurrently
+            progress = TranscodeProgress()
+            
+            def report() -> None:
+                worker.stats.last_progress_time = datetime.utcnow()
+                worker.stats.frames_processed = progress.frame
+                progress_callback(worker_id, progress.frame, progress.time)
+            
+            # Readers block on the pipe until EOF; the drain deadline after
+            # the process exits replaces a per-line read timeout
             async def read_stderr():
-                while worker.is_running():
+                while True:
                     try:
-                        line = await asyncio.wait_for(
-                            worker.process.stderr.readline(),
-                            timeout=1.0
-                        )
+                        line = await worker.process.stderr.readline()
                         if not line:
                             break
                         
                         line_str = line.decode("utf-8", errors="ignore")
+                        # Bounded deque keeps the last lines, dropping the oldest
                         worker._stderr_buffer.append(line_str)
                         
-                        # Keep buffer bounded
-                        if len(worker._stderr_buffer) > 200:
-                            worker._stderr_buffer.pop(0)
-                        
                         # Parse progress if callback provided
                         if progress_callback and "frame=" in line_str:
                             worker.stats.last_progress_time = datetime.utcnow()
-                            # Extract frame number
-                            import re
-                            match = re.search(r"frame=\s*(\d+)", line_str)
-                            if match:
-                                worker.stats.frames_processed = int(match.group(1))
-                            match = re.search(r"time=\s*(\d+):(\d+):(\d+\.?\d*)", line_str)
-                            if match:
-                                h, m, s = match.groups()
-                                time_val = int(h) * 3600 + int(m) * 60 + float(s)
-                                progress_callback(
-                                    worker_id,
-                                    worker.stats.frames_processed,
-                                    time_val
-                                )
-                    except asyncio.TimeoutError:
-                        continue
+                            # One pass over the line for every stats field
+                            parse_progress_line(line_str, progress, _NO_MEDIA_INFO)
+                            worker.stats.frames_processed = progress.frame
+                            if "time=" in line_str and "time=N/A" not in line_str:
+                                report()
                     except Exception as e:
                         logger.debug(f"[Worker {worker_id}] stderr read error: {e}")
                         break
             
+            # Builder commands write "-progress pipe:1" blocks here instead of
+            # stderr stats lines; anything else on stdout is drained and dropped
             async def read_stdout():
-                while worker.is_running():
+                pending = b""
+                while True:
                     try:
                         chunk = await worker.process.stdout.read(4096)
                         if not chunk:
                             break
-                        worker._stdout_buffer.append(chunk)
-                    except Exception:
+                        if not progress_callback:
+                            continue
+                        
+                        *lines, pending = (pending + chunk).split(b"\n")
+                        for raw in lines:
+                            key, sep, value = raw.decode("utf-8", errors="ignore").strip().partition("=")
+                            if sep and parse_progress_field(key, value, progress, _NO_MEDIA_INFO):
+                                report()
+                    except Exception as e:
+                        logger.debug(f"[Worker {worker_id}] stdout read error: {e}")
                         break
             
             # Run readers and wait for completion
@@ -390,8 +407,12 @@ class FFmpegWorkerPool:
                 await worker.stop()
                 return_code = -1
             
-            # Wait for readers to finish
-            await asyncio.gather(stderr_task, stdout_task, return_exceptions=True)
+            # Wait for readers to drain, but not on pipes a stray child holds open
+            readers = (stderr_task, stdout_task)
+            _, pending = await asyncio.wait(readers, timeout=READER_DRAIN_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
             
             return return_code, worker.get_stderr()
             
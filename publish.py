@@ -7,7 +7,11 @@ import os
 import sys
 import shutil
 import subprocess
+import threading
+import json
 import re
+import shlex
+from functools import lru_cache
 from pathlib import Path
 
 ROOT_DIR = Path(__file__).parent
@@ -18,35 +22,45 @@ DIST_DIR = ROOT_DIR / "dist"
 
 
 def run_cmd(cmd, cwd=None, check=True):
-    """Run command and return output"""
-    print(f"\n→ Running: {cmd}")
-    result = subprocess.run(
-        cmd, 
-        shell=True, 
+    """Run command without a shell, streaming its output as it arrives"""
+    args = shlex.split(cmd) if isinstance(cmd, str) else list(cmd)
+    print(f"\n→ Running: {shlex.join(args)}")
+    # Resolve e.g. npm.cmd on Windows, which the shell used to do for us
+    args[0] = shutil.which(args[0]) or args[0]
+    proc = subprocess.Popen(
+        args,
         cwd=cwd or ROOT_DIR,
-        capture_output=True,
-        text=True
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1
     )
-    if result.stdout:
-        print(result.stdout)
-    if result.stderr:
-        print(result.stderr, file=sys.stderr)
-    if check and result.returncode != 0:
-        print(f"✗ Command failed with exit code {result.returncode}")
+    with proc:
+        for line in proc.stdout:
+            print(line, end="", flush=True)
+    if check and proc.returncode != 0:
+        print(f"✗ Command failed with exit code {proc.returncode}")
         sys.exit(1)
-    return result
+    return proc
 
 
 def get_current_version(pkg_type):
     """Get current version from package files"""
+    if pkg_type == "python":
+        return _read_version(pkg_type, PYTHON_INIT.stat().st_mtime_ns)
+    elif pkg_type == "npm":
+        return _read_version(pkg_type, JS_PACKAGE_JSON.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _read_version(pkg_type, mtime_ns):
+    """Parse the version once per file modification"""
     if pkg_type == "python":
         content = PYTHON_INIT.read_text(encoding="utf-8")
         match = re.search(r'__version__\s*=\s*["\']([^"\']+)["\']', content)
         return match.group(1) if match else None
-    elif pkg_type == "npm":
-        content = JS_PACKAGE_JSON.read_text(encoding="utf-8")
-        match = re.search(r'"version"\s*:\s*"([^"]+)"', content)
-        return match.group(1) if match else None
+    content = json.loads(JS_PACKAGE_JSON.read_text(encoding="utf-8"))
+    return content.get("version")
 
 
 def bump_version(version, bump_type="patch"):
@@ -70,6 +84,7 @@ def update_version(pkg_type, new_version):
             content
         )
         PYTHON_INIT.write_text(content, encoding="utf-8")
+        _read_version.cache_clear()
         print(f"✓ Updated Python version to {new_version}")
     elif pkg_type == "npm":
         content = JS_PACKAGE_JSON.read_text(encoding="utf-8")
@@ -79,14 +94,23 @@ def update_version(pkg_type, new_version):
             content
         )
         JS_PACKAGE_JSON.write_text(content, encoding="utf-8")
+        _read_version.cache_clear()
         print(f"✓ Updated npm version to {new_version}")
 
 
 def clean_dist():
-    """Remove old distribution files"""
+    """Move old distribution files aside and delete them in the background"""
     if DIST_DIR.exists():
         print(f"→ Cleaning {DIST_DIR}")
-        shutil.rmtree(DIST_DIR)
+        stale = DIST_DIR.with_name(f"dist.old-{os.getpid()}")
+        DIST_DIR.rename(stale)
+        # Not a daemon, so the interpreter finishes the delete before exiting
+        threading.Thread(
+            target=shutil.rmtree,
+            args=(stale,),
+            kwargs={"ignore_errors": True},
+            name="clean-dist"
+        ).start()
         print("✓ Cleaned dist directory")
 
 
@@ -107,7 +131,8 @@ def publish_python(skip_build=False):
     
     # Upload to PyPI
     print("\n→ Uploading to PyPI...")
-    run_cmd("python -m twine upload dist/*")
+    dist_files = sorted(str(path) for path in DIST_DIR.glob("*"))
+    run_cmd(["python", "-m", "twine", "upload", *dist_files])
     print("✓ Python package published to PyPI!")
 
 
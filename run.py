@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """
 GhostStream - Zero Setup Launcher
-Just run: python run.py
+Just run: python run.py  (add --verbose for more detail)
 
 Handles everything automatically:
 - Creates virtual environment if needed
@@ -10,6 +10,7 @@ Handles everything automatically:
 - Starts the server
 """
 
+import hashlib
 import os
 import sys
 import subprocess
@@ -17,6 +18,9 @@ import shutil
 import platform
 from pathlib import Path
 
+# Extra launch diagnostics (e.g. the FFmpeg version) with --verbose
+VERBOSE = "--verbose" in sys.argv[1:]
+
 # Colors for terminal output (works on all platforms)
 class Colors:
     if sys.platform == "win32":
@@ -59,30 +63,14 @@ def log_success(msg):
 def log_warn(msg):
     print(f"{Colors.YELLOW}⚠ {msg}{Colors.END}")
 
-def get_python_cmd():
-    """Get the right Python command for this system."""
-    # Try python3 first (Linux/macOS), then python (Windows)
-    for cmd in ["python3", "python"]:
-        try:
-            result = subprocess.run(
-                [cmd, "--version"], 
-                capture_output=True, 
-                text=True
-            )
-            if result.returncode == 0 and "3." in result.stdout:
-                return cmd
-        except FileNotFoundError:
-            continue
-    return None
-
 def check_python():
-    """Ensure Python 3.10+ is available."""
+    """Ensure Python 3.11+ is available."""
     log("Checking Python version...")
     
     version = sys.version_info
-    if version.major < 3 or (version.major == 3 and version.minor < 10):
-        log_error(f"Python 3.10+ required, found {version.major}.{version.minor}")
-        print(f"\n  Install Python 3.10+ from: {Colors.BLUE}https://python.org/downloads{Colors.END}\n")
+    if version.major < 3 or (version.major == 3 and version.minor < 11):
+        log_error(f"Python 3.11+ required, found {version.major}.{version.minor}")
+        print(f"\n  Install Python 3.11+ from: {Colors.BLUE}https://python.org/downloads{Colors.END}\n")
         return False
     
     log_success(f"Python {version.major}.{version.minor}.{version.micro}")
@@ -94,6 +82,9 @@ def check_ffmpeg():
     
     ffmpeg = shutil.which("ffmpeg")
     if ffmpeg:
+        if not VERBOSE:
+            log_success(f"FFmpeg found at {ffmpeg}")
+            return True
         # Get version
         try:
             result = subprocess.run(
@@ -178,38 +169,58 @@ def get_venv_pip(venv_path):
         return venv_path / "Scripts" / "pip.exe"
     return venv_path / "bin" / "pip"
 
+def pip_is_recent(pip, minimum=23):
+    """Check whether the venv's pip is new enough to skip upgrading it."""
+    try:
+        result = subprocess.run(
+            [str(pip), "--version"],
+            capture_output=True,
+            text=True
+        )
+        # "pip 23.2.1 from ... (python 3.11)"
+        return int(result.stdout.split()[1].split(".")[0]) >= minimum
+    except (OSError, IndexError, ValueError):
+        return False
+
 def install_dependencies(venv_path):
     """Install dependencies if needed."""
     pip = get_venv_pip(venv_path)
     requirements = Path(__file__).parent / "requirements.txt"
     
-    # Check if ghoststream is already installed
+    # A marker per requirements.txt revision avoids spawning the venv Python
     python = get_venv_python(venv_path)
-    try:
-        result = subprocess.run(
-            [str(python), "-c", "import ghoststream"],
-            capture_output=True
-        )
-        if result.returncode == 0:
-            log_success("Dependencies already installed")
-            return True
-    except Exception:
-        pass
+    digest = hashlib.blake2b(requirements.read_bytes(), digest_size=8).hexdigest()
+    marker = venv_path / f".ghoststream-installed-{digest}"
+    if marker.exists():
+        log_success("Dependencies already installed")
+        return True
     
     log("Installing dependencies (this may take a minute)...")
     try:
-        # Upgrade pip first
-        subprocess.run(
-            [str(pip), "install", "--upgrade", "pip"],
-            capture_output=True,
-            check=True
-        )
-        
-        # Install requirements
-        subprocess.run(
-            [str(pip), "install", "-r", str(requirements)],
-            check=True
-        )
+        uv = shutil.which("uv")
+        if uv:
+            # uv resolves and downloads in parallel, much faster on fresh clones
+            subprocess.run(
+                [uv, "pip", "install", "--python", str(python), "-r", str(requirements)],
+                check=True
+            )
+        else:
+            if not pip_is_recent(pip):
+                subprocess.run(
+                    [str(pip), "install", "--upgrade", "pip"],
+                    capture_output=True,
+                    check=True
+                )
+            
+            # Install requirements
+            subprocess.run(
+                [str(pip), "install", "--no-input", "--disable-pip-version-check",
+                 "--prefer-binary", "-r", str(requirements)],
+                check=True
+            )
+        for stale in venv_path.glob(".ghoststream-installed-*"):
+            stale.unlink()
+        marker.touch()
         log_success("Dependencies installed")
         return True
     except subprocess.CalledProcessError as e:
@@ -222,10 +233,22 @@ def run_ghoststream(venv_path):
     
     print(f"\n{Colors.GREEN}{Colors.BOLD}Starting GhostStream...{Colors.END}\n")
     
+    # Run in the project directory
+    os.chdir(Path(__file__).parent)
+    args = [str(python), "-m", "ghoststream"]
+    
+    # Become the server process so signals reach it directly. Windows only
+    # emulates exec with a detached child, so it keeps the wrapper instead.
+    if sys.platform != "win32":
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            os.execv(args[0], args)
+        except OSError as e:
+            log_warn(f"Could not exec server ({e}), running it as a child")
+    
     try:
-        # Run in the project directory
-        os.chdir(Path(__file__).parent)
-        subprocess.run([str(python), "-m", "ghoststream"])
+        subprocess.run(args)
     except KeyboardInterrupt:
         print(f"\n{Colors.YELLOW}Shutting down...{Colors.END}")
 
@@ -13,7 +13,7 @@ SDK Usage:
     print(f"Stream URL: {job.stream_url}")
 """
 
-from setuptools import setup, find_packages
+from setuptools import setup
 
 # Read version without importing the full package (avoids dependency issues)
 __version__ = "1.0.0"
@@ -66,7 +66,16 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     url="https://github.com/BleedingXiko/GhostStream",
-    packages=find_packages(exclude=["tests", "tests.*", "examples"]),
+    # Static list (no discovery walk); add new subpackages here
+    packages=[
+        "ghoststream",
+        "ghoststream.api",
+        "ghoststream.api.routes",
+        "ghoststream.discovery",
+        "ghoststream.hardware",
+        "ghoststream.jobs",
+        "ghoststream.transcoding",
+    ],
     classifiers=[
         "Development Status :: 4 - Beta",
         "Intended Audience :: Developers",
@@ -74,13 +83,12 @@ setup(
         "License :: OSI Approved :: MIT License",
         "Operating System :: OS Independent",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.10",
         "Programming Language :: Python :: 3.11",
         "Programming Language :: Python :: 3.12",
         "Topic :: Multimedia :: Video :: Conversion",
         "Framework :: FastAPI",
     ],
-    python_requires=">=3.10",
+    python_requires=">=3.11",
     # By default, install SDK dependencies only (lightweight)
     install_requires=sdk_requirements,
     extras_require={
@@ -88,6 +96,8 @@ setup(
         "server": server_requirements,
         # All dependencies (SDK + server)
         "all": all_requirements,
+        # In-process NVDEC/NVENC pipeline for batch jobs (hardware.use_pynvc)
+        "nvidia": ["PyNvVideoCodec>=1.0.2"],
         # Development dependencies
         "dev": [
             "pytest>=7.4.0",
@@ -8,12 +8,19 @@ Provides:
 """
 
 import asyncio
+import hashlib
+import json
 import os
 import shutil
 import subprocess
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
 from pathlib import Path
-from typing import Generator, Optional
+from typing import Callable, Generator, Iterable, List, Optional, Tuple
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
@@ -21,6 +28,11 @@ from fastapi.testclient import TestClient
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
 from ghoststream.api import app
 from ghoststream.config import load_config, set_config, get_config
 
@@ -29,16 +41,109 @@ from ghoststream.config import load_config, set_config, get_config
 # TEST MEDIA GENERATION
 # =============================================================================
 
+def _media_cache_dir() -> Path:
+    """Persistent cache for generated clips, shared across test sessions."""
+    override = os.environ.get("GHOSTSTREAM_TEST_MEDIA_CACHE")
+    if override:
+        return Path(override)
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "ghoststream-tests"
+
+
+@contextmanager
+def _cache_lock(cache_dir: Optional[Path]):
+    """Let one process (e.g. one xdist worker) fill the clip cache at a time."""
+    if cache_dir is None or fcntl is None:
+        yield
+        return
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with open(cache_dir / ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@lru_cache(maxsize=128)
+def _probe_clip(path: str, mtime_ns: int, size: int) -> Optional[Tuple[int, int, float]]:
+    """(width, height, duration) of a clip; keyed on mtime/size so edits re-probe."""
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe:
+        return None
+    try:
+        result = subprocess.run(
+            [ffprobe, "-v", "error", "-print_format", "json",
+             "-select_streams", "v:0",
+             "-show_entries", "stream=width,height:format=duration", path],
+            capture_output=True,
+            timeout=10
+        )
+        data = json.loads(result.stdout)
+        stream = data["streams"][0]
+        return int(stream["width"]), int(stream["height"]), float(data["format"]["duration"])
+    except (subprocess.TimeoutExpired, OSError, ValueError, KeyError, IndexError):
+        return None
+
+
+def _cached_clip_matches(path: Path, width: int, height: int, duration: float) -> bool:
+    """Check a cached clip against the requested geometry and length."""
+    if not shutil.which("ffprobe"):
+        return True  # Can't check; trust the atomically written cache
+    stat = path.stat()
+    probed = _probe_clip(str(path), stat.st_mtime_ns, stat.st_size)
+    return (
+        probed is not None
+        and probed[:2] == (width, height)
+        and abs(probed[2] - duration) < 0.5
+    )
+
+
+@lru_cache(maxsize=None)
+def _hw_h264_encoder(ffmpeg: str) -> Optional[str]:
+    """First hardware H.264 encoder this FFmpeg build lists, if any."""
+    preferred = ["h264_nvenc"]
+    if sys.platform == "darwin":
+        preferred.insert(0, "h264_videotoolbox")
+    try:
+        result = subprocess.run(
+            [ffmpeg, "-hide_banner", "-encoders"],
+            capture_output=True,
+            text=True,
+            timeout=10
+        )
+    except (subprocess.TimeoutExpired, OSError):
+        return None
+    listed = {line.split()[1] for line in result.stdout.splitlines() if len(line.split()) > 1}
+    return next((name for name in preferred if name in listed), None)
+
+
 class TestMediaGenerator:
     """
     Generates test media files using FFmpeg.
     No external downloads - creates synthetic test videos.
     """
     
-    def __init__(self, output_dir: Path):
+    # Kept out of the clip cache key; they only change FFmpeg's chatter
+    _QUIET_ARGS = ("-hide_banner", "-loglevel", "error", "-nostats")
+    
+    # Speed-oriented settings per encoder; unknown codecs get the x264 preset
+    _CODEC_ARGS = {
+        # No lookahead or B-frame delay and sliced threads: short clips finish sooner
+        "libx264": ("-preset", "ultrafast", "-tune", "zerolatency"),
+        "h264_nvenc": ("-preset", "p1", "-b:v", "2M"),
+        "h264_videotoolbox": ("-b:v", "2M"),
+    }
+    
+    def __init__(self, output_dir: Path, cache_dir: Optional[Path] = None):
         self.output_dir = output_dir
         self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_dir = cache_dir
         self._ffmpeg = shutil.which("ffmpeg")
+        self._hw_usable = True
+        self._audio_lock = threading.Lock()
+        self._audio_track: Optional[Path] = None
+        self._audio_checked = False
     
     @property
     def has_ffmpeg(self) -> bool:
@@ -51,11 +156,13 @@ class TestMediaGenerator:
         width: int = 1280,
         height: int = 720,
         fps: int = 30,
-        codec: str = "libx264",
-        audio: bool = True
+        codec: Optional[str] = None,
+        audio: bool = True,
+        threads: Optional[int] = None,
+        pattern: str = "color"
     ) -> Optional[Path]:
         """
-        Generate a test video with color bars and tone.
+        Generate a test video with a synthetic picture and tone.
         
         Args:
             name: Output filename (without extension)
@@ -63,8 +170,12 @@ class TestMediaGenerator:
             width: Video width
             height: Video height
             fps: Frames per second
-            codec: Video codec to use
+            codec: Video codec to use (None tries a hardware H.264 encoder,
+                then libx264)
             audio: Include audio track
+            threads: Encoder thread cap (None lets FFmpeg decide)
+            pattern: "color" for a flat frame (cheapest to synthesize), or
+                "testsrc" for moving color bars when picture content matters
         
         Returns:
             Path to generated video, or None if FFmpeg not available
@@ -72,6 +183,18 @@ class TestMediaGenerator:
         if not self.has_ffmpeg:
             return None
         
+        if codec is None:
+            hw_codec = _hw_h264_encoder(self._ffmpeg) if self._hw_usable else None
+            if hw_codec:
+                path = self.generate_test_video(
+                    name, duration, width, height, fps, hw_codec, audio, threads, pattern
+                )
+                if path:
+                    return path
+                # Listed but not usable here (no device); stop trying it
+                self._hw_usable = False
+            codec = "libx264"
+        
         output_path = self.output_dir / f"{name}.mp4"
         
         # Build FFmpeg command for test pattern
@@ -79,10 +202,14 @@ class TestMediaGenerator:
             self._ffmpeg,
             "-y",  # Overwrite
             "-f", "lavfi",
-            "-i", f"testsrc=duration={duration}:size={width}x{height}:rate={fps}",
+            "-i", self._video_source(pattern, duration, width, height, fps),
         ]
         
-        if audio:
+        audio_track = self._shared_audio_track() if audio else None
+        if audio_track:
+            # Loop the pre-encoded tone; -shortest trims it to the video
+            cmd.extend(["-stream_loop", "-1", "-i", str(audio_track)])
+        elif audio:
             # Add sine wave audio
             cmd.extend([
                 "-f", "lavfi",
@@ -91,56 +218,194 @@ class TestMediaGenerator:
         
         cmd.extend([
             "-c:v", codec,
-            "-preset", "ultrafast",  # Fast encoding for tests
+            *self._CODEC_ARGS.get(codec, ("-preset", "ultrafast")),
+            "-g", str(fps),  # One-second GOPs for short clips
             "-pix_fmt", "yuv420p",
         ])
         
-        if audio:
-            cmd.extend(["-c:a", "aac", "-b:a", "128k"])
+        if threads:
+            cmd.extend(["-threads", str(threads)])
+        
+        if audio_track:
+            cmd.extend(["-c:a", "copy", "-shortest"])
+        elif audio:
+            cmd.extend(["-c:a", "aac", "-b:a", "128k", "-shortest"])
         
-        cmd.append(str(output_path))
+        # Clips are keyed by their encode settings, so changed flags re-encode
+        cached_path = None
+        if self.cache_dir is not None:
+            key = hashlib.blake2b(repr(cmd[1:]).encode(), digest_size=8).hexdigest()
+            cached_path = self.cache_dir / f"{name}_{key}.mp4"
+            if cached_path.exists() and cached_path.stat().st_size > 0:
+                if _cached_clip_matches(cached_path, width, height, duration):
+                    return self._publish(cached_path, output_path)
+                # Damaged or stale entry: drop it and encode again
+                cached_path.unlink(missing_ok=True)
+        
+        # Encode next to the target and rename, so an aborted run leaves no partial clip
+        target = cached_path or output_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        partial = target.with_name(f".{target.stem}.{os.getpid()}.partial.mp4")
+        cmd.append(str(partial))
         
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                timeout=60
-            )
-            if result.returncode == 0 and output_path.exists():
-                return output_path
+            if self._run_ffmpeg(cmd) and partial.exists():
+                os.replace(partial, target)
+                return self._publish(target, output_path)
         except (subprocess.TimeoutExpired, Exception) as e:
             print(f"Failed to generate test video: {e}")
+        finally:
+            partial.unlink(missing_ok=True)
         
         return None
     
-    def generate_test_videos(self) -> dict:
+    @staticmethod
+    def _video_source(pattern: str, duration: int, width: int, height: int, fps: int) -> str:
+        """lavfi source for the picture; a flat color costs almost nothing per frame."""
+        if pattern == "color":
+            return f"color=c=black:size={width}x{height}:rate={fps}:duration={duration}"
+        return f"{pattern}=duration={duration}:size={width}x{height}:rate={fps}"
+    
+    def _shared_audio_track(self) -> Optional[Path]:
+        """
+        Encode the 440 Hz tone to AAC once, for clips to stream-copy.
+        Returns None if that fails, and clips encode their own audio.
+        """
+        with self._audio_lock:
+            if not self._audio_checked:
+                track = (self.cache_dir or self.output_dir) / "sine_440_aac128k.m4a"
+                if not (track.exists() and track.stat().st_size > 0):
+                    track.parent.mkdir(parents=True, exist_ok=True)
+                    partial = track.with_name(f".{track.stem}.{os.getpid()}.partial.m4a")
+                    cmd = [
+                        self._ffmpeg, "-y",
+                        "-f", "lavfi", "-i", "sine=frequency=440:duration=10",
+                        "-c:a", "aac", "-b:a", "128k", str(partial),
+                    ]
+                    try:
+                        if self._run_ffmpeg(cmd) and partial.exists():
+                            os.replace(partial, track)
+                    except (subprocess.TimeoutExpired, Exception) as e:
+                        print(f"Failed to generate test audio: {e}")
+                    finally:
+                        partial.unlink(missing_ok=True)
+                # A failed attempt isn't retried per clip
+                self._audio_track = track if track.exists() else None
+                self._audio_checked = True
+            return self._audio_track
+    
+    def _run_ffmpeg(self, cmd: list) -> bool:
+        """Run FFmpeg with only errors on stderr; print them if it fails."""
+        # stderr goes to a file rather than a pipe, so no reader is needed
+        with tempfile.TemporaryFile() as errors:
+            proc = subprocess.Popen(
+                [cmd[0], *self._QUIET_ARGS, *cmd[1:]],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=errors,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0)
+            )
+            try:
+                returncode = proc.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+                raise
+            if returncode != 0:
+                errors.seek(0)
+                print(f"FFmpeg failed: {errors.read().decode(errors='replace').strip()}")
+        return returncode == 0
+    
+    @staticmethod
+    def _publish(source: Path, output_path: Path) -> Path:
+        """Expose a cached clip under its plain name in the session directory."""
+        if source == output_path:
+            return output_path
+        # Swap in atomically: xdist workers may publish into one shared directory
+        staged = output_path.with_name(f".{output_path.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            os.link(source, staged)
+        except OSError:
+            shutil.copy2(source, staged)
+        os.replace(staged, output_path)
+        # Renaming onto another link to the same file is a no-op that keeps both
+        staged.unlink(missing_ok=True)
+        return output_path
+    
+    def _remux(self, source: Path, name: str, args: list) -> Optional[Path]:
+        """Derive a clip from an encoded one by stream copy (no re-encode)."""
+        output_path = self.output_dir / f"{name}.mp4"
+        # A fresh file renamed into place never writes through a hard link
+        # into the clip cache, and readers never see a half-written clip
+        partial = output_path.with_name(f".{name}.{os.getpid()}.partial.mp4")
+        cmd = [self._ffmpeg, "-y", "-i", str(source), *args, "-c", "copy", str(partial)]
+        try:
+            if self._run_ffmpeg(cmd) and partial.exists():
+                os.replace(partial, output_path)
+                return output_path
+        except (subprocess.TimeoutExpired, Exception) as e:
+            print(f"Failed to remux test video: {e}")
+        finally:
+            partial.unlink(missing_ok=True)
+        return None
+    
+    # Encoded clips. Most tests only need a valid small file, so clips run
+    # at 15 fps and the 720p/1080p ones are only made when asked for.
+    CLIP_SPECS = {
+        # Small source for the derived clips below
+        "360p": dict(name="test_360p", duration=2, width=640, height=360, fps=15),
+        # Standard 720p test video (5 seconds)
+        "720p": dict(name="test_720p", duration=5, width=1280, height=720, fps=15),
+        # Short 1080p video (3 seconds)
+        "1080p": dict(name="test_1080p", duration=3, width=1920, height=1080, fps=15),
+    }
+    
+    # Clips cut from the 360p one by stream copy, with a full-encode fallback
+    DERIVED_SPECS = {
+        # Very short video for quick tests (1 second)
+        "quick": (["-t", "1"], dict(name="test_quick", duration=1, width=640, height=360, fps=15)),
+        # Video without audio
+        "no_audio": (["-an"], dict(name="test_no_audio", duration=2, width=640, height=360, fps=15, audio=False)),
+    }
+    
+    def generate_test_videos(self, kinds: Iterable[str] = ("360p",)) -> dict:
         """
         Generate a set of test videos for different scenarios.
         
+        The encoded clips are independent, so they are encoded in parallel
+        with the cores split between them. Variants that only trim or drop
+        a stream are then cut from the 360p clip by stream copy.
+        
+        Args:
+            kinds: Keys of CLIP_SPECS to encode; the derived clips come
+                along with "360p"
+        
         Returns:
             Dict mapping video type to path
         """
-        videos = {}
+        specs = {kind: self.CLIP_SPECS[kind] for kind in kinds}
+        workers = min(len(specs), os.cpu_count() or 1)
+        threads = max(1, (os.cpu_count() or 1) // workers)
         
-        # Standard 720p test video (5 seconds)
-        path = self.generate_test_video("test_720p", duration=5, width=1280, height=720)
-        if path:
-            videos["720p"] = path
+        # Later workers wait here, then find every clip already cached
+        with _cache_lock(self.cache_dir), ThreadPoolExecutor(max_workers=workers) as pool:
+            paths = pool.map(
+                lambda spec: self.generate_test_video(**spec, threads=threads),
+                specs.values()
+            )
+            videos = {kind: path for kind, path in zip(specs, paths) if path}
         
-        # Short 1080p video (3 seconds)
-        path = self.generate_test_video("test_1080p", duration=3, width=1920, height=1080)
-        if path:
-            videos["1080p"] = path
+        if "360p" not in specs:
+            return videos
         
-        # Very short video for quick tests (1 second)
-        path = self.generate_test_video("test_quick", duration=1, width=640, height=360)
-        if path:
-            videos["quick"] = path
-        
-        # Video without audio
-        path = self.generate_test_video("test_no_audio", duration=2, width=640, height=360, audio=False)
-        if path:
-            videos["no_audio"] = path
+        for kind, (args, spec) in self.DERIVED_SPECS.items():
+            path = None
+            if "360p" in videos:
+                path = self._remux(videos["360p"], spec["name"], args)
+            # Fall back to a full encode if the copy didn't work out
+            path = path or self.generate_test_video(**spec)
+            if path:
+                videos[kind] = path
         
         return videos
 
@@ -150,22 +415,26 @@ class TestMediaGenerator:
 # =============================================================================
 
 @pytest.fixture(scope="session")
-def test_media_dir(tmp_path_factory) -> Path:
+def test_media_dir(tmp_path_factory, request) -> Path:
     """
     Session-scoped temp directory for test media.
+    Under xdist, the directory the controller serves, shared by all workers.
     Auto-cleaned after all tests complete.
     """
+    shared = getattr(request.config, "workerinput", {}).get("ghoststream_media")
+    if shared:
+        return Path(shared["dir"])
     return tmp_path_factory.mktemp("ghoststream_test_media")
 
 
 @pytest.fixture(scope="session")
 def media_generator(test_media_dir) -> TestMediaGenerator:
-    """Session-scoped media generator."""
-    return TestMediaGenerator(test_media_dir)
+    """Session-scoped media generator backed by the persistent clip cache."""
+    return TestMediaGenerator(test_media_dir, cache_dir=_media_cache_dir())
 
 
 @pytest.fixture(scope="session")
-def test_videos(media_generator) -> dict:
+def test_videos(media_generator, request) -> dict:
     """
     Generate test videos once per session.
     Returns dict of video paths by type.
@@ -173,6 +442,14 @@ def test_videos(media_generator) -> dict:
     if not media_generator.has_ffmpeg:
         pytest.skip("FFmpeg not available for test media generation")
     
+    # Let the background warm-up finish filling the clip cache first
+    warmup = getattr(request.config, "_media_warmup", None)
+    if warmup is not None:
+        try:
+            warmup.result()
+        except Exception as e:
+            print(f"Test media warm-up failed: {e}")
+    
     videos = media_generator.generate_test_videos()
     if not videos:
         pytest.skip("Failed to generate test videos")
@@ -187,21 +464,21 @@ def quick_test_video(test_videos) -> Path:
 
 
 @pytest.fixture(scope="session")
-def test_video_720p(test_videos) -> Path:
-    """Standard 720p test video."""
-    return test_videos.get("720p")
+def test_video_720p(media_generator, test_videos) -> Path:
+    """Standard 720p test video, encoded only for tests that ask for it."""
+    return media_generator.generate_test_videos(["720p"]).get("720p")
 
 
 @pytest.fixture(scope="session")
-def test_video_1080p(test_videos) -> Path:
-    """1080p test video."""
-    return test_videos.get("1080p")
+def test_video_1080p(media_generator, test_videos) -> Path:
+    """1080p test video, encoded only for tests that ask for it."""
+    return media_generator.generate_test_videos(["1080p"]).get("1080p")
 
 
-@pytest.fixture(scope="module")
-def test_config():
+@pytest.fixture(scope="session")
+def _session_test_config():
     """
-    Load and set test configuration.
+    Build the test configuration once per session.
     Uses a temp directory for transcoding output.
     """
     config = load_config()
@@ -212,8 +489,6 @@ def test_config():
     config.transcoding.stall_timeout = 30  # Shorter for tests
     config.logging.level = "WARNING"  # Less noise in tests
     
-    set_config(config)
-    
     yield config
     
     # Cleanup temp directory
@@ -222,13 +497,37 @@ def test_config():
 
 
 @pytest.fixture(scope="module")
-def api_client(test_config) -> Generator[TestClient, None, None]:
+def test_config(_session_test_config):
     """
-    Test client for API endpoints.
-    Auto-cleanup on teardown.
+    Install the shared test configuration for a module.
+    Re-applied per module since other test modules swap the global config.
     """
-    with TestClient(app) as client:
-        yield client
+    set_config(_session_test_config)
+    return _session_test_config
+
+
+@pytest.fixture(scope="session")
+def _session_api_client() -> Generator[Callable[[], TestClient], None, None]:
+    """
+    Lazily start one test client whose app lifespan runs once per session.
+    Started on first use, so session-level skips (e.g. missing test media)
+    still apply before the app is brought up. Auto-cleanup on teardown.
+    """
+    with ExitStack() as stack:
+        clients = []
+        
+        def get_client() -> TestClient:
+            if not clients:
+                clients.append(stack.enter_context(TestClient(app)))
+            return clients[0]
+        
+        yield get_client
+
+
+@pytest.fixture(scope="module")
+def api_client(test_config, _session_api_client) -> TestClient:
+    """Test client for API endpoints, with the test config re-installed per module."""
+    return _session_api_client()
 
 
 @pytest.fixture
@@ -251,47 +550,188 @@ def cleanup_jobs(api_client):
     job_ids = []
     yield job_ids
     
-    # Cleanup all tracked jobs
-    for job_id in job_ids:
-        try:
-            api_client.delete(f"/api/transcode/{job_id}")
-        except Exception:
-            pass
+    if not job_ids:
+        return
+    
+    # Delete all tracked jobs concurrently on the app's own event loop
+    async def delete_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await asyncio.gather(
+                *(client.delete(f"/api/transcode/{job_id}") for job_id in job_ids),
+                return_exceptions=True
+            )
+    
+    try:
+        api_client.portal.call(delete_all)
+    except Exception:
+        pass
 
 
 # =============================================================================
 # HTTP SERVER FOR TEST MEDIA
 # =============================================================================
 
-@pytest.fixture(scope="session")
-def http_server(test_media_dir, test_videos):
+def _parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
     """
-    Start a simple HTTP server to serve test media files.
-    Required because GhostStream fetches media via HTTP.
+    Resolve a single "bytes=" Range header to an inclusive (start, end).
+    
+    Returns None when the whole body should be sent (no header, or a
+    multi-range request), and (size, size) when the range can't be satisfied.
     """
-    import threading
-    from http.server import HTTPServer, SimpleHTTPRequestHandler
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            start, end = max(0, size - int(last)), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        return size, size
+    return start, end
+
+
+def _start_media_server(directory: Path):
+    """Serve directory over HTTP on a free loopback port; returns (server, url)."""
+    from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+    
+    # Request path -> (body, content type). Clips are published atomically
+    # and never rewritten, so each file is read once on its first request.
+    # Misses aren't cached: clips can appear after the server starts.
+    blobs = {}
     
     class QuietHandler(SimpleHTTPRequestHandler):
+        # Keep-alive for segment fetches. No socket timeout: it would also
+        # bound each body write, cutting clips short for a stalled reader.
+        # Idle connections sit on daemon threads, so they don't block exit.
+        protocol_version = "HTTP/1.1"
+        
         def __init__(self, *args, **kwargs):
-            super().__init__(*args, directory=str(test_media_dir), **kwargs)
+            super().__init__(*args, directory=str(directory), **kwargs)
+        
+        def _blob(self) -> Optional[Tuple[bytes, str]]:
+            path = self.path.split("?", 1)[0].split("#", 1)[0]
+            blob = blobs.get(path)
+            if blob is None:
+                # translate_path keeps the lookup inside the served directory
+                file = Path(self.translate_path(path))
+                if not file.is_file():
+                    return None
+                blob = blobs.setdefault(path, (file.read_bytes(), self.guess_type(str(file))))
+            return blob
+        
+        def _send_blob(self, with_body: bool) -> None:
+            blob = self._blob()
+            if blob is None:
+                # No directory listings; only the clips themselves are served
+                self.send_error(404, "File not found")
+                return
+            body, content_type = blob
+            size = len(body)
+            span = _parse_range(self.headers.get("Range"), size)
+            
+            if span == (size, size):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            
+            if span is None:
+                start, end = 0, size - 1
+                self.send_response(200)
+            else:
+                start, end = span
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(end - start + 1))
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+            if with_body:
+                self.wfile.write(memoryview(body)[start:end + 1])
+        
+        def do_GET(self):
+            self._send_blob(with_body=True)
+        
+        def do_HEAD(self):
+            self._send_blob(with_body=False)
         
         def log_message(self, format, *args):
             pass  # Suppress logging
     
-    # Find available port
-    import socket
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-        s.bind(('', 0))
-        port = s.getsockname()[1]
-    
-    server = HTTPServer(('localhost', port), QuietHandler)
+    # One thread per connection, so parallel fetches don't queue behind keep-alives.
+    # Port 0 lets the kernel pick a free port on the one and only bind.
+    server = ThreadingHTTPServer(('127.0.0.1', 0), QuietHandler)
+    port = server.server_address[1]
     thread = threading.Thread(target=server.serve_forever, daemon=True)
     thread.start()
+    return server, f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture(scope="session")
+def http_server(test_media_dir, test_videos, request):
+    """
+    Start a simple HTTP server to serve test media files.
+    Required because GhostStream fetches media via HTTP.
+    Under xdist, reuses the single server the controller started.
+    """
+    shared = getattr(request.config, "workerinput", {}).get("ghoststream_media")
+    if shared:
+        yield shared["url"]
+        return
     
-    yield f"http://localhost:{port}"
+    server, url = _start_media_server(test_media_dir)
+    
+    yield url
     
     server.shutdown()
+    server.server_close()
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_configure_node(node):
+    """xdist controller: start one media server and hand it to every worker."""
+    config = node.config
+    if not hasattr(config, "_media_service"):
+        directory = Path(tempfile.mkdtemp(prefix="ghoststream_test_media_"))
+        server, url = _start_media_server(directory)
+        config._media_service = (server, directory, url)
+    _, directory, url = config._media_service
+    node.workerinput["ghoststream_media"] = {"dir": str(directory), "url": url}
+
+
+def pytest_unconfigure(config):
+    """
+    Finish the media warm-up and stop the shared xdist media server.
+    
+    The warm-up may still hold the cache lock or be writing clips when the
+    session ends, so it is waited for, and its error, if any, is reported.
+    """
+    pool = getattr(config, "_media_warmup_pool", None)
+    if pool is not None:
+        pool.shutdown(wait=True)
+        try:
+            config._media_warmup.result()
+        except Exception as e:
+            reporter = config.pluginmanager.get_plugin("terminalreporter")
+            message = f"Test media warm-up failed: {e!r}"
+            if reporter:
+                reporter.write_line(message, red=True)
+            else:
+                print(message)
+    
+    service = getattr(config, "_media_service", None)
+    if service:
+        server, directory, _ = service
+        server.shutdown()
+        server.server_close()
+        shutil.rmtree(directory, ignore_errors=True)
 
 
 @pytest.fixture
@@ -306,12 +746,17 @@ def test_video_url(http_server, quick_test_video) -> str:
 # ASYNC FIXTURES
 # =============================================================================
 
-@pytest.fixture
-def event_loop():
-    """Create event loop for async tests."""
-    loop = asyncio.new_event_loop()
-    yield loop
-    loop.close()
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    """
+    Run async tests on uvloop where available, as the server does in production.
+    pytest-asyncio still creates a fresh loop per test from this policy.
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.DefaultEventLoopPolicy()
+    return uvloop.EventLoopPolicy()
 
 
 # =============================================================================
@@ -331,6 +776,28 @@ def pytest_configure(config):
     )
 
 
+def _warm_media_cache(kinds: List[str]) -> None:
+    """Fill the clip cache so the media fixtures only have to link files."""
+    scratch = Path(tempfile.mkdtemp(prefix="ghoststream_media_warmup_"))
+    try:
+        TestMediaGenerator(scratch, cache_dir=_media_cache_dir()).generate_test_videos(kinds)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def pytest_collection_modifyitems(session, config, items):
+    """Start encoding test media in the background if a selected test needs it."""
+    needed = set()
+    for item in items:
+        needed.update(name for name in item.fixturenames
+                      if name in ("test_videos", "test_video_720p", "test_video_1080p"))
+    if shutil.which("ffmpeg") and needed:
+        kinds = ["360p"] + [kind for kind in ("720p", "1080p") if f"test_video_{kind}" in needed]
+        # Kept so pytest_unconfigure can wait for it and report its errors
+        config._media_warmup_pool = ThreadPoolExecutor(max_workers=1)
+        config._media_warmup = config._media_warmup_pool.submit(_warm_media_cache, kinds)
+
+
 @pytest.fixture
 def requires_ffmpeg():
     """Skip test if FFmpeg not available."""
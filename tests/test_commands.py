@@ -0,0 +1,524 @@
+"""
+Tests for GhostStream CommandBuilder.
+
+Tests cover:
+- Bitrate parsing helpers
+- Bufsize and bandwidth calculation
+- ABR variant selection
+- Fallback master playlist generation
+"""
+
+import pytest
+from unittest.mock import patch
+from pathlib import Path
+
+from ghoststream.transcoding.commands import CommandBuilder
+from ghoststream.transcoding.models import QualityPreset, MediaInfo
+from ghoststream.transcoding.encoders import EncoderSelector
+from ghoststream.transcoding.filters import FilterBuilder
+from ghoststream.models import Resolution
+from ghoststream.hardware import Capabilities, HWAccelType, HWAccelCapability
+from ghoststream.config import HardwareConfig, TranscodingConfig
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def builder():
+    """Create a command builder with software-only capabilities."""
+    capabilities = Capabilities(
+        hw_accels=[
+            HWAccelCapability(
+                type=HWAccelType.SOFTWARE,
+                available=True,
+                encoders=["libx264", "libx265"]
+            )
+        ]
+    )
+    hw_config = HardwareConfig()
+    return CommandBuilder(
+        "ffmpeg",
+        EncoderSelector(capabilities, hw_config),
+        FilterBuilder(),
+        TranscodingConfig(),
+        hw_config,
+    )
+
+
+@pytest.fixture
+def nvenc_builder():
+    """Create a command builder with NVENC available."""
+    capabilities = Capabilities(
+        hw_accels=[
+            HWAccelCapability(type=HWAccelType.NVENC, available=True, encoders=["h264_nvenc"]),
+            HWAccelCapability(type=HWAccelType.SOFTWARE, available=True, encoders=["libx264"]),
+        ]
+    )
+    hw_config = HardwareConfig()
+    return CommandBuilder(
+        "ffmpeg",
+        EncoderSelector(capabilities, hw_config),
+        FilterBuilder(),
+        TranscodingConfig(),
+        hw_config,
+    )
+
+
+# =============================================================================
+# BITRATE HELPER TESTS
+# =============================================================================
+
+class TestBitrateHelpers:
+    """Tests for bitrate parsing and derived values."""
+
+    def test_parse_megabits(self, builder):
+        """Should parse M suffix."""
+        assert builder._parse_bitrate("8M") == (8.0, "M")
+        assert builder._parse_bitrate("1.5m") == (1.5, "M")
+
+    def test_parse_kilobits(self, builder):
+        """Should parse k suffix."""
+        assert builder._parse_bitrate("800k") == (800.0, "k")
+        assert builder._parse_bitrate(" 128K ") == (128.0, "k")
+
+    def test_parse_bare_number_defaults_to_megabits(self, builder):
+        """Should treat a bare number as megabits."""
+        assert builder._parse_bitrate("4") == (4.0, "M")
+
+    def test_bufsize_hw_vs_sw(self, builder):
+        """Hardware encoders should get a larger buffer than software."""
+        hw = builder._get_bufsize("4M", is_hw_encoder=True)
+        sw = builder._get_bufsize("4M", is_hw_encoder=False)
+
+        assert hw.endswith("M") and sw.endswith("M")
+        assert int(hw[:-1]) > int(sw[:-1])
+
+    def test_bandwidth_bps(self, builder):
+        """Should convert bitrate strings to bits per second."""
+        assert builder._get_bandwidth_bps("8M") == 8_000_000
+        assert builder._get_bandwidth_bps("800k") == 800_000
+
+
+# =============================================================================
+# RESOLVED JOB TESTS
+# =============================================================================
+
+class TestResolveJob:
+    """Tests for sharing resolved encoder decisions across builds."""
+
+    def test_resolves_encoders_and_bitrate(self, builder):
+        """Should capture the encoder choice and target bitrate."""
+        from ghoststream.models import OutputConfig
+
+        resolved = builder.resolve_job(OutputConfig(resolution="720p"))
+
+        assert resolved.video_encoder == "libx264"
+        assert resolved.bitrate == builder._get_bitrate(Resolution.HD_720P, "auto")
+        assert not resolved.needs_tonemap
+
+    def test_builds_reuse_resolved_job(self, builder, tmp_path):
+        """Builds given a ResolvedJob should not query the encoder selector."""
+        from ghoststream.models import OutputConfig
+
+        config = OutputConfig()
+        resolved = builder.resolve_job(config)
+        with patch.object(EncoderSelector, "choose_video_encoder") as choose_video:
+            hls_cmd, _ = builder.build_hls_command("input.mkv", tmp_path, config, resolved=resolved)
+            batch_cmd, _ = builder.build_batch_command(
+                "input.mkv", tmp_path / "output.mp4", config, resolved=resolved
+            )
+
+        choose_video.assert_not_called()
+        assert hls_cmd[hls_cmd.index("-c:v") + 1] == "libx264"
+        assert batch_cmd[batch_cmd.index("-c:v") + 1] == "libx264"
+
+
+# =============================================================================
+# PROTOCOL ARGS TESTS
+# =============================================================================
+
+class TestProtocolArgs:
+    """Tests for input options."""
+
+    def test_http_sources_get_reconnect_args(self, builder):
+        """HTTP and HTTPS sources should get the reconnect options."""
+        for source in ("http://host/a.mkv", "https://host/a.mkv"):
+            args = builder._get_protocol_args(source)
+            assert args[args.index("-reconnect") + 1] == "1"
+
+    def test_local_sources_get_nothing(self, builder):
+        """Local paths should get no protocol options."""
+        assert not builder._get_protocol_args("/media/a.mkv")
+
+    def test_probed_local_sources_get_short_probe(self, builder):
+        """A source with known streams shouldn't be fully re-analyzed."""
+        args = builder._get_protocol_args("/media/a.mkv", MediaInfo(video_codec="h264"))
+        assert args[args.index("-probesize") + 1] == "1M"
+        assert args[args.index("-analyzeduration") + 1] == "2M"
+
+    def test_late_stream_containers_keep_full_probe(self, builder):
+        """MPEG-TS can announce audio late, so it must keep FFmpeg's full probe."""
+        from ghoststream.models import OutputConfig
+
+        media_info = MediaInfo(video_codec="h264", audio_codec="aac", width=1920, height=1080)
+        for source in ("/media/a.ts", "/media/a.M2TS", "/media/a.avi"):
+            assert not builder._get_protocol_args(source, media_info)
+
+        cmd, _ = builder.build_batch_command(
+            "/media/late_audio.ts", Path("/tmp/out/output.mp4"), OutputConfig(), media_info=media_info
+        )
+        assert "-probesize" not in cmd and "-analyzeduration" not in cmd
+        assert cmd[cmd.index("-i") + 1:cmd.index("-i") + 6] == [
+            "/media/late_audio.ts", "-map", "0:v:0", "-map", "0:a:0?"
+        ]
+
+    def test_http_sources_keep_their_probe_size(self, builder):
+        """HTTP options already set their own probe limits."""
+        args = builder._get_protocol_args("http://host/a.mkv", MediaInfo(video_codec="h264"))
+        assert args.count("-probesize") == 1
+
+    def test_live_sources_disable_input_buffering(self, builder):
+        """Live ingest protocols should not buffer input."""
+        args = builder._get_protocol_args("rtmp://host/live/key")
+        assert args[args.index("-fflags") + 1] == "+nobuffer"
+        assert "-probesize" not in args
+
+
+# =============================================================================
+# ABR VARIANT TESTS
+# =============================================================================
+
+class TestAbrVariants:
+    """Tests for ABR variant selection."""
+
+    def test_no_upscaling(self, builder):
+        """Should only pick variants at or below the source height."""
+        variants = builder.get_abr_variants(MediaInfo(width=1280, height=720))
+
+        assert variants
+        assert all(v.height <= 720 for v in variants)
+        assert variants[0].height == 720
+
+    def test_at_most_four_variants(self, builder):
+        """Should cap 4K sources at four variants, highest first."""
+        variants = builder.get_abr_variants(MediaInfo(width=3840, height=2160))
+
+        assert len(variants) == 4
+        assert variants[0].height == 2160
+        assert variants[-1].height == 240
+
+    def test_tiny_source_uses_smallest_preset(self, builder):
+        """Should fall back to the smallest preset for very small sources."""
+        variants = builder.get_abr_variants(MediaInfo(width=160, height=120))
+
+        assert len(variants) == 1
+        assert variants[0].height == 240
+
+    def test_returns_independent_list(self, builder):
+        """Mutating the result should not affect later calls."""
+        media_info = MediaInfo(width=1920, height=1080)
+        builder.get_abr_variants(media_info).clear()
+
+        assert builder.get_abr_variants(media_info)
+
+
+# =============================================================================
+# MASTER PLAYLIST TESTS
+# =============================================================================
+
+class TestMasterPlaylist:
+    """Tests for the fallback master playlist (no media info)."""
+
+    def test_variants_sorted_by_bandwidth(self, builder, tmp_path):
+        """Should list variants highest bandwidth first, keeping stream indices."""
+        variants = [
+            QualityPreset("480p", 854, 480, "1.5M", "128k", 23, "p4"),
+            QualityPreset("1080p", 1920, 1080, "8M", "192k", 20, "p4"),
+        ]
+
+        path = builder.generate_master_playlist(tmp_path, variants)
+        content = (tmp_path / "master.m3u8").read_text()
+        lines = content.splitlines()
+
+        assert path == str(tmp_path / "master.m3u8")
+        assert lines[0] == "#EXTM3U"
+        assert "BANDWIDTH=8000000," in lines[3]
+        assert lines[4] == "stream_1.m3u8"
+        assert "BANDWIDTH=1500000," in lines[5]
+        assert lines[6] == "stream_0.m3u8"
+        assert content.endswith("\n")
+
+    def test_overwrites_existing_playlist(self, builder, tmp_path):
+        """A shorter playlist should fully replace a previous, longer one."""
+        (tmp_path / "master.m3u8").write_text("#stale\n" * 2_000)
+        variants = [QualityPreset("480p", 854, 480, "1.5M", "128k", 23, "p4")]
+
+        builder.generate_master_playlist(tmp_path, variants)
+
+        data = (tmp_path / "master.m3u8").read_bytes()
+        assert data.startswith(b"#EXTM3U\n")
+        assert b"#stale" not in data and b"\r" not in data
+
+    def test_codecs_follow_renditions(self, builder, tmp_path):
+        """CODECS should name the rendition codecs and leave out missing audio."""
+        variants = [QualityPreset("480p", 854, 480, "1.5M", "128k", 23, "p4")]
+
+        builder.generate_master_playlist(tmp_path, variants, video_codec="libx265", audio_codec="libopus")
+        assert 'CODECS="hvc1.1.4.L93,Opus"' in (tmp_path / "master.m3u8").read_text()
+
+        builder.generate_master_playlist(tmp_path, variants, audio_codec=None)
+        codecs = (tmp_path / "master.m3u8").read_text().split('CODECS="')[1].split('"')[0]
+        assert codecs.startswith("avc1.") and "," not in codecs
+
+
+# =============================================================================
+# BATCH COMMAND TESTS
+# =============================================================================
+
+class TestBatchCommand:
+    """Tests for batch command building."""
+
+    def test_two_pass_uses_shared_default_passlog(self, builder, tmp_path):
+        """Both passes should get the same generated passlog prefix."""
+        from ghoststream.models import OutputConfig
+
+        output_path = tmp_path / "job123" / "output.mp4"
+        config = OutputConfig()
+
+        cmd1, _ = builder.build_batch_command(
+            "input.mkv", output_path, config, two_pass=True, pass_num=1
+        )
+        cmd2, _ = builder.build_batch_command(
+            "input.mkv", output_path, config, two_pass=True, pass_num=2
+        )
+
+        prefix1 = cmd1[cmd1.index("-passlogfile") + 1]
+        prefix2 = cmd2[cmd2.index("-passlogfile") + 1]
+        assert prefix1 == prefix2
+        assert prefix1.endswith("job123-output")
+
+    def test_remove_passlog_files(self, builder, tmp_path):
+        """Job cleanup should delete that job's default-location stats files only."""
+        from ghoststream.models import OutputConfig
+        from ghoststream.transcoding.commands import remove_passlog_files
+
+        with patch("ghoststream.transcoding.commands._default_passlog_dir", return_value=tmp_path):
+            cmd, _ = builder.build_batch_command(
+                "input.mkv", tmp_path / "job123" / "output.mp4", OutputConfig(),
+                two_pass=True, pass_num=1
+            )
+            prefix = Path(cmd[cmd.index("-passlogfile") + 1])
+            for suffix in ("-0.log", "-0.log.mbtree"):
+                Path(f"{prefix}{suffix}").touch()
+            (tmp_path / "job456-output-0.log").touch()
+
+            remove_passlog_files("job123")
+
+        assert prefix.parent == tmp_path
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["job456-output-0.log"]
+
+    def test_explicit_passlog_prefix_kept(self, builder, tmp_path):
+        """A caller-supplied passlog prefix should be used as-is."""
+        from ghoststream.models import OutputConfig
+
+        cmd, _ = builder.build_batch_command(
+            "input.mkv", tmp_path / "output.mp4", OutputConfig(),
+            two_pass=True, pass_num=1, passlog_prefix="/custom/prefix"
+        )
+
+        assert cmd[cmd.index("-passlogfile") + 1] == "/custom/prefix"
+
+    def test_two_pass_skipped_for_crf_without_bitrate(self):
+        """CRF encodes without a target bitrate should not use two-pass."""
+        assert not CommandBuilder._two_pass_applies("libvpx-vp9", ["-crf", "30"], None)
+        assert CommandBuilder._two_pass_applies("libvpx-vp9", ["-crf", "30"], "4M")
+        assert CommandBuilder._two_pass_applies("libx264", ["-preset", "medium"], "4M")
+
+    def test_two_pass_skipped_for_hw_encoders(self):
+        """Hardware encoders should never get -pass."""
+        assert not CommandBuilder._two_pass_applies("h264_nvenc", ["-preset", "p4"], "4M")
+
+    def test_single_pass_command_when_two_pass_skipped(self, builder, tmp_path):
+        """A skipped two-pass should produce a full single-pass command."""
+        from ghoststream.models import OutputConfig
+
+        output_path = tmp_path / "output.mp4"
+        with patch.object(CommandBuilder, "_two_pass_applies", return_value=False):
+            cmd, _ = builder.build_batch_command(
+                "input.mkv", output_path, OutputConfig(), two_pass=True, pass_num=1
+            )
+
+        assert "-pass" not in cmd
+        assert "-an" not in cmd
+        assert cmd[-1] == str(output_path)
+
+    def test_nvenc_two_pass_uses_multipass(self, tmp_path):
+        """NVENC two-pass should become a single fullres multipass encode."""
+        from ghoststream.models import OutputConfig
+
+        capabilities = Capabilities(
+            hw_accels=[
+                HWAccelCapability(type=HWAccelType.NVENC, available=True, encoders=["h264_nvenc"]),
+                HWAccelCapability(type=HWAccelType.SOFTWARE, available=True, encoders=["libx264"]),
+            ]
+        )
+        hw_config = HardwareConfig()
+        nvenc_builder = CommandBuilder(
+            "ffmpeg", EncoderSelector(capabilities, hw_config), FilterBuilder(),
+            TranscodingConfig(), hw_config,
+        )
+        output_path = tmp_path / "output.mp4"
+        config = OutputConfig(hw_accel="nvenc")
+
+        cmd, encoder = nvenc_builder.build_batch_command(
+            "input.mkv", output_path, config, two_pass=True, pass_num=1
+        )
+
+        assert encoder == "h264_nvenc"
+        assert cmd.count("-multipass") == 1
+        assert cmd[cmd.index("-multipass") + 1] == "fullres"
+        assert "-pass" not in cmd
+        assert cmd[-1] == str(output_path)
+
+
+    def test_missing_media_info_uses_defaults(self, builder, tmp_path):
+        """Without a probe, audio should be encoded as stereo."""
+        from ghoststream.models import OutputConfig
+
+        cmd, _ = builder.build_batch_command("input.mkv", tmp_path / "output.mp4", OutputConfig())
+
+        assert cmd[cmd.index("-b:a") + 1] == "128k"
+
+
+# =============================================================================
+# HLS COMMAND TESTS
+# =============================================================================
+
+class TestHlsCommand:
+    """Tests for HLS command building."""
+
+    def test_zero_fps_keeps_gop(self, builder, tmp_path):
+        """A probe that reports 0 fps should not produce a zero GOP."""
+        from ghoststream.models import OutputConfig
+
+        cmd, _ = builder.build_hls_command(
+            "input.mkv", tmp_path, OutputConfig(),
+            media_info=MediaInfo(width=1280, height=720, fps=0.0)
+        )
+
+        assert cmd[cmd.index("-g") + 1] == "60"
+
+    def test_output_paths_use_forward_slashes(self, builder, tmp_path):
+        """Playlist and segment paths should be plain posix strings."""
+        from ghoststream.models import OutputConfig
+
+        cmd, _ = builder.build_hls_command("input.mkv", tmp_path, OutputConfig())
+
+        assert cmd[-1] == f"{tmp_path.as_posix()}/master.m3u8"
+        assert cmd[cmd.index("-hls_segment_filename") + 1] == f"{tmp_path.as_posix()}/segment_%05d.ts"
+
+    def test_progress_on_stdout(self, builder, tmp_path):
+        """Progress should come as key=value pairs on stdout, not stderr stats."""
+        from ghoststream.models import OutputConfig
+
+        cmd, _ = builder.build_hls_command("input.mkv", tmp_path, OutputConfig())
+
+        assert cmd[cmd.index("-progress") + 1] == "pipe:1"
+        assert "-nostats" in cmd
+
+
+# =============================================================================
+# DEVICE FRAME TESTS
+# =============================================================================
+
+class TestHwFrameFilters:
+    """Tests for keeping hardware-decoded frames on the GPU."""
+
+    def test_scale_runs_on_device(self, nvenc_builder, tmp_path):
+        """Downscaling should use the device scaler, with no CPU format filter."""
+        from ghoststream.models import OutputConfig
+
+        cmd, encoder = nvenc_builder.build_hls_command(
+            "input.mkv", tmp_path, OutputConfig(hw_accel="nvenc", resolution=Resolution.HD_720P),
+            media_info=MediaInfo(width=1920, height=1080, fps=24.0)
+        )
+
+        assert encoder == "h264_nvenc"
+        assert cmd[cmd.index("-hwaccel_output_format") + 1] == "cuda"
+        assert cmd.index("-hwaccel") < cmd.index("-i")
+        assert cmd[cmd.index("-vf") + 1] == "scale_cuda=1280:720:format=nv12"
+
+    def test_8bit_source_needs_no_filter(self, nvenc_builder, tmp_path):
+        """Unscaled 8-bit device frames should go straight to the encoder."""
+        from ghoststream.models import OutputConfig
+
+        cmd, _ = nvenc_builder.build_batch_command(
+            "input.mkv", tmp_path / "output.mp4", OutputConfig(hw_accel="nvenc"),
+            media_info=MediaInfo(width=1920, height=1080, fps=24.0)
+        )
+
+        assert "-vf" not in cmd
+
+    def test_10bit_source_converted_on_device(self, nvenc_builder, tmp_path):
+        """10-bit device frames should be converted to nv12 by the device scaler."""
+        from ghoststream.models import OutputConfig
+
+        cmd, _ = nvenc_builder.build_batch_command(
+            "input.mkv", tmp_path / "output.mp4", OutputConfig(hw_accel="nvenc"),
+            media_info=MediaInfo(width=1920, height=1080, fps=24.0, is_10bit=True)
+        )
+
+        assert cmd[cmd.index("-vf") + 1] == "scale_cuda=iw:ih:format=nv12"
+
+    def test_software_keeps_cpu_filters(self, builder, tmp_path):
+        """Software encodes should keep the CPU scale and pixel format."""
+        from ghoststream.models import OutputConfig
+
+        cmd, _ = builder.build_hls_command(
+            "input.mkv", tmp_path, OutputConfig(resolution=Resolution.HD_720P),
+            media_info=MediaInfo(width=1920, height=1080, fps=24.0)
+        )
+
+        assert "-hwaccel" not in cmd
+        assert cmd[cmd.index("-vf") + 1].endswith("format=yuv420p")
+
+
+# =============================================================================
+# ABR RENDITION TESTS
+# =============================================================================
+
+class TestVariantHlsCommand:
+    """Tests for single-rendition ABR commands."""
+
+    def test_writes_indexed_stream(self, builder, tmp_path):
+        """Should write stream_<index> files that the master playlist points at."""
+        from ghoststream.models import OutputConfig
+
+        variant = builder.get_abr_variants(MediaInfo(width=1920, height=1080))[1]
+        cmd = builder.build_variant_hls_command(
+            "input.mkv", tmp_path, 1, variant, OutputConfig(),
+            MediaInfo(width=1920, height=1080, fps=24.0), threads=4
+        )
+
+        assert cmd[-1] == f"{tmp_path.as_posix()}/stream_1.m3u8"
+        assert cmd[cmd.index("-hls_segment_filename") + 1] == f"{tmp_path.as_posix()}/stream_1_%05d.ts"
+        assert cmd[cmd.index("-b:v") + 1] == variant.video_bitrate
+        assert cmd[cmd.index("-threads") + 1] == "4"
+        assert cmd[cmd.index("-filter_complex_threads") + 1] == "4"
+        assert cmd.index("-filter_complex_threads") < cmd.index("-filter_complex")
+        assert "-master_pl_name" not in cmd
+        assert not any(arg.startswith("-c:v:") for arg in cmd)
+
+    def test_threads_optional(self, builder, tmp_path):
+        """Should leave threading to FFmpeg when no share is given."""
+        from ghoststream.models import OutputConfig
+
+        variant = builder.get_abr_variants(MediaInfo(width=1280, height=720))[0]
+        cmd = builder.build_variant_hls_command(
+            "input.mkv", tmp_path, 0, variant, OutputConfig(), MediaInfo(width=1280, height=720)
+        )
+
+        assert "-threads" not in cmd
+        assert "-filter_complex_threads" not in cmd
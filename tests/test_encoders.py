@@ -9,7 +9,7 @@ Tests cover:
 """
 
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from ghoststream.transcoding.encoders import EncoderSelector
 from ghoststream.hardware import Capabilities, HWAccelType, HWAccelCapability, GPUInfo
@@ -132,6 +132,53 @@ class TestEncoderSelection:
         
         assert encoder == "copy"
         assert args == []
+    
+    def test_copy_skips_resolution(self, capabilities_nvenc, hw_config):
+        """COPY should return before any hardware resolution."""
+        selector = EncoderSelector(capabilities_nvenc, hw_config)
+        
+        with patch.object(EncoderSelector, "_resolve") as resolve:
+            assert selector.get_video_encoder(VideoCodec.COPY, HWAccel.NVENC) == ("copy", [])
+            assert selector.choose_video_encoder(VideoCodec.COPY, HWAccel.NVENC).family == "copy"
+        
+        resolve.assert_not_called()
+    
+    def test_encoder_maps_precomputed(self, capabilities_nvenc, hw_config):
+        """Encoder maps should be built once and be read-only."""
+        selector = EncoderSelector(capabilities_nvenc, hw_config)
+        encoder_map = selector._get_encoder_map(VideoCodec.H264)
+        
+        assert encoder_map is selector._get_encoder_map(VideoCodec.H264)
+        with pytest.raises(TypeError):
+            encoder_map[HWAccelType.NVENC] = ("x", ())
+    
+    def test_nvenc_preset_args_shared(self, capabilities_nvenc):
+        """Selectors with the same NVENC preset should share one args tuple."""
+        config = HardwareConfig(nvenc_preset="p5")
+        first = EncoderSelector(capabilities_nvenc, config)._get_encoder_map(VideoCodec.H264)
+        second = EncoderSelector(capabilities_nvenc, config)._get_encoder_map(VideoCodec.H265)
+        
+        assert first[HWAccelType.NVENC][1] is second[HWAccelType.NVENC][1]
+        assert first[HWAccelType.NVENC][1][:2] == ("-preset", "p5")
+    
+    def test_every_explicit_accel_maps_to_hw_type(self):
+        """Every requestable accel except AUTO should have a hardware type."""
+        from ghoststream.transcoding.encoders import _ACCEL_TO_HW_TYPE
+        
+        assert set(_ACCEL_TO_HW_TYPE) == set(HWAccel) - {HWAccel.AUTO}
+        assert all(hw_type.value == accel.value for accel, hw_type in _ACCEL_TO_HW_TYPE.items())
+    
+    def test_choice_reports_family(self, capabilities_nvenc, hw_config):
+        """EncoderChoice should carry the encoder family and software flag."""
+        selector = EncoderSelector(capabilities_nvenc, hw_config)
+        
+        hw = selector.choose_video_encoder(VideoCodec.H264, HWAccel.AUTO)
+        sw = selector.choose_video_encoder(VideoCodec.H264, HWAccel.SOFTWARE)
+        copy = selector.choose_video_encoder(VideoCodec.COPY, HWAccel.AUTO)
+        
+        assert (hw.name, hw.family, hw.is_software) == ("h264_nvenc", "nvenc", False)
+        assert (sw.name, sw.family, sw.is_software) == ("libx264", "software", True)
+        assert (copy.family, copy.is_software) == ("copy", False)
 
 
 # =============================================================================
@@ -196,6 +243,14 @@ class TestHWDecodeArgs:
         
         assert args == []
         assert hw_type is None
+    
+    def test_vaapi_decode_args_use_device(self, capabilities_software, hw_config):
+        """Should substitute the configured VAAPI device."""
+        selector = EncoderSelector(capabilities_software, hw_config)
+        args, hw_type = selector.get_hw_decode_args("hevc_vaapi", "/dev/dri/renderD129")
+        
+        assert args[args.index("-hwaccel_device") + 1] == "/dev/dri/renderD129"
+        assert hw_type == "vaapi"
 
 
 # =============================================================================
@@ -225,6 +280,17 @@ class TestHWAccelDetection:
         result = selector.detect_hw_accel_used("libx264")
         
         assert result == "software"
+    
+    def test_detection_is_memoized(self, capabilities_software, hw_config):
+        """Repeat lookups for an encoder name should hit the classification cache."""
+        from ghoststream.transcoding.encoders import _classify_encoder
+        
+        selector = EncoderSelector(capabilities_software, hw_config)
+        selector.detect_hw_accel_used("hevc_vaapi")
+        hits = _classify_encoder.cache_info().hits
+        
+        assert selector.detect_hw_accel_used("hevc_vaapi") == "vaapi"
+        assert _classify_encoder.cache_info().hits == hits + 1
 
 
 # =============================================================================
@@ -266,6 +332,14 @@ class TestHWErrorDetection:
         
         assert selector.is_hw_error("File not found") is False
         assert selector.is_hw_error("Invalid input") is False
+    
+    def test_every_phrase_still_detected(self, capabilities_nvenc, hw_config):
+        """Phrases folded out of the regex should still match, in any case."""
+        from ghoststream.transcoding.encoders import _HW_ERROR_SUBSTRINGS
+        selector = EncoderSelector(capabilities_nvenc, hw_config)
+        
+        for phrase in _HW_ERROR_SUBSTRINGS:
+            assert selector.is_hw_error(f"[error] {phrase.upper()} here")
 
 
 # =============================================================================
@@ -343,6 +417,13 @@ class TestMarkHWFailed:
         
         assert selector._encoder_to_hw_type("libx264") is None
         assert selector._encoder_to_hw_type("libx265") is None
+    
+    def test_encoder_to_hw_type_legacy_alias(self, capabilities_nvenc, hw_config):
+        """Should map legacy family-first names like nvenc_h264."""
+        selector = EncoderSelector(capabilities_nvenc, hw_config)
+        
+        assert selector._encoder_to_hw_type("nvenc_h264") == HWAccelType.NVENC
+        assert selector.detect_hw_accel_used("nvenc_hevc") == "nvenc"
 
 
 # =============================================================================
@@ -366,3 +447,57 @@ class TestFallbackBehavior:
         # Next selection should fallback to software
         encoder2, _ = selector.get_video_encoder(VideoCodec.H264, HWAccel.AUTO)
         assert encoder2 == "libx264"
+    
+    def test_fallback_after_repeated_failures(self, capabilities_nvenc, hw_config):
+        """Should stop selecting NVENC once it is disabled, and pick it again after reset."""
+        selector = EncoderSelector(capabilities_nvenc, hw_config)
+        
+        for _ in range(3):
+            selector.mark_hw_failed("h264_nvenc")
+        
+        encoder, _ = selector.get_video_encoder(VideoCodec.H264, HWAccel.NVENC)
+        assert encoder == "libx264"
+        
+        selector.reset_encoder("h264_nvenc")
+        
+        encoder, _ = selector.get_video_encoder(VideoCodec.H264, HWAccel.NVENC)
+        assert encoder == "h264_nvenc"
+    
+    def test_returned_args_are_independent(self, capabilities_nvenc, hw_config):
+        """Mutating returned args should not affect later selections."""
+        selector = EncoderSelector(capabilities_nvenc, hw_config)
+        
+        _, args = selector.get_video_encoder(VideoCodec.H264, HWAccel.AUTO)
+        args.append("-extra")
+        
+        _, args2 = selector.get_video_encoder(VideoCodec.H264, HWAccel.AUTO)
+        assert "-extra" not in args2
+    
+    def test_refresh_capabilities_switches_hardware(self, capabilities_software, capabilities_nvenc, hw_config):
+        """Should select from new capabilities once they are swapped in."""
+        selector = EncoderSelector(capabilities_software, hw_config)
+        selector.refresh_capabilities(capabilities_nvenc)
+        
+        encoder, _ = selector.get_video_encoder(VideoCodec.H264, HWAccel.AUTO)
+        assert encoder == "h264_nvenc"
+        
+        for _ in range(3):
+            selector.mark_hw_failed("h264_nvenc")
+        
+        assert not capabilities_nvenc.hw_accels[0].available
+    
+    def test_encoder_reenabled_after_cooldown(self, capabilities_nvenc, hw_config):
+        """A disabled encoder should come back once its cooldown has passed."""
+        selector = EncoderSelector(capabilities_nvenc, hw_config)
+        
+        with patch("ghoststream.transcoding.encoders.time.monotonic", return_value=1000.0):
+            for _ in range(3):
+                selector.mark_hw_failed("h264_nvenc")
+        
+        with patch("ghoststream.transcoding.encoders.time.monotonic", return_value=1299.0):
+            assert not selector.is_encoder_available("h264_nvenc")
+        with patch("ghoststream.transcoding.encoders.time.monotonic", return_value=1300.0):
+            assert selector.is_encoder_available("h264_nvenc")
+        
+        encoder, _ = selector.get_video_encoder(VideoCodec.H264, HWAccel.NVENC)
+        assert encoder == "h264_nvenc"
@@ -12,14 +12,18 @@ Tests cover:
 
 import asyncio
 import pytest
+from collections import deque
 import tempfile
 import sys
 from pathlib import Path
 from unittest.mock import patch, MagicMock, AsyncMock, PropertyMock
 from datetime import datetime
 
-from ghoststream.transcoding.engine import TranscodeEngine
+from ghoststream.transcoding.engine import TranscodeEngine, _collect_ts_segments, _remove_tree
 from ghoststream.transcoding.models import MediaInfo, TranscodeProgress
+from ghoststream.transcoding.ffmpeg_runner import (
+    ProgressParser, parse_progress_field, signal_process_group
+)
 
 
 # =============================================================================
@@ -182,6 +186,30 @@ class TestOutputValidation:
             assert is_valid is True
             assert error == ""
     
+    def test_validate_hls_variant_subdirs(self, engine, tmp_path):
+        """Should find segments in ABR variant subdirectories."""
+        (tmp_path / "master.m3u8").write_text("#EXTM3U\n720p/playlist.m3u8\n1080p/playlist.m3u8\n")
+        for variant in ("720p", "1080p"):
+            (tmp_path / variant).mkdir()
+            (tmp_path / variant / "segment_00000.ts").write_bytes(b'\x47' + b'\x00' * 10000)
+        
+        is_valid, error = engine._validate_hls_output(str(tmp_path / "master.m3u8"), tmp_path)
+        assert is_valid is True
+    
+    def test_collect_ts_segments(self, tmp_path):
+        """Should match glob("*.ts") + glob("*/*.ts"), top level first."""
+        (tmp_path / "a.ts").write_bytes(b"")
+        (tmp_path / "master.m3u8").write_text("")
+        (tmp_path / "720p" / "deep").mkdir(parents=True)
+        (tmp_path / "720p" / "b.ts").write_bytes(b"")
+        (tmp_path / "720p" / "deep" / "c.ts").write_bytes(b"")
+        
+        segments = _collect_ts_segments(tmp_path)
+        assert segments[0] == tmp_path / "a.ts"
+        assert sorted(segments) == sorted(
+            list(tmp_path.glob("*.ts")) + list(tmp_path.glob("*/*.ts"))
+        )
+    
     def test_validate_batch_missing_file(self, engine):
         """Should fail if output file missing."""
         is_valid, error = engine._validate_batch_output("/nonexistent/file.mp4")
@@ -210,6 +238,21 @@ class TestOutputValidation:
             assert is_valid is True
         finally:
             Path(f.name).unlink()
+    
+    @pytest.mark.asyncio
+    async def test_validate_output_dispatches_by_mode(self, engine, tmp_path):
+        """Async validation should route to the mode's validator off-loop."""
+        from ghoststream.models import TranscodeMode
+        
+        output = tmp_path / "output.mp4"
+        output.write_bytes(b"\x00" * 10000)
+        
+        assert await engine._validate_output(TranscodeMode.BATCH, str(output), tmp_path) == (True, "")
+        is_valid, error = await engine._validate_output(
+            TranscodeMode.STREAM, str(tmp_path / "master.m3u8"), tmp_path
+        )
+        assert is_valid is False
+        assert "not found" in error.lower()
 
 
 # =============================================================================
@@ -384,6 +427,183 @@ class TestProgressParsing:
         
         engine._parse_progress("time=00:00:50.00", progress, media_info)
         assert abs(progress.percent - 50.0) < 0.1
+    
+    def test_parse_full_progress_line(self, engine):
+        """Should pick up every field from a real FFmpeg status line."""
+        progress = TranscodeProgress()
+        media_info = MediaInfo(duration=100.0)
+        line = ("frame= 1200 fps= 48.0 q=28.0 size=    2048kB time=00:00:40.00 "
+                "bitrate= 419.4kbits/s speed=1.92x")
+        
+        engine._parse_progress(line, progress, media_info)
+        assert progress.frame == 1200
+        assert progress.fps == 48.0
+        assert progress.total_size == 2048 * 1024
+        assert progress.time == 40.0
+        assert progress.bitrate == "419.4kbits/s"
+        assert progress.speed == 1.92
+        assert abs(progress.percent - 40.0) < 0.1
+    
+    def test_parse_time_mmss(self, engine):
+        """Should parse MM:SS.ms time format."""
+        progress = TranscodeProgress()
+        media_info = MediaInfo(duration=100.0)
+        
+        engine._parse_progress("time=01:05.50", progress, media_info)
+        assert abs(progress.time - 65.5) < 0.01
+    
+    def test_parse_progress_pipe_block(self):
+        """Should fill progress from a -progress key=value block."""
+        progress = TranscodeProgress()
+        media_info = MediaInfo(duration=100.0)
+        block = {
+            "frame": "1200", "fps": "48.00", "bitrate": " 419.4kbits/s",
+            "total_size": "2097152", "out_time_us": "40000000",
+            "speed": "1.92x",
+        }
+        
+        for key, value in block.items():
+            assert parse_progress_field(key, value, progress, media_info) is False
+        assert parse_progress_field("progress", "continue", progress, media_info) is True
+        assert progress.frame == 1200
+        assert progress.fps == 48.0
+        assert progress.bitrate == "419.4kbits/s"
+        assert progress.total_size == 2097152
+        assert progress.time == 40.0
+        assert progress.speed == 1.92
+        assert abs(progress.percent - 40.0) < 0.1
+    
+    def test_parse_progress_pipe_na(self):
+        """Should leave fields alone on N/A values."""
+        progress = TranscodeProgress(speed=1.5)
+        
+        parse_progress_field("speed", "N/A", progress, MediaInfo())
+        parse_progress_field("out_time_us", "N/A", progress, MediaInfo())
+        assert progress.speed == 1.5
+        assert progress.time == 0.0
+    
+    def test_parse_progress_pipe_negative_time(self):
+        """Should ignore the INT64_MIN placeholder sent before the first frame."""
+        progress = TranscodeProgress(time=3.0)
+        
+        parse_progress_field("out_time_us", "-9223372036854775807", progress, MediaInfo())
+        assert progress.time == 3.0
+    
+    @pytest.mark.asyncio
+    async def test_read_stdout_progress_blocks(self, engine):
+        """Should publish one update per block, split across reads."""
+        stream = asyncio.StreamReader()
+        stream.feed_data(b"frame=10\nout_time_us=5000")
+        stream.feed_data(b"000\nprogress=continue\nframe=20\nprogress=end\n")
+        stream.feed_eof()
+        process = MagicMock(stdout=stream)
+        state = {"stdout_bytes": 0, "last_progress_time": 0.0}
+        progress = TranscodeProgress()
+        parser = ProgressParser(throttle_interval=0.0)
+        updates = []
+        
+        await engine._read_stdout(
+            process, state, progress, parser, MediaInfo(duration=10.0),
+            lambda p: updates.append(p.frame), "[test]"
+        )
+        assert updates == [10, 20]
+        assert progress.time == 5.0
+        assert state["stdout_bytes"] == 0
+        assert state["last_progress_time"] > 0
+    
+    @pytest.mark.asyncio
+    async def test_read_stdout_headless_only_stamps_progress(self, engine):
+        """Without a callback, blocks should only feed the stall watchdog."""
+        stream = asyncio.StreamReader()
+        stream.feed_data(b"frame=10\nout_time_us=5000000\nprogress=continue\n")
+        stream.feed_eof()
+        state = {"stdout_bytes": 0, "last_progress_time": 0.0}
+        progress = TranscodeProgress()
+        
+        await engine._read_stdout(
+            MagicMock(stdout=stream), state, progress, ProgressParser(),
+            MediaInfo(duration=10.0), None, "[test]"
+        )
+        assert progress.frame == 0
+        assert state["last_progress_time"] > 0
+        assert state["stdout_bytes"] == 0
+    
+    def test_callback_throttle_tracks_held_update(self):
+        """Throttled updates should be reported once as pending."""
+        parser = ProgressParser(throttle_interval=60.0)
+        progress = TranscodeProgress()
+        media_info = MediaInfo()
+        
+        assert parser.should_callback() is True
+        assert parser.take_pending(progress, media_info) is False
+        assert parser.should_callback() is False
+        assert parser.take_pending(progress, media_info) is True
+        assert parser.take_pending(progress, media_info) is False
+    
+    def test_throttled_line_parsed_only_on_flush(self):
+        """A line held back by the throttle should be parsed when flushed."""
+        parser = ProgressParser(throttle_interval=60.0)
+        progress = TranscodeProgress()
+        media_info = MediaInfo(duration=100.0)
+        
+        parser.should_callback()
+        assert parser.should_callback() is False
+        parser.defer(b"frame=  300 time=00:00:10.00\n")
+        assert progress.frame == 0
+        
+        assert parser.take_pending(progress, media_info) is True
+        assert progress.frame == 300
+        assert abs(progress.percent - 10.0) < 0.1
+    
+    @pytest.mark.asyncio
+    async def test_stdout_piped_only_for_progress(self, engine):
+        """Commands without -progress should not get a stdout pipe."""
+        with patch("asyncio.create_subprocess_exec", AsyncMock()) as spawn:
+            await engine._spawn_ffmpeg_process(["ffmpeg", "-progress", "pipe:1", "-i", "a"], "[test]")
+            assert spawn.call_args.kwargs["stdout"] == asyncio.subprocess.PIPE
+            
+            await engine._spawn_ffmpeg_process(["ffmpeg", "-i", "a"], "[test]")
+            assert spawn.call_args.kwargs["stdout"] == asyncio.subprocess.DEVNULL
+    
+    @pytest.mark.asyncio
+    async def test_read_stderr_survives_long_lines(self, engine):
+        """A line past asyncio's 64KiB default should not stop the reader."""
+        from ghoststream.transcoding.constants import STDERR_LINE_LIMIT
+        
+        with patch("asyncio.create_subprocess_exec", AsyncMock()) as spawn:
+            await engine._spawn_ffmpeg_process(["ffmpeg", "-i", "a"], "[test]")
+        assert spawn.call_args.kwargs["limit"] == STDERR_LINE_LIMIT
+        
+        stream = asyncio.StreamReader(limit=STDERR_LINE_LIMIT)
+        stream.feed_data(b"x" * 100_000 + b"\n")
+        stream.feed_data(b"frame=  300 fps=30 time=00:00:10.00 speed=1.0x\n")
+        stream.feed_eof()
+        state = {"stderr_lines": deque(), "stderr_early": [], "last_progress_time": 0.0}
+        
+        await engine._read_stderr(
+            MagicMock(stderr=stream), state, TranscodeProgress(), ProgressParser(),
+            MediaInfo(duration=100.0), None, "[test]"
+        )
+        assert len(state["stderr_lines"]) == 2
+        assert state["last_progress_time"] > 0
+    
+    @pytest.mark.asyncio
+    async def test_read_stderr_buffers_raw_lines(self, engine):
+        """Should keep raw stderr bytes and still parse stats lines."""
+        stream = asyncio.StreamReader()
+        stream.feed_data("Stream #0:0: Vidéo: h264\n".encode())
+        stream.feed_data(b"frame=  120 fps=30 time=00:00:04.00 speed=1.0x\n")
+        stream.feed_eof()
+        state = {"stderr_lines": deque(maxlen=10), "stderr_early": [], "last_progress_time": 0.0}
+        progress = TranscodeProgress()
+        
+        await engine._read_stderr(
+            MagicMock(stderr=stream), state, progress, ProgressParser(),
+            MediaInfo(duration=8.0), lambda p: None, "[test]"
+        )
+        assert progress.frame == 120
+        assert abs(progress.percent - 50.0) < 0.1
+        assert b"".join(state["stderr_lines"]).decode().startswith("Stream #0:0: Vidéo")
 
 
 # =============================================================================
@@ -443,5 +663,497 @@ class TestGracefulTermination:
         
         # Should have attempted to send a signal
         assert mock_process.send_signal.called or mock_process.terminate.called
+    
+    @pytest.mark.asyncio
+    async def test_stall_does_not_wait_on_blocked_readers(self, engine):
+        """After a stall kill, readers stuck on open pipes should be cancelled."""
+        reader_cancelled = asyncio.Event()
+        
+        async def blocked_reader(*args):
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                reader_cancelled.set()
+                raise
+        
+        async def stalled_monitor(process, state, *args):
+            state["stalled"] = True
+        
+        process = MagicMock(stdout=None, returncode=-2, wait=AsyncMock(return_value=-2))
+        with patch.object(engine, "_spawn_ffmpeg_process", AsyncMock(return_value=process)), \
+             patch.object(engine, "_read_stderr", blocked_reader), \
+             patch.object(engine, "_monitor_stall_and_cancel", stalled_monitor), \
+             patch("ghoststream.transcoding.engine.READER_DRAIN_TIMEOUT", 0.01):
+            return_code, error_output = await asyncio.wait_for(
+                engine._run_ffmpeg(["ffmpeg"], MediaInfo(duration=10.0), None, None), timeout=5.0
+            )
+        
+        assert reader_cancelled.is_set()
+        assert return_code == -2
+        process.wait.assert_not_awaited()  # Already exited, nothing to wait for
+        assert error_output.startswith("[STALLED")
+    
+    @pytest.mark.asyncio
+    async def test_exit_wait_only_for_unreaped_process(self, engine):
+        """The post-exit wait should only run if the child hasn't been reaped."""
+        async def exited_monitor(process, state, *args):
+            pass
+        
+        async def no_output(*args):
+            pass
+        
+        reaped = MagicMock(stdout=None, returncode=0, wait=AsyncMock(return_value=0))
+        
+        unreaped = MagicMock(stdout=None, returncode=None)
+        async def reap():
+            unreaped.returncode = 1
+            return 1
+        unreaped.wait = AsyncMock(side_effect=reap)
+        
+        with patch.object(engine, "_spawn_ffmpeg_process", AsyncMock(side_effect=[reaped, unreaped])), \
+             patch.object(engine, "_read_stderr", no_output), \
+             patch.object(engine, "_monitor_stall_and_cancel", exited_monitor):
+            first, _ = await engine._run_ffmpeg(["ffmpeg"], MediaInfo(duration=10.0), None, None)
+            second, _ = await engine._run_ffmpeg(["ffmpeg"], MediaInfo(duration=10.0), None, None)
+        
+        assert (first, second) == (0, 1)
+        reaped.wait.assert_not_awaited()
+        unreaped.wait.assert_awaited_once()
+    
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX process groups")
+    async def test_group_kill_reaches_helper_processes(self, engine):
+        """Killing FFmpeg's group should also stop children holding its pipes."""
+        import signal
+        
+        script = (
+            "import subprocess, sys, time; "
+            "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)']); "
+            "time.sleep(60)"
+        )
+        process = await engine._spawn_ffmpeg_process([sys.executable, "-c", script], "[test]")
+        await asyncio.sleep(0.5)  # let the helper start
+        
+        signal_process_group(process, signal.SIGKILL)
+        
+        # wait() only returns once every holder of the stderr pipe is gone
+        await asyncio.wait_for(process.wait(), timeout=5.0)
+        assert process.returncode == -signal.SIGKILL
+    
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX process groups")
+    async def test_exit_hook_kills_spawned_sessions(self, engine):
+        """The atexit hook should reap FFmpeg sessions the cancel path never stopped."""
+        import signal
+        from ghoststream.transcoding.ffmpeg_runner import kill_process_groups
+        
+        process = await engine._spawn_ffmpeg_process(
+            [sys.executable, "-c", "import time; time.sleep(60)"], "[test]"
+        )
+        
+        kill_process_groups()
+        
+        await asyncio.wait_for(process.wait(), timeout=5.0)
+        assert process.returncode == -signal.SIGKILL
+
 
 
+
+# =============================================================================
+# HARDWARE FALLBACK TESTS
+# =============================================================================
+
+class TestHardwareFallback:
+    """Tests for the per-job software fallback rebuild."""
+    
+    @pytest.fixture
+    def engine(self):
+        """Create engine with mocked dependencies."""
+        with patch('ghoststream.transcoding.engine.get_capabilities') as mock_caps, \
+             patch('ghoststream.transcoding.engine.get_config') as mock_config:
+            
+            mock_config.return_value = MagicMock(
+                transcoding=MagicMock(
+                    ffmpeg_path="ffmpeg",
+                    temp_directory="./temp",
+                    max_concurrent_jobs=2,
+                    stall_timeout=120,
+                    segment_duration=4,
+                    retry_count=3,
+                    validate_segments=True,
+                ),
+                hardware=MagicMock()
+            )
+            
+            mock_caps.return_value = MagicMock(
+                hw_accels=[],
+                get_best_hw_accel=MagicMock(return_value=MagicMock(value="software"))
+            )
+            
+            with patch('shutil.which', return_value='ffmpeg'):
+                return TranscodeEngine()
+    
+    @pytest.mark.asyncio
+    async def test_rebuild_keeps_job_inputs(self, engine, tmp_path):
+        """The software rebuild should keep the seek point and subtitles."""
+        from ghoststream.models import OutputConfig, TranscodeMode
+        from ghoststream.transcoding.job_context import JobContext
+        
+        subtitles = [MagicMock()]
+        context = JobContext(job_id="job-1234", source="http://host/a.mkv", job_dir=tmp_path)
+        rebuilt = (["ffmpeg", "-i", "http://host/a.mkv"], "libx264", str(tmp_path / "master.m3u8"))
+        
+        with patch.object(engine, "_run_ffmpeg", AsyncMock(side_effect=[(1, "hw"), (0, "")])), \
+             patch.object(engine, "_classify_error", return_value=(None, "hardware")), \
+             patch.object(engine, "_async_cleanup_dir", AsyncMock()), \
+             patch.object(engine, "_validate_output", AsyncMock(return_value=(True, ""))), \
+             patch.object(engine, "_build_transcode_command", return_value=rebuilt) as build:
+            success, _, _ = await engine._execute_with_retry(
+                ["ffmpeg"], "h264_nvenc", str(tmp_path / "master.m3u8"),
+                TranscodeMode.STREAM, context, MediaInfo(duration=60.0), OutputConfig(),
+                None, None, start_time=42.0, subtitles=subtitles
+            )
+        
+        assert success is True
+        args = build.call_args.args
+        assert args[1] == "http://host/a.mkv"
+        assert args[4] == 42.0
+        assert args[6] is subtitles
+    
+    @pytest.mark.asyncio
+    async def test_cleanup_empties_job_dir(self, engine, tmp_path):
+        """Partial-output cleanup should leave an empty job directory."""
+        job_dir = tmp_path / "job"
+        (job_dir / "720p").mkdir(parents=True)
+        (job_dir / "master.m3u8").write_text("#EXTM3U\n")
+        (job_dir / "720p" / "segment_00000.ts").write_bytes(b"\x47")
+        
+        await engine._async_cleanup_dir(job_dir)
+        
+        assert job_dir.is_dir()
+        assert not any(job_dir.iterdir())
+    
+    @pytest.mark.asyncio
+    async def test_cleanup_recreates_missing_dir(self, engine, tmp_path):
+        """Cleaning a job directory that is gone should leave an empty one."""
+        job_dir = tmp_path / "job"
+        
+        await engine._async_cleanup_dir(job_dir)
+        
+        assert job_dir.is_dir()
+    
+    def test_file_growth_counts_variant_dirs(self, engine, tmp_path):
+        """Growth checks should sum segment sizes across variant subdirs."""
+        (tmp_path / "720p").mkdir()
+        (tmp_path / "master.m3u8").write_bytes(b"x" * 10)
+        (tmp_path / "720p" / "segment_00000.ts").write_bytes(b"x" * 100)
+        
+        assert engine._check_file_growth(tmp_path, 50) == (110, True)
+        assert engine._check_file_growth(tmp_path, 110) == (110, False)
+        assert engine._check_file_growth(tmp_path / "missing", 7) == (7, False)
+    
+    def test_remove_tree_deletes_variant_dirs(self, tmp_path):
+        """Job directory removal should take nested variant dirs with it."""
+        job_dir = tmp_path / "job"
+        (job_dir / "1080p").mkdir(parents=True)
+        (job_dir / "master.m3u8").write_text("#EXTM3U\n")
+        (job_dir / "1080p" / "segment_00000.ts").write_bytes(b"\x47")
+        
+        _remove_tree(str(job_dir))
+        _remove_tree(str(job_dir))  # already gone: no error
+        
+        assert not job_dir.exists()
+    
+    @pytest.mark.asyncio
+    async def test_job_cleanup_uses_cleanup_pool(self, engine, tmp_path):
+        """Job deletion should run off the shared I/O pool."""
+        import threading
+        
+        engine.temp_dir = tmp_path
+        (tmp_path / "job-1" / "seg.ts").parent.mkdir()
+        (tmp_path / "job-1" / "seg.ts").write_bytes(b"\x47")
+        threads = []
+        
+        with patch("ghoststream.transcoding.engine._remove_tree",
+                   side_effect=lambda path: threads.append(threading.current_thread().name)):
+            await engine.cleanup_job_async("job-1")
+        
+        assert threads and threads[0].startswith("ghoststream_cleanup")
+    
+    @pytest.mark.asyncio
+    async def test_transient_retry_classifies_once(self, engine, tmp_path):
+        """A transient failure should be classified once, then retried."""
+        from ghoststream.models import OutputConfig, TranscodeMode
+        from ghoststream.transcoding.job_context import JobContext
+        
+        context = JobContext(job_id="job-5678", source="http://host/a.mkv", job_dir=tmp_path)
+        classify = MagicMock(wraps=engine._classify_error)
+        
+        with patch.object(engine, "_run_ffmpeg", AsyncMock(side_effect=[(1, "Connection refused"), (0, "")])), \
+             patch.object(engine, "_classify_error", classify), \
+             patch.object(engine, "_async_cleanup_dir", AsyncMock()), \
+             patch.object(engine, "_validate_output", AsyncMock(return_value=(True, ""))), \
+             patch("ghoststream.transcoding.engine.asyncio.sleep", AsyncMock()):
+            success, _, _ = await engine._execute_with_retry(
+                ["ffmpeg"], "libx264", str(tmp_path / "master.m3u8"),
+                TranscodeMode.STREAM, context, MediaInfo(duration=60.0), OutputConfig(),
+                None, None
+            )
+        
+        assert success is True
+        assert classify.call_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_cancelled_pynvc_job_recorded_as_cancelled(self, engine, tmp_path):
+        """A cancelled PyNvVideoCodec job should not be recorded as failed."""
+        from ghoststream.models import OutputConfig, OutputFormat, TranscodeMode
+        
+        engine.config.hardware.use_pynvc = True
+        cancel_event = asyncio.Event()
+        cancel_event.set()
+        media_info = MediaInfo(duration=60.0)
+        update = AsyncMock()
+        
+        with patch.object(engine, "_prepare_job", AsyncMock(return_value=(media_info, tmp_path, None))), \
+             patch.object(engine, "_try_pynvc_transcode", AsyncMock(return_value=(False, "Cancelled", None))), \
+             patch.object(engine._job_registry, "update_status", update):
+            result = await engine.transcode(
+                "job-nvc1", "input.mkv", TranscodeMode.BATCH,
+                OutputConfig(format=OutputFormat.MP4), cancel_event=cancel_event
+            )
+        
+        assert result == (False, "Cancelled", None)
+        assert update.await_args_list[-1].args[1] == "cancelled"
+    
+    @pytest.mark.asyncio
+    async def test_abr_variants_run_as_separate_processes(self, engine, tmp_path):
+        """Each rendition should get its own FFmpeg run behind one master playlist."""
+        from ghoststream.models import OutputConfig
+        from ghoststream.transcoding.job_context import JobContext
+        
+        media_info = MediaInfo(width=1920, height=1080, duration=60.0)
+        variants = engine.get_abr_variants(media_info)
+        context = JobContext(job_id="job-abr1", source="input.mkv", job_dir=tmp_path)
+        callback = MagicMock()
+        
+        with patch.object(engine, "_run_ffmpeg", AsyncMock(return_value=(0, ""))) as run:
+            result = await engine._run_abr_variants(
+                "input.mkv", tmp_path, OutputConfig(), media_info, 0, variants,
+                engine.resolve_job(OutputConfig(), media_info), callback, None, context
+            )
+        
+        assert result == (0, "")
+        assert (tmp_path / "master.m3u8").exists()
+        assert run.await_count == len(variants)
+        outputs = {call.args[0][-1] for call in run.await_args_list}
+        assert outputs == {f"{tmp_path.as_posix()}/stream_{i}.m3u8" for i in range(len(variants))}
+        callbacks = [call.args[2] for call in run.await_args_list]
+        assert callbacks.count(callback) == 1
+    
+    @pytest.mark.asyncio
+    async def test_abr_variant_failure_stops_the_rest(self, engine, tmp_path):
+        """The first failing rendition should be reported and stop the others."""
+        from ghoststream.models import OutputConfig
+        from ghoststream.transcoding.job_context import JobContext
+        
+        media_info = MediaInfo(width=1920, height=1080, duration=60.0)
+        variants = engine.get_abr_variants(media_info)
+        context = JobContext(job_id="job-abr2", source="input.mkv", job_dir=tmp_path)
+        
+        async def run_ffmpeg(cmd, media_info, callback, abort, job_context=None):
+            if cmd[-1].endswith("stream_0.m3u8"):
+                return 1, "encoder error"
+            await abort.wait()
+            return 255, "[CANCELLED]"
+        
+        with patch.object(engine, "_run_ffmpeg", side_effect=run_ffmpeg), \
+             patch("ghoststream.transcoding.engine.os.cpu_count", return_value=len(variants)):
+            result = await engine._run_abr_variants(
+                "input.mkv", tmp_path, OutputConfig(), media_info, 0, variants,
+                engine.resolve_job(OutputConfig(), media_info), None, None, context
+            )
+        
+        assert result == (1, "encoder error")
+    
+    @pytest.mark.asyncio
+    async def test_abr_variants_master_playlist_matches_codecs(self, engine, tmp_path):
+        """An HEVC software ABR job with copied audio should advertise what it encodes."""
+        from ghoststream.models import OutputConfig, VideoCodec, AudioCodec, HWAccel
+        from ghoststream.transcoding.job_context import JobContext
+        
+        config = OutputConfig(
+            video_codec=VideoCodec.H265, audio_codec=AudioCodec.COPY, hw_accel=HWAccel.SOFTWARE
+        )
+        media_info = MediaInfo(width=1920, height=1080, duration=60.0,
+                               audio_codec="ac3", audio_channels=6)
+        variants = engine.get_abr_variants(media_info)
+        resolved = engine.resolve_job(config, media_info)
+        context = JobContext(job_id="job-abr3", source="input.mkv", job_dir=tmp_path)
+        assert resolved.video_encoder == "libx265"
+        
+        with patch.object(engine, "_run_ffmpeg", AsyncMock(return_value=(0, ""))):
+            await engine._run_abr_variants(
+                "input.mkv", tmp_path, config, media_info, 0, variants,
+                resolved, None, None, context
+            )
+        
+        codecs = [line.split('CODECS="')[1].split('"')[0]
+                  for line in (tmp_path / "master.m3u8").read_text().splitlines()
+                  if line.startswith("#EXT-X-STREAM-INF")]
+        assert len(codecs) == len(variants)
+        assert all(c.startswith("hvc1.") and c.endswith(",ac-3") for c in codecs)
+    
+    @pytest.mark.asyncio
+    async def test_parallel_abr_skips_single_process_command(self, engine, tmp_path):
+        """The parallel ABR path should not build the unused single-process command."""
+        from ghoststream.models import OutputConfig, HWAccel
+        
+        engine.temp_dir = tmp_path
+        media_info = MediaInfo(width=1920, height=1080, duration=60.0, audio_codec="aac")
+        
+        with patch.object(engine, "get_media_info", AsyncMock(return_value=media_info)), \
+             patch.object(engine, "get_optimal_presets", return_value=engine.get_abr_variants(media_info)), \
+             patch.object(engine, "build_abr_command") as build, \
+             patch.object(engine, "_run_abr_variants", AsyncMock(return_value=(0, ""))) as run:
+            await engine.transcode_abr(
+                "job-abr4", "input.mkv", OutputConfig(hw_accel=HWAccel.SOFTWARE)
+            )
+        
+        run.assert_awaited_once()
+        build.assert_not_called()
+
+
+# =============================================================================
+# ADAPTIVE SELECTOR TESTS
+# =============================================================================
+
+class TestAdaptiveSelector:
+    """Tests for the engine's cached adaptive quality selector."""
+    
+    @pytest.fixture
+    def engine(self):
+        """Create engine with mocked dependencies and a stub profiler."""
+        from ghoststream.transcoding.adaptive import SystemProfile
+        
+        with patch('ghoststream.transcoding.engine.get_capabilities') as mock_caps, \
+             patch('ghoststream.transcoding.engine.get_config') as mock_config:
+            
+            mock_config.return_value = MagicMock(
+                transcoding=MagicMock(
+                    ffmpeg_path="ffmpeg",
+                    temp_directory="./temp",
+                    max_concurrent_jobs=2,
+                    stall_timeout=120,
+                    segment_duration=4,
+                    retry_count=3,
+                    validate_segments=True,
+                ),
+                hardware=MagicMock()
+            )
+            
+            mock_caps.return_value = MagicMock(
+                hw_accels=[],
+                get_best_hw_accel=MagicMock(return_value=MagicMock(value="software"))
+            )
+            
+            with patch('shutil.which', return_value='ffmpeg'):
+                engine = TranscodeEngine()
+        
+        engine.hardware_profiler = MagicMock(
+            get_profile=MagicMock(side_effect=lambda force_refresh=False: SystemProfile())
+        )
+        return engine
+    
+    def test_selector_is_reused(self, engine):
+        """Repeated preset queries should share one selector."""
+        selector = engine.get_adaptive_quality_selector()
+        
+        engine.get_optimal_presets(MediaInfo(width=1920, height=1080))
+        assert engine.get_adaptive_quality_selector() is selector
+        assert engine.hardware_profiler.get_profile.call_count == 1
+    
+    def test_refresh_rebuilds_selector(self, engine):
+        """Refreshing the profile should drop the selector built on the old one."""
+        selector = engine.get_adaptive_quality_selector()
+        
+        profile = engine.refresh_hardware_profile()
+        assert engine.get_adaptive_quality_selector() is not selector
+        assert engine.get_adaptive_quality_selector().profile is profile
+
+
+# =============================================================================
+# PROBE CACHE TESTS
+# =============================================================================
+
+class TestProbeCache:
+    """Tests for reusing probe results per source."""
+    
+    @pytest.fixture
+    def engine(self):
+        """Create engine with mocked dependencies."""
+        with patch('ghoststream.transcoding.engine.get_capabilities') as mock_caps, \
+             patch('ghoststream.transcoding.engine.get_config') as mock_config:
+            
+            mock_config.return_value = MagicMock(
+                transcoding=MagicMock(
+                    ffmpeg_path="ffmpeg",
+                    temp_directory="./temp",
+                    max_concurrent_jobs=2,
+                    stall_timeout=120,
+                    segment_duration=4,
+                    retry_count=3,
+                    validate_segments=True,
+                ),
+                hardware=MagicMock()
+            )
+            
+            mock_caps.return_value = MagicMock(
+                hw_accels=[],
+                get_best_hw_accel=MagicMock(return_value=MagicMock(value="software"))
+            )
+            
+            with patch('shutil.which', return_value='ffmpeg'):
+                return TranscodeEngine()
+    
+    @pytest.mark.asyncio
+    async def test_repeat_probe_is_reused(self, engine):
+        """A second lookup for the same source should not run ffprobe again."""
+        info = MediaInfo(duration=60.0, width=1920, height=1080)
+        
+        with patch.object(engine.probe, "get_media_info", AsyncMock(return_value=info)) as probe:
+            first = await engine.get_media_info("http://host/a.mkv")
+            second = await engine.get_media_info("http://host/a.mkv")
+        
+        assert first is second is info
+        assert probe.await_count == 1
+    
+    @pytest.mark.asyncio
+    async def test_failed_probe_not_cached(self, engine):
+        """A probe that found no duration should be retried next time."""
+        with patch.object(engine.probe, "get_media_info", AsyncMock(return_value=MediaInfo())) as probe:
+            await engine.get_media_info("http://host/a.mkv")
+            await engine.get_media_info("http://host/a.mkv")
+        
+        assert probe.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_expired_probe_refreshed(self, engine):
+        """Entries older than the TTL should be probed again."""
+        info = MediaInfo(duration=60.0)
+        
+        with patch.object(engine.probe, "get_media_info", AsyncMock(return_value=info)) as probe, \
+             patch("ghoststream.transcoding.engine.time.monotonic", side_effect=[0.0, 100.0, 100.0]):
+            await engine.get_media_info("http://host/a.mkv")
+            await engine.get_media_info("http://host/a.mkv")
+        
+        assert probe.await_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self, engine):
+        """The oldest source should be evicted once the cache is full."""
+        with patch.object(engine.probe, "get_media_info", AsyncMock(return_value=MediaInfo(duration=1.0))), \
+             patch("ghoststream.transcoding.engine.PROBE_CACHE_SIZE", 2):
+            for name in ("a", "b", "c"):
+                await engine.get_media_info(f"/media/{name}.mkv")
+        
+        assert list(engine._probe_cache) == ["/media/b.mkv", "/media/c.mkv"]
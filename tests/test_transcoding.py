@@ -20,6 +20,8 @@ from ghoststream.transcoding import (
     get_bitrate_map,
     # Classes
     FilterBuilder,
+    FFmpegError,
+    ErrorClassifier,
     EncoderSelector,
     # Adaptive
     HardwareTier,
@@ -196,6 +198,140 @@ class TestFilterBuilder:
         )
         assert result is not None
         assert "scale" in result
+    
+    def test_abr_filter_cuda_stays_on_gpu(self, builder):
+        """CUDA frames should be split and scaled with scale_cuda, no CPU filters."""
+        media_info = MediaInfo(width=1920, height=800)
+        variants = [QUALITY_LADDER[2], QUALITY_LADDER[4]]  # 1080p, 720p
+        
+        parts = builder.build_abr_filter_complex(
+            variants, media_info, False, "h264_nvenc", hw_frames="cuda"
+        )
+        
+        assert parts[0] == "[0:v]split=2[s0][s1]"
+        assert parts[1] == "[s0]scale_cuda=1920:800:format=nv12[v0]"
+        assert parts[2] == "[s1]scale_cuda=1280:532:format=nv12[v1]"
+        assert not any("pad=" in p or "format=yuv420p" in p for p in parts)
+    
+    def test_abr_filter_tonemap_uses_cpu(self, builder):
+        """Tonemapping should keep the CPU scale/pad path even with hw frames."""
+        media_info = MediaInfo(width=3840, height=2160)
+        with patch.object(builder, 'check_filter_available', return_value=True):
+            parts = builder.build_abr_filter_complex(
+                [QUALITY_LADDER[2]], media_info, True, "h264_nvenc", hw_frames="cuda"
+            )
+        
+        assert "scale_cuda" not in ";".join(parts)
+        assert "pad=" in parts[1]
+
+
+# =============================================================================
+# PYNVC PIPELINE TESTS
+# =============================================================================
+
+class TestPyNvcPipelineBuilder:
+    """Tests for the optional PyNvVideoCodec pipeline builder."""
+    
+    @pytest.fixture
+    def builder(self):
+        from ghoststream.config import HardwareConfig
+        from ghoststream.transcoding.pynvc import PyNvcPipelineBuilder
+        
+        capabilities = Capabilities(
+            hw_accels=[
+                HWAccelCapability(type=HWAccelType.NVENC, available=True, encoders=["h264_nvenc"]),
+                HWAccelCapability(type=HWAccelType.SOFTWARE, available=True, encoders=["libx264"]),
+            ]
+        )
+        return PyNvcPipelineBuilder("ffmpeg", EncoderSelector(capabilities, HardwareConfig()))
+    
+    @pytest.fixture
+    def media_info(self):
+        return MediaInfo(
+            duration=60.0, width=1920, height=1080, fps=24.0, video_codec="h264", audio_codec="aac"
+        )
+    
+    def test_requires_package(self, builder, media_info):
+        """Should never claim a job when PyNvVideoCodec is missing."""
+        from ghoststream.models import OutputConfig, OutputFormat
+        
+        with patch('ghoststream.transcoding.pynvc.HAS_PYNVC', False):
+            assert not builder.can_build("in.mkv", OutputConfig(format=OutputFormat.MP4), media_info)
+    
+    def test_eligibility(self, builder, media_info):
+        """Should only take unscaled, non-HDR NVENC batch jobs."""
+        from ghoststream.models import OutputConfig, OutputFormat, Resolution
+        
+        with patch('ghoststream.transcoding.pynvc.HAS_PYNVC', True):
+            assert builder.can_build("in.mkv", OutputConfig(format=OutputFormat.MP4), media_info)
+            assert not builder.can_build(
+                "in.mkv", OutputConfig(format=OutputFormat.MP4, resolution=Resolution.HD_720P), media_info
+            )
+            assert not builder.can_build("in.mkv", OutputConfig(format=OutputFormat.MP4), media_info, start_time=5)
+            assert not builder.can_build("in.mkv", OutputConfig(format=OutputFormat.HLS), media_info)
+            assert not builder.can_build(
+                "in.mkv", OutputConfig(format=OutputFormat.MP4, hw_accel="software"), media_info
+            )
+    
+    def test_build_descriptor(self, builder, media_info, tmp_path):
+        """Should describe audio extract and stream-copy mux around the GPU encode."""
+        from ghoststream.models import OutputConfig, OutputFormat
+        
+        output_path = tmp_path / "output.mp4"
+        pipeline = builder.build("in.mkv", output_path, OutputConfig(format=OutputFormat.MP4), media_info, "8M")
+        
+        assert pipeline.encoder_codec == "h264"
+        assert (pipeline.width, pipeline.height) == (1920, 1080)
+        assert pipeline.audio_cmd[-1] == str(pipeline.audio_path)
+        assert "-vn" in pipeline.audio_cmd
+        assert pipeline.mux_cmd[-1] == str(output_path)
+        assert pipeline.mux_cmd[pipeline.mux_cmd.index("-c") + 1] == "copy"
+        assert str(pipeline.audio_path) in pipeline.mux_cmd
+    
+    def test_ntsc_frame_rate_kept_exact(self, builder, media_info, tmp_path):
+        """NTSC sources should be stamped with their exact rational rate."""
+        from ghoststream.models import OutputConfig, OutputFormat
+        
+        media_info.fps = 24000 / 1001
+        pipeline = builder.build(
+            "in.mkv", tmp_path / "output.mp4", OutputConfig(format=OutputFormat.MP4), media_info, "8M"
+        )
+        
+        assert (pipeline.frame_rate.numerator, pipeline.frame_rate.denominator) == (24000, 1001)
+        assert pipeline.mux_cmd[pipeline.mux_cmd.index("-framerate") + 1] == "24000/1001"
+    
+    def test_encoder_budget_matches_exact_rate(self, builder, media_info, tmp_path):
+        """The whole-number encoder rate should get a bitrate scaled to the real rate."""
+        from ghoststream.models import OutputConfig, OutputFormat
+        from ghoststream.transcoding.pynvc import run_pynvc_video
+        
+        media_info.fps = 30000 / 1001
+        pipeline = builder.build(
+            "in.mkv", tmp_path / "output.mp4", OutputConfig(format=OutputFormat.MP4), media_info, "8M"
+        )
+        nvc = MagicMock()
+        nvc.CreateDemuxer.return_value.__iter__.return_value = iter(())
+        
+        with patch('ghoststream.transcoding.pynvc.HAS_PYNVC', True), \
+             patch('ghoststream.transcoding.pynvc.nvc', nvc):
+            run_pynvc_video(pipeline)
+        
+        kwargs = nvc.CreateEncoder.call_args.kwargs
+        assert kwargs["fps"] == 30
+        assert kwargs["bitrate"] == round(8_000_000 * 30 * 1001 / 30000)
+    
+    def test_build_descriptor_without_audio(self, builder, media_info, tmp_path):
+        """A silent source should skip the audio extract and mux video alone."""
+        from ghoststream.models import OutputConfig, OutputFormat
+        
+        media_info.audio_codec = ""
+        pipeline = builder.build(
+            "in.mkv", tmp_path / "output.mp4", OutputConfig(format=OutputFormat.MP4), media_info, "8M"
+        )
+        
+        assert pipeline.audio_cmd is None
+        assert str(pipeline.audio_path) not in pipeline.mux_cmd
+        assert pipeline.mux_cmd.count("-i") == 1
 
 
 # =============================================================================
@@ -457,6 +593,166 @@ class TestHardwareProfiler:
         assert profile.gpu_name == "Test GPU"
 
 
+# =============================================================================
+# MEDIA PROBE TESTS
+# =============================================================================
+
+class TestMediaProbeRetry:
+    """Tests for ffprobe failure handling."""
+    
+    @staticmethod
+    def _process(returncode, stdout=b"", stderr=b""):
+        process = MagicMock(returncode=returncode)
+        process.communicate = AsyncMock(return_value=(stdout, stderr))
+        return process
+    
+    @pytest.mark.asyncio
+    async def test_transient_failure_retried(self):
+        """A connection error should be retried regardless of case."""
+        from ghoststream.transcoding import MediaProbe
+        
+        probe = MediaProbe("ffprobe")
+        ok = b'{"format": {"duration": "60.0"}, "streams": []}'
+        processes = [self._process(1, stderr=b"Connection REFUSED"), self._process(0, stdout=ok)]
+        
+        with patch("asyncio.create_subprocess_exec", AsyncMock(side_effect=processes)), \
+             patch("ghoststream.transcoding.probe.asyncio.sleep", AsyncMock()):
+            info = await probe.get_media_info("http://host/a.mkv")
+        
+        assert info.duration == 60.0
+    
+    @pytest.mark.asyncio
+    async def test_fatal_failure_not_retried(self):
+        """Other ffprobe errors should fail straight away."""
+        from ghoststream.transcoding import MediaProbe
+        
+        probe = MediaProbe("ffprobe")
+        spawn = AsyncMock(return_value=self._process(1, stderr=b"Invalid data found"))
+        
+        with patch("asyncio.create_subprocess_exec", spawn):
+            info = await probe.get_media_info("/media/a.mkv")
+        
+        assert info.duration == 0
+        assert spawn.await_count == 1
+
+
+# =============================================================================
+# ERROR CLASSIFIER TESTS
+# =============================================================================
+
+class TestErrorClassifier:
+    """Tests for FFmpeg error classification."""
+    
+    ERROR_MAP = [
+        FFmpegError("out of memory", "resource", True, "OOM"),
+        FFmpegError("error", "fatal", False, "Generic error"),
+    ]
+    
+    def test_list_order_wins_over_message_order(self):
+        """The first matching map entry wins, wherever it sits in the message."""
+        classifier = ErrorClassifier(self.ERROR_MAP)
+        
+        error, category = classifier.classify("Error while encoding: Out Of Memory")
+        
+        assert error is self.ERROR_MAP[0]
+        assert category == "resource"
+    
+    def test_fallback_scan_matches_automaton(self):
+        """The plain substring scan should agree with the automaton path."""
+        classifier = ErrorClassifier(self.ERROR_MAP)
+        classifier._automaton = None
+        
+        assert classifier.classify("Error: out of memory")[1] == "resource"
+        assert classifier.classify("some error")[1] == "fatal"
+        assert classifier.classify("all good") == (None, "unknown")
+    
+    def test_mixed_case_patterns_match(self):
+        """Custom map patterns should match regardless of their case."""
+        error_map = [FFmpegError("Device Lost", "hardware", False, "GPU reset")]
+        classifier = ErrorClassifier(error_map)
+        
+        assert classifier.classify("[h264_nvenc] device lost")[1] == "hardware"
+    
+    def test_should_retry_by_category(self):
+        """Retry decisions follow the category and retryable flag."""
+        error_map = [
+            FFmpegError("device lost", "hardware", False, "GPU reset"),
+            FFmpegError("invalid data", "fatal", False, "Corrupt input"),
+            FFmpegError("out of memory", "resource", True, "OOM"),
+            FFmpegError("too many open files", "resource", False, "FD limit"),
+        ]
+        classifier = ErrorClassifier(error_map)
+        
+        assert not classifier.should_retry("device lost", 0, 3)
+        assert classifier.should_fallback_to_software("device lost")
+        assert not classifier.should_retry("invalid data", 0, 3)
+        assert classifier.should_retry("out of memory", 2, 3)
+        assert not classifier.should_retry("out of memory", 3, 3)
+        assert not classifier.should_retry("too many open files", 0, 3)
+        assert classifier.should_retry("mystery", 0, 3)
+        assert not classifier.should_retry("mystery", 1, 3)
+    
+    def test_hardware_out_of_memory_falls_back(self):
+        """An encoder OOM is a hardware failure, not a generic resource one."""
+        classifier = ErrorClassifier()
+        message = "[h264_nvenc @ 0x55d] OpenEncodeSessionEx failed: out of memory (10)"
+        
+        assert classifier.should_fallback_to_software(message)
+        assert not classifier.should_retry(message, 0, 3)
+    
+    def test_repeat_messages_hit_cache(self):
+        """Helpers re-checking the same message should not re-scan the map."""
+        classifier = ErrorClassifier(self.ERROR_MAP)
+        message = "Error: out of memory"
+        
+        assert classifier.is_resource_error(message)
+        assert classifier.should_retry(message, 0, 3)
+        assert classifier.get_error_description(message) == "OOM"
+        
+        info = classifier._classify_cached.cache_info()
+        assert (info.misses, info.hits) == (1, 2)
+        assert classifier.classify(message) is classifier.classify(message)
+    
+    def test_oversized_message_scans_tail_only(self):
+        """Huge stderr dumps should be classified on their last KiB."""
+        classifier = ErrorClassifier(self.ERROR_MAP)
+        dump = "out of memory\n" + "x" * 8192 + "\nerror"
+        
+        assert classifier.classify(dump)[1] == "fatal"
+        assert classifier.classify(dump[-2048:] + " out of memory")[1] == "resource"
+    
+    def test_global_classifier_is_shared(self):
+        """get_error_classifier should hand out one instance (and one cache)."""
+        from ghoststream.transcoding import get_error_classifier
+        
+        assert get_error_classifier() is get_error_classifier()
+    
+    def test_default_map_has_no_shadowed_patterns(self):
+        """No pattern may contain an earlier one, or it could never match."""
+        from ghoststream.transcoding.error_classifier import FFMPEG_ERROR_MAP
+        
+        patterns = [error.pattern for error in FFMPEG_ERROR_MAP]
+        for index, pattern in enumerate(patterns):
+            assert not any(earlier in pattern for earlier in patterns[:index]), pattern
+    
+    def test_default_map_patterns_are_lowercase(self):
+        """Default patterns are written lowercase, so the map reads as it matches."""
+        from ghoststream.transcoding.error_classifier import FFMPEG_ERROR_MAP
+        
+        assert all(error.pattern == error.pattern.lower() for error in FFMPEG_ERROR_MAP)
+        assert all(error.pattern for error in FFMPEG_ERROR_MAP)
+    
+    def test_map_entries_are_read_only(self):
+        """Shared map entries returned by classify must not be mutable."""
+        import dataclasses
+        
+        error, _ = ErrorClassifier(self.ERROR_MAP).classify("out of memory")
+        
+        assert not hasattr(error, "__dict__")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            error.retryable = False
+
+
 # =============================================================================
 # INTEGRATION TESTS
 # =============================================================================
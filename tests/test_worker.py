@@ -9,6 +9,7 @@ Tests cover:
 """
 
 import asyncio
+import sys
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from datetime import datetime
@@ -306,6 +307,55 @@ class TestFFmpegWorkerPool:
         assert return_code == 0
         
         await pool.stop()
+    
+    @pytest.mark.asyncio
+    async def test_run_worker_reports_progress(self):
+        """Should report frame and time parsed from stderr stats lines."""
+        pool = FFmpegWorkerPool(max_workers=2)
+        await pool.start()
+        updates = []
+        script = (
+            "import sys, time; "
+            "sys.stderr.write('frame=  240 fps= 48 size=  1024kB time=00:01:05.50 speed=2x\\n'); "
+            "sys.stderr.flush(); time.sleep(0.5)"
+        )
+        
+        return_code, _ = await pool.run_worker(
+            "test-progress",
+            [sys.executable, "-c", script],
+            progress_callback=lambda *args: updates.append(args),
+            timeout=10.0
+        )
+        
+        assert return_code == 0
+        assert updates == [("test-progress", 240, 65.5)]
+        
+        await pool.stop()
+    
+    @pytest.mark.asyncio
+    async def test_run_worker_reports_stdout_progress(self):
+        """Should report one update per -progress block written to stdout."""
+        pool = FFmpegWorkerPool(max_workers=2)
+        await pool.start()
+        updates = []
+        block = "frame=240\\nfps=48.0\\nout_time_us=65500000\\nspeed=2x\\nprogress=continue\\n"
+        script = (
+            "import sys, time; "
+            f"sys.stdout.write('{block}'); sys.stdout.flush(); time.sleep(0.2); "
+            f"sys.stdout.write('{block.replace('continue', 'end')}')"
+        )
+        
+        return_code, _ = await pool.run_worker(
+            "test-stdout-progress",
+            [sys.executable, "-c", script],
+            progress_callback=lambda *args: updates.append(args),
+            timeout=10.0
+        )
+        
+        assert return_code == 0
+        assert updates == [("test-stdout-progress", 240, 65.5)] * 2
+        
+        await pool.stop()
 
 
 # =============================================================================